@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from docx import Document
+
+from build_pipeline import BuildError, build_diploma
+from diploma_formatter import DiplomaFormatter
+
+TEMPLATE_PATH = '/home/user/Downloads/vkr-2024.docx'
+REPORT_PATH = '/home/user/study/diplom/reports/batch_report.json'
+SCHEMA_PATH = '/home/user/study/diplom/diploma_schema.md'
+
+class BatchJob(NamedTuple):
+    """Одна сборка из манифеста"""
+    name: str
+    chapters_dir: str
+    output_path: str
+
+def load_manifest(manifest_path: str) -> List[BatchJob]:
+    """
+    Чтение манифеста пакетной сборки.
+
+    Манифест — JSON-список объектов {"chapters_dir": ..., "output_path": ..., "name": ...};
+    name необязателен (по умолчанию — имя каталога над chapters_dir), относительные
+    пути отсчитываются от каталога манифеста.
+    """
+    with open(manifest_path, encoding='utf-8') as f:
+        entries = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    jobs = []
+    for entry in entries:
+        chapters_dir = os.path.join(base_dir, entry['chapters_dir'])
+        output_path = os.path.join(base_dir, entry['output_path'])
+        name = entry.get('name') or os.path.basename(os.path.dirname(os.path.normpath(chapters_dir)))
+        jobs.append(BatchJob(name, os.path.normpath(chapters_dir), os.path.normpath(output_path)))
+    return jobs
+
+# Очищенный шаблон в процессе пула (передается один раз при инициализации процесса)
+_worker_blank: Optional[bytes] = None
+_worker_settings: Dict[str, Any] = {}
+
+def _init_batch_worker(blank: bytes, settings: Dict[str, Any]):
+    """Инициализация процесса пула пакетной сборки"""
+    global _worker_blank, _worker_settings
+    _worker_blank = blank
+    _worker_settings = settings
+
+def _build_in_worker(job: BatchJob) -> Dict[str, Any]:
+    return build_one(job, _worker_blank, **_worker_settings)
+
+def build_one(job: BatchJob, blank: bytes, template_path: str, formatting: str = 'direct',
+              compact: bool = False, schema_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Сборка, исправление отступов, валидация и сохранение одного диплома
+
+    Этапы те же, что у run_pipeline (build_pipeline.build_diploma); документ
+    открывается из уже очищенного шаблона (blank), поэтому файл шаблона
+    не читается и не очищается заново.
+
+    :return: Запись отчета: имя, пути, статус, время и результаты валидации
+    """
+    started = time.perf_counter()
+    record: Dict[str, Any] = {
+        'имя': job.name,
+        'главы': job.chapters_dir,
+        'документ': job.output_path,
+    }
+    try:
+        if not os.path.isdir(job.chapters_dir):
+            raise FileNotFoundError(f"каталог глав {job.chapters_dir} не найден")
+        output_dir = os.path.dirname(job.output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        build = build_diploma(
+            job.chapters_dir, job.output_path, template_path, formatting=formatting, compact=compact,
+            schema_path=schema_path, document=Document(io.BytesIO(blank)), verbose=False,
+        )
+    except Exception as e:
+        # Ошибка этапа сборки описывается исходным исключением
+        cause = e.__cause__ if isinstance(e, BuildError) and e.__cause__ is not None else e
+        record.update({'статус': 'ошибка', 'ошибка': f'{type(cause).__name__}: {cause}'})
+    else:
+        if build.validation_error is not None:
+            record.update({'статус': 'ошибка', 'ошибка': build.validation_error})
+        else:
+            record.update({
+                'статус': 'готово',
+                'замечаний': build.issues,
+                'валидация': build.validation,
+            })
+        if build.compaction is not None:
+            record['уплотнение'] = build.compaction._asdict()
+    record['время_с'] = round(time.perf_counter() - started, 3)
+    record['процесс'] = os.getpid()
+    return record
+
+class BatchBuilder:
+    """
+    Пакетная сборка дипломов группы по манифесту.
+
+    Шаблон загружается и очищается один раз в родительском процессе; готовый
+    пакет передается процессам пула при их запуске, и каждая сборка открывает
+    документ из этих байтов. Сборки распределяются по workers процессам,
+    для каждой выполняются исправление отступов и валидация; итог — общий отчет.
+    """
+
+    def __init__(self, jobs: List[BatchJob], template_path: str = TEMPLATE_PATH,
+                 workers: Optional[int] = None, formatting: str = 'direct', compact: bool = False,
+                 schema_path: Optional[str] = None):
+        """
+        :param jobs: Сборки из манифеста (load_manifest)
+        :param template_path: Путь к шаблону ВКР
+        :param workers: Число процессов (по умолчанию — число ядер)
+        :param formatting: Режим оформления, как в run_pipeline: 'direct' или 'style'
+        :param compact: Уплотнять документы перед исправлением отступов, как в run_pipeline
+        :param schema_path: Схема диплома с объемом глав для валидации
+        """
+        self.jobs = jobs
+        self.template_path = template_path
+        self.workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+        self.formatting = formatting
+        self.compact = compact
+        self.schema_path = schema_path
+
+    def _blank_template(self) -> bytes:
+        """Очищенный шаблон со стилями ВКР (один раз на всю пакетную сборку)"""
+        formatter = DiplomaFormatter('', os.devnull, self.template_path)
+        stream = io.BytesIO()
+        formatter.document.save(stream)
+        return stream.getvalue()
+
+    def run(self) -> Dict[str, Any]:
+        """Выполнение всех сборок; возвращает общий отчет"""
+        started = time.perf_counter()
+        blank = self._blank_template()
+        template_seconds = time.perf_counter() - started
+
+        settings = {
+            'template_path': self.template_path,
+            'formatting': self.formatting,
+            'compact': self.compact,
+            'schema_path': self.schema_path,
+        }
+        executor = None
+        if self.workers > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_batch_worker,
+                initargs=(blank, settings),
+            )
+            records = executor.map(_build_in_worker, self.jobs)
+        else:
+            records = (build_one(job, blank, **settings) for job in self.jobs)
+
+        builds = []
+        try:
+            for record in records:
+                status = '✅' if record['статус'] == 'готово' else '❌'
+                print(f"{status} {record['имя']}: {record['время_с']:.2f} с")
+                builds.append(record)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        elapsed = time.perf_counter() - started
+        succeeded = sum(record['статус'] == 'готово' for record in builds)
+        return {
+            'дата': datetime.now().isoformat(timespec='seconds'),
+            'шаблон': self.template_path,
+            'процессов': self.workers,
+            'сборок': len(builds),
+            'успешно': succeeded,
+            'с_ошибками': len(builds) - succeeded,
+            'подготовка_шаблона_с': round(template_seconds, 3),
+            'общее_время_с': round(elapsed, 3),
+            'сборок_в_минуту': round(len(builds) / elapsed * 60, 1) if elapsed else None,
+            'сборки': builds,
+        }
+
+def save_report(report: Dict[str, Any], report_path: str = REPORT_PATH):
+    """Сохранение общего отчета в JSON"""
+    directory = os.path.dirname(report_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+def print_batch_report(report: Dict[str, Any]):
+    """Вывод сводки пакетной сборки"""
+    print("\n📦 Пакетная сборка:")
+    print(f"Сборок: {report['сборок']}, успешно: {report['успешно']}, с ошибками: {report['с_ошибками']}")
+    print(f"Процессов: {report['процессов']}, общее время: {report['общее_время_с']:.2f} с "
+          f"(подготовка шаблона {report['подготовка_шаблона_с']:.2f} с), "
+          f"сборок в минуту: {report['сборок_в_минуту']}")
+    for record in report['сборки']:
+        if record['статус'] == 'готово':
+            print(f"  ✅ {record['имя']:<30} {record['время_с']:>7.2f} с  замечаний: {record['замечаний']}")
+        else:
+            print(f"  ❌ {record['имя']:<30} {record['время_с']:>7.2f} с  {record['ошибка']}")
+
+def main():
+    """Пакетная сборка дипломов по манифесту"""
+    parser = argparse.ArgumentParser(description="Пакетная сборка дипломов группы")
+    parser.add_argument("manifest", help="JSON-манифест: список {chapters_dir, output_path, name}")
+    parser.add_argument("--template", default=TEMPLATE_PATH, help="шаблон ВКР")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов (по умолчанию — число ядер)")
+    parser.add_argument("--formatting", choices=["direct", "style"], default="direct",
+                        help="оформление текста: прямое или через стили ВКР")
+    parser.add_argument("--compact", action="store_true",
+                        help="объединять соседние фрагменты текста с одинаковым оформлением")
+    parser.add_argument("--schema", default=SCHEMA_PATH, help="схема диплома с объемом глав в страницах")
+    parser.add_argument("--report", default=REPORT_PATH, help="файл общего отчета JSON")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.manifest):
+        print(f"Ошибка: файл {args.manifest} не найден")
+        return
+
+    schema_path = args.schema if os.path.exists(args.schema) else None
+    builder = BatchBuilder(load_manifest(args.manifest), args.template, args.workers, args.formatting,
+                           args.compact, schema_path)
+    report = builder.run()
+    save_report(report, args.report)
+    print_batch_report(report)
+    print(f"\nОтчет сохранен в {args.report}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from chapter_generator import SCALES, ChapterGenerator
+from chapter_index import clear_chapter_indexes
+from diploma_formatter import DiplomaFormatter, clear_template_caches
+from document_spacing_fixer import DocumentSpacingFixer
+from diploma_validator import DiplomaValidator
+from document_text_extractor import DocumentTextExtractor
+from document_snapshot import snapshot_path
+
+TEMPLATE_PATH = '/home/user/Downloads/vkr-2024.docx'
+RESULTS_DIR = '/home/user/study/diplom/reports/benchmarks'
+
+def _git_commit() -> Optional[str]:
+    """Текущий коммит репозитория со скриптами (None, если git недоступен)"""
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+def measure(func: Callable[[], Any], repeat: int = 3, memory: bool = True,
+            reset: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    """
+    Замер времени и пикового расхода памяти этапа
+
+    Время измеряется без tracemalloc (он замедляет выполнение в разы), пик памяти —
+    отдельным запуском под tracemalloc. tracemalloc учитывает только память Python:
+    деревья lxml выделяются в C и в пик не попадают.
+
+    :param reset: Сброс кэшей этапа (снимок документа, очищенный шаблон) перед каждым
+                  запуском, чтобы каждый повтор был первой сборкой; тогда отдельно
+                  замеряется и повторный запуск с заполненными кэшами (время_с_кэшем_с)
+    """
+    timings = []
+    for _ in range(repeat):
+        if reset is not None:
+            reset()
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    result = {
+        'время_мин_с': round(min(timings), 4),
+        'время_медиана_с': round(statistics.median(timings), 4),
+    }
+    if reset is not None:
+        # Кэши заполнены последним повтором
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        result['время_с_кэшем_с'] = round(time.perf_counter() - started, 4)
+    if memory:
+        if reset is not None:
+            reset()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result['пик_памяти_мб'] = round(peak / (1024 * 1024), 2)
+    return result
+
+class BenchmarkSuite:
+    """
+    Замеры основных этапов сборки на синтетических главах разного размера.
+
+    Для каждого масштаба генерируется дерево глав (ChapterGenerator), после чего
+    по очереди измеряются форматер, исправление отступов, валидатор и извлечение
+    текста; каждый следующий этап работает с документом, записанным предыдущим.
+    Перед каждым повтором кэши процесса и снимок документа сбрасываются, поэтому
+    основные числа — время первой сборки, а время с кэшами указывается отдельно.
+    """
+
+    STAGES = ('форматер', 'исправление_отступов', 'валидатор', 'извлечение_текста')
+
+    def __init__(self, template_path: str = TEMPLATE_PATH, scales: Optional[List[str]] = None,
+                 repeat: int = 3, memory: bool = True, seed: int = 0):
+        self.template_path = template_path
+        self.scales = scales or list(SCALES)
+        self.repeat = repeat
+        self.memory = memory
+        self.seed = seed
+
+    def run_scale(self, scale_name: str, work_dir: str) -> Dict[str, Any]:
+        """Замеры всех этапов на одном масштабе"""
+        chapters_dir = os.path.join(work_dir, scale_name, 'chapters')
+        output_path = os.path.join(work_dir, scale_name, 'diploma.docx')
+        reports_dir = os.path.join(work_dir, scale_name, 'reports')
+        generated = ChapterGenerator(SCALES[scale_name], seed=self.seed).generate(chapters_dir)
+
+        def format_stage():
+            DiplomaFormatter(chapters_dir, output_path, self.template_path).compile_diploma()
+
+        def fix_stage():
+            DocumentSpacingFixer(output_path).fix_document_spacing()
+
+        def validate_stage():
+            DiplomaValidator(output_path).validate()
+
+        def extract_stage():
+            with DocumentTextExtractor(output_path, reports_dir=reports_dir) as extractor:
+                extractor.save_streaming()
+
+        def reset_formatter():
+            clear_template_caches()
+            clear_chapter_indexes()
+
+        def reset_snapshot():
+            # Инструменты анализа читают снимок, записанный предыдущим запуском
+            if os.path.exists(snapshot_path(output_path)):
+                os.remove(snapshot_path(output_path))
+
+        stages = {}
+        for name, func, reset in zip(self.STAGES, (format_stage, fix_stage, validate_stage, extract_stage),
+                                     (reset_formatter, None, reset_snapshot, reset_snapshot)):
+            print(f"  {name}...")
+            stages[name] = measure(func, repeat=self.repeat, memory=self.memory, reset=reset)
+
+        return {
+            'масштаб': scale_name,
+            'параметры': SCALES[scale_name]._asdict(),
+            'исходные_данные': generated,
+            'размер_документа_байт': os.path.getsize(output_path),
+            'этапы': stages,
+        }
+
+    def run(self) -> Dict[str, Any]:
+        """Замеры на всех масштабах"""
+        results = []
+        with tempfile.TemporaryDirectory(prefix='diploma_benchmark_') as work_dir:
+            for scale_name in self.scales:
+                print(f"📏 Масштаб {scale_name}")
+                results.append(self.run_scale(scale_name, work_dir))
+
+        return {
+            'коммит': _git_commit(),
+            'дата': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'повторов': self.repeat,
+            'результаты': results,
+        }
+
+def save_results(results: Dict[str, Any], results_dir: str = RESULTS_DIR) -> str:
+    """Сохранение результатов в JSON (имя файла — время запуска и коммит)"""
+    os.makedirs(results_dir, exist_ok=True)
+    stamp = results['дата'].replace(':', '').replace('-', '')
+    path = os.path.join(results_dir, f"{stamp}_{results['коммит'] or 'nogit'}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    return path
+
+def print_results(results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    """Таблица результатов; при наличии базового замера — изменение времени в процентах"""
+    baseline_stages = {
+        item['масштаб']: item['этапы'] for item in (baseline or {}).get('результаты', [])
+    }
+    print(f"\n📊 Результаты (коммит {results['коммит'] or '—'}):")
+    print(f"{'масштаб':<8} {'этап':<22} {'время, с':>10} {'с кэшем, с':>11} {'память, МБ':>11} {'изменение':>10}")
+    for item in results['результаты']:
+        for stage, values in item['этапы'].items():
+            memory = values.get('пик_памяти_мб')
+            warm = values.get('время_с_кэшем_с')
+            line = (f"{item['масштаб']:<8} {stage:<22} {values['время_мин_с']:>10.3f} "
+                    f"{f'{warm:.3f}' if warm is not None else '—':>11} "
+                    f"{memory if memory is not None else '—':>11}")
+            previous = baseline_stages.get(item['масштаб'], {}).get(stage)
+            if previous and previous['время_мин_с']:
+                change = (values['время_мин_с'] / previous['время_мин_с'] - 1) * 100
+                marker = '⚠️' if change > 10 else ''
+                line += f" {change:>+9.1f}% {marker}"
+            print(line)
+
+def main():
+    """Запуск замеров"""
+    parser = argparse.ArgumentParser(description="Замеры производительности этапов сборки диплома")
+    parser.add_argument("--scale", action="append", choices=sorted(SCALES),
+                        help="масштаб (можно указать несколько раз; по умолчанию все)")
+    parser.add_argument("--repeat", type=int, default=3, help="число повторов для замера времени")
+    parser.add_argument("--no-memory", action="store_true", help="не измерять пиковую память")
+    parser.add_argument("--template", default=TEMPLATE_PATH, help="шаблон ВКР")
+    parser.add_argument("--output", default=RESULTS_DIR, help="каталог для JSON с результатами")
+    parser.add_argument("--compare", metavar="RESULTS_JSON", help="предыдущие результаты для сравнения")
+    args = parser.parse_args()
+
+    suite = BenchmarkSuite(args.template, scales=args.scale, repeat=args.repeat, memory=not args.no_memory)
+    results = suite.run()
+    path = save_results(results, args.output)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    print(f"\nРезультаты сохранены в {path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, NamedTuple, Optional
+
+from build_tracing import NULL_TRACER
+from chapter_cache import ChapterCache
+from diploma_formatter import DiplomaFormatter
+from document_spacing_fixer import DocumentSpacingFixer
+from document_compactor import CompactionStats, DocumentCompactor
+from diploma_validator import DiplomaValidator
+from document_snapshot import save_snapshot
+from document_text_extractor import REPORTS_DIR
+from post_build_analysis import PostBuildAnalysis, run_post_build_analysis
+
+# Разделы результатов валидатора, которые считаются замечаниями
+ISSUE_SECTIONS = ('структурные_требования', 'технические_требования', 'стилистические_замечания')
+
+class BuildError(Exception):
+    """Ошибка этапа сборки, после которой документ не сохраняется"""
+
+    def __init__(self, message: str, stopped: str):
+        """
+        :param message: Описание ошибки этапа ('Ошибка при форматировании: ...')
+        :param stopped: Сообщение об остановке сборки на этом этапе
+        """
+        super().__init__(message)
+        self.stopped = stopped
+
+class BuildResult(NamedTuple):
+    """Результаты сборки диплома"""
+    validation: Optional[Dict[str, Any]]          # результаты DiplomaValidator.validate (в памяти или этапа анализа)
+    validation_error: Optional[str]               # ошибка валидатора (документ при этом сохраняется)
+    compaction: Optional[CompactionStats]         # статистика уплотнения (compact=True)
+    post_build: Optional[PostBuildAnalysis]       # этап анализа готового файла (analysis=True)
+
+    @property
+    def issues(self) -> int:
+        """Число замечаний валидатора"""
+        if self.validation is None:
+            return 0
+        return sum(len(self.validation[section]) for section in ISSUE_SECTIONS)
+
+def _quiet(*args, **kwargs):
+    pass
+
+def build_diploma(chapters_dir: str, output_path: str, template_path: str, cache_dir: Optional[str] = None,
+                  workers: int = 1, backend: str = 'docx', formatting: str = 'direct', compact: bool = False,
+                  tracer=None, analysis: bool = False, reports_dir: str = REPORTS_DIR,
+                  schema_path: Optional[str] = None, document=None,
+                  chapter_cache: Optional[ChapterCache] = None, verbose: bool = True) -> BuildResult:
+    """
+    Этапы сборки диплома над одним документом в памяти: форматирование, уплотнение,
+    исправление отступов, валидация, сохранение, снимок и анализ готового файла.
+
+    Общая последовательность для run_pipeline (format_diploma.py), режима наблюдения
+    (DiplomaWatcher) и пакетной сборки (batch_build.py); параметры — как у run_pipeline.
+
+    :param document: Уже очищенный шаблон python-docx (пакетная сборка); тогда файл
+                     шаблона не читается
+    :param chapter_cache: Кэш фрагментов глав, живущий между сборками (режим наблюдения);
+                          без него кэш создается по cache_dir
+    :param verbose: Выводить сообщения о начале и окончании этапов
+    :raises BuildError: Ошибка форматирования, уплотнения или исправления отступов
+    """
+    tracer = tracer if tracer is not None else NULL_TRACER
+    say = print if verbose else _quiet
+
+    # Шаг 1: Основное форматирование
+    say("Запуск форматирования диплома...")
+    try:
+        with tracer.span("форматирование") as span:
+            formatter = DiplomaFormatter(chapters_dir, output_path, template_path,
+                                          cache_dir=cache_dir, workers=workers, backend=backend,
+                                          document=document, chapter_cache=chapter_cache,
+                                          direct_formatting=formatting == "direct", tracer=tracer)
+            formatter.compile_diploma(save=False)
+            if backend == "docx":
+                span.count(абзацев=len(formatter.document.paragraphs))
+    except Exception as e:
+        raise BuildError(f"Ошибка при форматировании: {e}",
+                         "Процесс остановлен из-за ошибки в основном форматировании") from e
+    say("Основное форматирование завершено успешно")
+    document = formatter.document if backend == "docx" else None
+
+    # Уплотнение: объединение фрагментов текста и удаление служебных отметок
+    compaction_stats = None
+    if compact:
+        say("Запуск уплотнения документа...")
+        try:
+            with tracer.span("уплотнение") as span:
+                compactor = DocumentCompactor(output_path, document=document)
+                compaction_stats = compactor.compact(save=False)
+                document = compactor.document
+                span.count(фрагментов_удалено=compaction_stats.runs_removed)
+        except Exception as e:
+            raise BuildError(f"Ошибка при уплотнении документа: {e}",
+                             "Процесс остановлен из-за ошибки в уплотнении документа") from e
+        say("Уплотнение документа завершено успешно")
+
+    # Шаг 2: Исправление отступов и интервалов
+    say("Запуск исправления отступов и интервалов...")
+    try:
+        with tracer.span("исправление отступов") as span:
+            fixer = DocumentSpacingFixer(output_path, document=document, mode=formatting)
+            fixer.fix_document_spacing(save=False)
+            document = fixer.document
+            span.count(абзацев=len(document.paragraphs))
+    except Exception as e:
+        raise BuildError(f"Ошибка при исправлении отступов: {e}",
+                         "Процесс остановлен из-за ошибки в исправлении отступов") from e
+    say("Исправление отступов завершено успешно")
+
+    # Шаг 3: Валидация результата (при analysis=True — в этапе анализа после сохранения)
+    results = None
+    validation_error = None
+    if not analysis:
+        say("Запуск валидации диплома...")
+        try:
+            with tracer.span("валидация") as span:
+                validator = DiplomaValidator(output_path, document=document, schema_path=schema_path)
+                results = validator.validate()
+                span.count(замечаний=sum(len(results[key]) for key in ISSUE_SECTIONS))
+        except Exception as e:
+            validation_error = f'{type(e).__name__}: {e}'
+            say(f"Ошибка при валидации: {e}")
+
+    # Единственная запись документа на диск
+    with tracer.span("сохранение"):
+        document.save(output_path)
+
+    # Снимок документа для инструментов анализа строится из документа в памяти
+    try:
+        with tracer.span("снимок"):
+            save_snapshot(output_path, document=document)
+    except OSError as e:
+        say(f"Не удалось записать снимок документа: {e}")
+
+    # Шаг 4: Анализ готового документа
+    post_build = None
+    if analysis:
+        say("Запуск анализа документа...")
+        with tracer.span("анализ") as span:
+            post_build = run_post_build_analysis(output_path, reports_dir, schema_path=schema_path)
+            span.count(ошибок=len(post_build.errors))
+        results = post_build.validation
+        validation_error = post_build.errors.get('валидация')
+
+    return BuildResult(results, validation_error, compaction_stats, post_build)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import cProfile
+import json
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: пиковый RSS недоступен
+    resource = None
+
+# Категории интервалов
+STAGE = 'этап'
+CHAPTER = 'глава'
+
+class TraceSpan:
+    """Именованный интервал сборки: время, процессорное время, память и счетчики"""
+
+    __slots__ = ('name', 'category', 'depth', 'start', 'wall', 'cpu', 'memory_mb', 'counts', 'profile_path')
+
+    def __init__(self, name: str, category: str, depth: int, start: float):
+        self.name = name
+        self.category = category
+        self.depth = depth
+        self.start = start
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.memory_mb: Optional[float] = None
+        self.counts: Dict[str, int] = {}
+        self.profile_path: Optional[str] = None
+
+    def count(self, **counts: int):
+        """Добавление счетчиков (абзацы, фрагменты, элементы и т.п.)"""
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+
+class _NullSpan:
+    """Интервал, который ничего не записывает"""
+
+    def count(self, **counts: int):
+        pass
+
+class NullTracer:
+    """Трассировщик по умолчанию: инструментированный код работает без накладных расходов"""
+
+    enabled = False
+
+    def __init__(self):
+        self._context = nullcontext(_NullSpan())
+
+    def span(self, name: str, category: str = STAGE):
+        return self._context
+
+NULL_TRACER = NullTracer()
+
+class BuildTracer:
+    """
+    Трассировка этапов сборки диплома.
+
+    Каждый интервал (span) фиксирует время, процессорное время, пиковую память
+    и счетчики элементов; интервалы могут быть вложенными (этап → глава).
+    Результат выгружается в формате Chrome trace (chrome://tracing, Perfetto)
+    и выводится сводной таблицей.
+
+    Пиковая память по умолчанию — максимальный RSS процесса к концу интервала
+    (учитывает и деревья lxml); при memory=True — пик tracemalloc внутри интервала
+    (только память Python, но с точностью до интервала и заметно медленнее).
+    При profile_dir каждый этап верхнего уровня дополнительно профилируется
+    cProfile, профиль сохраняется в <profile_dir>/<номер>_<этап>.prof.
+    """
+
+    enabled = True
+
+    def __init__(self, memory: bool = False, profile_dir: Optional[str] = None):
+        self.memory = memory
+        self.profile_dir = profile_dir
+        self.spans: List[TraceSpan] = []
+        self._stack: List[TraceSpan] = []
+        self._peaks: List[int] = []
+        self._origin = time.perf_counter()
+        self._profiling = False
+
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def close(self):
+        """Остановка tracemalloc, если он запускался трассировщиком"""
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @property
+    def memory_source(self) -> Optional[str]:
+        if self.memory:
+            return 'tracemalloc'
+        return 'rss' if resource is not None else None
+
+    @staticmethod
+    def _max_rss_mb() -> Optional[float]:
+        if resource is None:
+            return None
+        # ru_maxrss в Linux — в килобайтах
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    @contextmanager
+    def span(self, name: str, category: str = STAGE) -> Iterator[TraceSpan]:
+        """Интервал вокруг блока кода"""
+        index = len(self.spans)
+        span = TraceSpan(name, category, len(self._stack), time.perf_counter() - self._origin)
+        self.spans.append(span)
+
+        if self.memory:
+            # Пик, набранный родителем до начала вложенного интервала, переходит к родителю
+            current_peak = tracemalloc.get_traced_memory()[1]
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], current_peak)
+            tracemalloc.reset_peak()
+            self._peaks.append(0)
+
+        profiler = None
+        if self.profile_dir and not self._stack and not self._profiling:
+            profiler = cProfile.Profile()
+            self._profiling = True
+
+        self._stack.append(span)
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield span
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = False
+            span.wall = time.perf_counter() - wall_started
+            span.cpu = time.process_time() - cpu_started
+            self._stack.pop()
+
+            if self.memory:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                tracemalloc.reset_peak()
+                span.memory_mb = peak / (1024 * 1024)
+            else:
+                span.memory_mb = self._max_rss_mb()
+
+            if profiler is not None:
+                span.profile_path = self._save_profile(profiler, index, span)
+
+    def _save_profile(self, profiler: cProfile.Profile, index: int, span: TraceSpan) -> str:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        safe_name = re.sub(r'[^\w.-]+', '_', span.name)
+        path = os.path.join(self.profile_dir, f'{index:03d}_{safe_name}.prof')
+        profiler.dump_stats(path)
+        return path
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """События в формате Chrome trace (complete events, время в микросекундах)"""
+        pid = os.getpid()
+        events = []
+        for span in self.spans:
+            args: Dict[str, Any] = {'процессорное_время_мс': round(span.cpu * 1000, 3)}
+            if span.memory_mb is not None:
+                args[f'память_мб_{self.memory_source}'] = round(span.memory_mb, 2)
+            args.update(span.counts)
+            if span.profile_path:
+                args['профиль'] = span.profile_path
+            events.append({
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': round(span.start * 1e6, 1),
+                'dur': round(span.wall * 1e6, 1),
+                'pid': pid,
+                'tid': 0,
+                'args': args,
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_chrome_trace(self, path: str):
+        """Сохранение трассировки в JSON для chrome://tracing"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+
+    def print_summary(self, top_functions: int = 5):
+        """Сводная таблица интервалов и самые затратные функции профилированных этапов"""
+        memory_title = {'tracemalloc': 'пик, МБ', 'rss': 'RSS, МБ'}.get(self.memory_source, 'память')
+        print("\n⏱️ Трассировка сборки:")
+        print(f"{'интервал':<44} {'время, мс':>10} {'ЦП, мс':>9} {memory_title:>9}  счетчики")
+        for span in self.spans:
+            name = ('  ' * span.depth + span.name)[:44]
+            memory = f"{span.memory_mb:.1f}" if span.memory_mb is not None else '—'
+            counts = ', '.join(f"{key}={value}" for key, value in span.counts.items())
+            print(f"{name:<44} {span.wall * 1000:>10.1f} {span.cpu * 1000:>9.1f} {memory:>9}  {counts}")
+
+        for span in self.spans:
+            if not span.profile_path:
+                continue
+            print(f"\n🔬 Профиль этапа «{span.name}» ({span.profile_path}):")
+            stats = pstats.Stats(span.profile_path)
+            stats.sort_stats('cumulative')
+            for (filename, line, function), (_, calls, _, cumulative, _) in _top_entries(stats, top_functions):
+                print(f"  {cumulative * 1000:9.1f} мс  {calls:7d} выз.  {os.path.basename(filename)}:{line} {function}")
+
+def _top_entries(stats: pstats.Stats, limit: int):
+    """Самые затратные функции по суммарному времени (без самого профилировщика)"""
+    entries = [
+        (key, value) for key, value in stats.stats.items()
+        if not key[0].endswith('build_tracing.py') and key[0] != '~'
+    ]
+    entries.sort(key=lambda item: item[1][3], reverse=True)
+    return entries[:limit]
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+from typing import Dict, List, Optional
+
+from lxml import etree
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+
+class ChapterCache:
+    """
+    Дисковый кэш отрисованных глав.
+
+    Для каждого content.md хранится фрагмент тела документа (элементы w:p, w:tbl),
+    который форматер получил при конвертации. Ключ фрагмента — хэш содержимого
+    файла главы, его относительного пути и настроек форматера (хэш шаблона,
+    переводы глав, версия правил отрисовки).
+
+    В памяти процесса для каждого файла главы хранится только последний
+    использованный фрагмент: в долгой сессии (режим наблюдения) фрагменты
+    прежних версий главы вытесняются и остаются только на диске.
+    """
+
+    def __init__(self, cache_dir: Optional[str], settings_key: str):
+        """
+        Инициализация кэша
+
+        :param cache_dir: Каталог для хранения фрагментов; None — кэш только в памяти процесса
+        :param settings_key: Хэш шаблона и настроек форматера
+        """
+        self.cache_dir = cache_dir
+        self.settings_key = settings_key
+        self.fragments_dir = os.path.join(cache_dir, 'chapters') if cache_dir else None
+        if self.fragments_dir:
+            os.makedirs(self.fragments_dir, exist_ok=True)
+
+        # Уже прочитанные в этом процессе фрагменты
+        self._memory: Dict[str, bytes] = {}
+        # Ключ -> путь главы и путь главы -> ключ ее фрагмента в памяти
+        self._paths: Dict[str, str] = {}
+        self._current: Dict[str, str] = {}
+
+    def chapter_key(self, relative_path: str, content: bytes, title: str = '') -> str:
+        """
+        Ключ фрагмента главы
+
+        :param relative_path: Путь к content.md относительно каталога глав
+        :param content: Содержимое content.md
+        :param title: Заголовок главы, который попадает во фрагмент
+        """
+        digest = hashlib.sha256()
+        digest.update(self.settings_key.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(relative_path.replace(os.sep, '/').encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(title.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(content)
+        key = digest.hexdigest()
+        self._paths[key] = relative_path
+        return key
+
+    def _remember(self, key: str, data: bytes):
+        """Фрагмент в памяти; прежний фрагмент той же главы вытесняется"""
+        path = self._paths.get(key)
+        if path is not None:
+            previous = self._current.get(path)
+            if previous is not None and previous != key:
+                self._memory.pop(previous, None)
+                self._paths.pop(previous, None)
+            self._current[path] = key
+        self._memory[key] = data
+
+    def _fragment_path(self, key: str) -> str:
+        return os.path.join(self.fragments_dir, f'{key}.xml')
+
+    def load(self, key: str) -> Optional[bytes]:
+        """
+        Загрузка фрагмента главы
+
+        :return: Сериализованный фрагмент (см. serialize_fragment) или None, если его нет
+        """
+        data = self._memory.get(key)
+        if data is None and self.fragments_dir:
+            try:
+                with open(self._fragment_path(key), 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return None
+        if data is not None:
+            self._remember(key, data)
+        return data
+
+    def store(self, key: str, data: bytes):
+        """Сохранение сериализованного фрагмента главы"""
+        self._remember(key, data)
+        if not self.fragments_dir:
+            return
+
+        # Запись через временный файл, чтобы прерванная сборка не оставила битый фрагмент
+        path = self._fragment_path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+def serialize_fragment(elements: List[etree._Element]) -> bytes:
+    """Сериализация элементов тела документа во фрагмент OOXML"""
+    return (
+        f'<w:body {nsdecls("w")}>'.encode('utf-8')
+        + b''.join(etree.tostring(element, encoding='UTF-8') for element in elements)
+        + b'</w:body>'
+    )
+
+def parse_fragment(data: bytes) -> List[etree._Element]:
+    """Разбор фрагмента в новые элементы, готовые к вставке в документ"""
+    return list(parse_xml(data))
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import random
+from typing import Dict, List, NamedTuple
+
+# Главы в порядке, который ожидает DiplomaFormatter; у первых пяти есть подразделы,
+# остальные состоят из одного content.md
+CHAPTERS = [
+    ('1_introduction', True),
+    ('2_theoretical_part', True),
+    ('3_practical_implementation', True),
+    ('4_research_methodology', True),
+    ('5_research_results', True),
+    ('6_practical_significance', False),
+    ('7_development_prospects', False),
+    ('8_appendices', False),
+]
+
+WORDS = (
+    'анализ система модель данные метод классификация изображение признак обучение выборка '
+    'точность алгоритм результат исследование болезнь растение лист томат нейронная сеть '
+    'параметр оценка качество метрика обработка предобработка архитектура модуль сервер '
+    'клиент интерфейс запрос ответ база хранение эксперимент гипотеза значение показатель '
+    'распознавание сегментация нормализация ядро вектор функция потери оптимизация слой'
+).split()
+
+CODE_LINES = [
+    'import numpy as np',
+    'from sklearn.svm import SVC',
+    'model = SVC(kernel="rbf", C=1.0)',
+    'model.fit(X_train, y_train)',
+    'predictions = model.predict(X_test)',
+    'accuracy = (predictions == y_test).mean()',
+    'print(f"Точность: {accuracy:.3f}")',
+]
+
+class GeneratorScale(NamedTuple):
+    """Размер синтетического дерева глав"""
+    sections_per_chapter: int     # подразделов в главах 1-5
+    paragraphs_per_section: int   # абзацев текста в каждом content.md
+    list_every: int               # список после каждых N абзацев (0 — без списков)
+    code_every: int               # блок кода после каждых N абзацев (0 — без кода)
+    table_every: int              # таблица после каждых N абзацев (0 — без таблиц)
+
+SCALES: Dict[str, GeneratorScale] = {
+    'small': GeneratorScale(2, 10, 4, 10, 0),
+    'medium': GeneratorScale(4, 40, 5, 12, 20),
+    'large': GeneratorScale(8, 120, 6, 15, 30),
+}
+
+class ChapterGenerator:
+    """
+    Генератор синтетических деревьев глав (chapters/*/content.md) для замеров.
+
+    Текст детерминирован (задается seed), поэтому одинаковый масштаб дает
+    одинаковые главы в разных запусках и на разных коммитах.
+    """
+
+    def __init__(self, scale: GeneratorScale, seed: int = 0):
+        self.scale = scale
+        self.random = random.Random(seed)
+
+    def _words(self, count: int) -> str:
+        return ' '.join(self.random.choice(WORDS) for _ in range(count))
+
+    def _sentence(self) -> str:
+        words = self._words(self.random.randint(8, 18))
+        if self.random.random() < 0.2:
+            # Строчная разметка: полужирный, курсив или код
+            marker = self.random.choice(('**', '*', '`'))
+            emphasized = self.random.choice(WORDS)
+            words = f'{words} {marker}{emphasized}{marker}'
+        return words[0].upper() + words[1:] + '.'
+
+    def paragraph(self) -> str:
+        return ' '.join(self._sentence() for _ in range(self.random.randint(2, 6)))
+
+    def bullet_list(self) -> List[str]:
+        lines = []
+        for _ in range(self.random.randint(3, 6)):
+            lines.append(f'- {self._words(self.random.randint(3, 8)).capitalize()}')
+            if self.random.random() < 0.3:
+                for _ in range(self.random.randint(1, 3)):
+                    lines.append(f'  * {self._words(self.random.randint(2, 6))}')
+        return lines
+
+    def code_block(self) -> List[str]:
+        lines = self.random.sample(CODE_LINES, self.random.randint(3, len(CODE_LINES)))
+        return ['```python', *lines, '```']
+
+    def table(self) -> List[str]:
+        columns = self.random.randint(2, 4)
+        header = [self.random.choice(WORDS).capitalize() for _ in range(columns)]
+        rows = [
+            '| ' + ' | '.join(f'{self.random.random():.3f}' for _ in range(columns)) + ' |'
+            for _ in range(self.random.randint(3, 6))
+        ]
+        return ['| ' + ' | '.join(header) + ' |', '|' + '---|' * columns, *rows]
+
+    def content(self, title: str) -> str:
+        """Текст одного content.md"""
+        scale = self.scale
+        lines = [f'# {title}', '']
+        for i in range(1, scale.paragraphs_per_section + 1):
+            if i % 8 == 1:
+                lines += [f'## {self._words(3).capitalize()}', '']
+            elif i % 4 == 1:
+                lines += [f'### {self._words(2).capitalize()}', '']
+            lines += [self.paragraph(), '']
+            if scale.list_every and i % scale.list_every == 0:
+                lines += self.bullet_list() + ['']
+            if scale.code_every and i % scale.code_every == 0:
+                lines += self.code_block() + ['']
+            if scale.table_every and i % scale.table_every == 0:
+                lines += self.table() + ['']
+        return '\n'.join(lines)
+
+    def generate(self, chapters_dir: str) -> Dict[str, int]:
+        """
+        Запись дерева глав в chapters_dir
+
+        :return: Количество файлов, строк и байт сгенерированного Markdown
+        """
+        stats = {'файлов': 0, 'строк': 0, 'байт': 0}
+        for number, (chapter, has_sections) in enumerate(CHAPTERS, start=1):
+            if has_sections:
+                targets = [
+                    (os.path.join(chapters_dir, chapter, f'{number}.{section}_section_{section}'),
+                     f'{number}.{section} {self._words(3).capitalize()}')
+                    for section in range(1, self.scale.sections_per_chapter + 1)
+                ]
+            else:
+                targets = [(os.path.join(chapters_dir, chapter), f'{number}. {self._words(3).capitalize()}')]
+
+            for directory, title in targets:
+                os.makedirs(directory, exist_ok=True)
+                text = self.content(title)
+                with open(os.path.join(directory, 'content.md'), 'w', encoding='utf-8') as f:
+                    f.write(text)
+                stats['файлов'] += 1
+                stats['строк'] += text.count('\n') + 1
+                stats['байт'] += len(text.encode('utf-8'))
+        return stats
+
+def main():
+    """Генерация синтетического дерева глав"""
+    parser = argparse.ArgumentParser(description="Генерация синтетических глав диплома для замеров")
+    parser.add_argument("output", help="каталог, в котором создается дерево глав")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="medium", help="размер дерева")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора случайных чисел")
+    args = parser.parse_args()
+
+    stats = ChapterGenerator(SCALES[args.scale], seed=args.seed).generate(args.output)
+    print(f"Сгенерировано в {args.output}: {stats['файлов']} файлов, {stats['строк']} строк, {stats['байт']} байт")
+
+if __name__ == '__main__':
+    main()
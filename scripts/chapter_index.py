@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+# Файл текста главы или раздела
+CONTENT_NAME = 'content.md'
+# Необязательный манифест в каталоге глав: порядок глав и их заголовки
+MANIFEST_NAME = 'chapters.json'
+
+# Без манифеста главами считаются каталоги, имя которых начинается с номера
+_NUMBERED = re.compile(r'^\d')
+_DIGITS = re.compile(r'(\d+)')
+
+def natural_key(name: str) -> Tuple[Union[str, int], ...]:
+    """Ключ естественной сортировки: '2.10_x' идет после '2.9_x'"""
+    parts = _DIGITS.split(name)
+    # Четные позиции — текст, нечетные — числа, поэтому типы сравниваемых элементов совпадают
+    return tuple(int(part) if i % 2 else part.lower() for i, part in enumerate(parts))
+
+class ChapterEntry(NamedTuple):
+    """Файл content.md в порядке документа"""
+    path: str                  # путь к content.md
+    relative_dir: str          # каталог относительно каталога глав ('2_theoretical_part/2.1_x')
+    chapter: str               # каталог главы верхнего уровня ('2_theoretical_part')
+    title: Optional[str]       # заголовок главы из манифеста (None — по имени каталога)
+    depth: int                 # 0 — текст самой главы, 1 — раздел, 2 — подраздел и т.д.
+
+class ChapterIndex:
+    """
+    Указатель файлов глав, построенный за один обход каталога глав.
+
+    Порядок глав задается манифестом chapters.json (список имен каталогов
+    или объектов {"dir": ..., "title": ...}); без манифеста — нумерованные
+    каталоги верхнего уровня. Внутри главы текст самой главы идет первым,
+    затем разделы любой вложенности в естественном числовом порядке
+    ('2.2' раньше '2.10'). Время изменения всех просмотренных каталогов
+    запоминается: пока оно не изменилось, указатель не строится заново.
+    """
+
+    def __init__(self, chapters_dir: str, entries: List[ChapterEntry], stamps: Dict[str, Optional[int]]):
+        self.chapters_dir = chapters_dir
+        self.entries = entries
+        self.stamps = stamps
+        self.by_path = {entry.path: entry for entry in entries}
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def build(cls, chapters_dir: str) -> 'ChapterIndex':
+        """Обход каталога глав"""
+        entries: List[ChapterEntry] = []
+        manifest_path = os.path.join(chapters_dir, MANIFEST_NAME)
+        stamps: Dict[str, Optional[int]] = {
+            chapters_dir: cls._mtime(chapters_dir),
+            manifest_path: cls._mtime(manifest_path),
+        }
+
+        if stamps[manifest_path] is not None:
+            chapters = cls._read_manifest(manifest_path)
+        else:
+            with os.scandir(chapters_dir) as scan:
+                names = [item.name for item in scan if item.is_dir() and _NUMBERED.match(item.name)]
+            chapters = [(name, None) for name in sorted(names, key=natural_key)]
+
+        for name, title in chapters:
+            directory = os.path.join(chapters_dir, name)
+            if not os.path.isdir(directory):
+                raise FileNotFoundError(f"Каталог главы {directory} из манифеста не найден")
+            cls._walk(directory, name, name, title, 0, entries, stamps)
+        return cls(chapters_dir, entries, stamps)
+
+    @staticmethod
+    def _read_manifest(manifest_path: str) -> List[Tuple[str, Optional[str]]]:
+        with open(manifest_path, encoding='utf-8') as f:
+            items = json.load(f)
+        chapters = []
+        for item in items:
+            if isinstance(item, str):
+                chapters.append((item, None))
+            else:
+                chapters.append((item['dir'], item.get('title')))
+        return chapters
+
+    @classmethod
+    def _walk(cls, directory: str, relative_dir: str, chapter: str, title: Optional[str], depth: int,
+              entries: List[ChapterEntry], stamps: Dict[str, Optional[int]]):
+        """Текст каталога, затем его подкаталоги в естественном порядке"""
+        stamps[directory] = cls._mtime(directory)
+        has_content = False
+        subdirectories = []
+        with os.scandir(directory) as scan:
+            for item in scan:
+                if item.is_dir():
+                    subdirectories.append(item.name)
+                elif item.name == CONTENT_NAME:
+                    has_content = True
+
+        if has_content:
+            entries.append(ChapterEntry(os.path.join(directory, CONTENT_NAME), relative_dir, chapter, title, depth))
+        for name in sorted(subdirectories, key=natural_key):
+            cls._walk(os.path.join(directory, name), f'{relative_dir}/{name}', chapter, title, depth + 1,
+                      entries, stamps)
+
+    def is_current(self) -> bool:
+        """Не менялись ли каталоги и манифест с момента построения"""
+        return all(self._mtime(path) == mtime for path, mtime in self.stamps.items())
+
+    def paths(self) -> List[str]:
+        """Файлы content.md в порядке документа"""
+        return [entry.path for entry in self.entries]
+
+    def entry(self, path: str) -> Optional[ChapterEntry]:
+        return self.by_path.get(path)
+
+# Указатели по каталогу глав (в пределах процесса)
+_INDEXES: Dict[str, ChapterIndex] = {}
+
+def chapter_index(chapters_dir: str) -> ChapterIndex:
+    """Указатель каталога глав; строится заново, только если каталоги изменились"""
+    index = _INDEXES.get(chapters_dir)
+    if index is None or not index.is_current():
+        index = _INDEXES[chapters_dir] = ChapterIndex.build(chapters_dir)
+    return index
+
+def clear_chapter_indexes():
+    """Сброс указателей каталогов глав процесса (для замеров без кэша)"""
+    _INDEXES.clear()
+
+def main():
+    """Вывод порядка глав"""
+    parser = argparse.ArgumentParser(description="Порядок файлов глав диплома")
+    parser.add_argument("chapters_dir", nargs="?", default='/home/user/study/diplom/chapters', help="каталог глав")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.chapters_dir):
+        print(f"Ошибка: каталог {args.chapters_dir} не найден")
+        return
+
+    index = chapter_index(args.chapters_dir)
+    for entry in index.entries:
+        title = f"  ({entry.title})" if entry.title else ""
+        print(f"{'  ' * entry.depth}{entry.relative_dir}{title}")
+    print(f"\nФайлов глав: {len(index.entries)}, каталогов: {len(index.stamps) - 1}")
+
+if __name__ == '__main__':
+    main()
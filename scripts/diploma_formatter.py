@@ -1,9 +1,12 @@
+import io
 import os
-import re
-import shutil
-from typing import List, Dict, Any
-import markdown
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
 from docx.shared import Pt, Mm, RGBColor
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT, WD_LINE_SPACING
 from docx.enum.style import WD_STYLE_TYPE
@@ -11,6 +14,34 @@ from docx.enum.section import WD_SECTION
 from docx.styles.style import _ParagraphStyle, _CharacterStyle, _TableStyle
 from docxtpl import DocxTemplate
 
+from markdown_renderer import MarkdownDocxRenderer
+from chapter_cache import ChapterCache, serialize_fragment, parse_fragment
+from streaming_docx_writer import StreamingDocxWriter
+from build_tracing import NULL_TRACER, CHAPTER
+from chapter_index import ChapterEntry, chapter_index
+from style_registry import StyleRegistry
+
+# Очищенные шаблоны, готовые к заполнению, по хэшу шаблона (в пределах процесса)
+_BLANK_TEMPLATES: Dict[str, bytes] = {}
+# Хэши шаблонов по (путь, время изменения, размер)
+_TEMPLATE_HASHES: Dict[Tuple[str, int, int], str] = {}
+
+def template_hash(template_path: str) -> str:
+    """SHA-256 файла шаблона; повторно файл читается только после его изменения"""
+    stat = os.stat(template_path)
+    key = (os.path.abspath(template_path), stat.st_mtime_ns, stat.st_size)
+    digest = _TEMPLATE_HASHES.get(key)
+    if digest is None:
+        with open(template_path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        _TEMPLATE_HASHES[key] = digest
+    return digest
+
+def clear_template_caches():
+    """Сброс очищенных шаблонов и хэшей шаблонов процесса (для замеров без кэша)"""
+    _BLANK_TEMPLATES.clear()
+    _TEMPLATE_HASHES.clear()
+
 class DiplomaFormatter:
     CHAPTER_TRANSLATIONS = {
         '1_introduction': '1. Введение',
@@ -23,38 +54,115 @@ class DiplomaFormatter:
         '8_appendices': '8. Приложения'
     }
 
-    def __init__(self, chapters_dir: str, output_path: str, template_path: str):
+    # Версия правил отрисовки глав; увеличивается при изменении логики конвертации,
+    # чтобы фрагменты в кэше, построенные старыми правилами, не использовались
+    RENDER_VERSION = 2
+
+    def __init__(self, chapters_dir: str, output_path: str, template_path: str,
+                 cache_dir: Optional[str] = None, workers: int = 1, backend: str = 'docx',
+                 document=None, chapter_cache: Optional[ChapterCache] = None,
+                 direct_formatting: bool = True, tracer=None):
+        """
+        :param chapters_dir: Каталог с главами (content.md)
+        :param output_path: Путь к итоговому документу
+        :param template_path: Путь к шаблону ВКР
+        :param cache_dir: Каталог кэша отрисованных глав; если не задан,
+                          все главы конвертируются заново при каждой сборке
+        :param workers: Число процессов для параллельной конвертации глав
+                        (1 — последовательная сборка в текущем процессе)
+        :param backend: Способ записи результата: 'docx' — весь документ собирается
+                        в python-docx и сохраняется в конце; 'stream' — главы по одной
+                        записываются в word/document.xml архива (StreamingDocxWriter)
+        :param document: Документ на основе уже очищенного шаблона (например, копия,
+                         которую держит в памяти режим наблюдения); шаблон тогда не читается
+        :param chapter_cache: Готовый кэш фрагментов (вместо создания нового по cache_dir)
+        :param direct_formatting: Записывать шрифт и размер в каждый фрагмент текста;
+                                  False — оформление задается стилями ВКР
+                                  (DocumentSpacingFixer в режиме 'style')
+        :param tracer: BuildTracer для замеров загрузки шаблона, глав и сохранения
+        """
+        if backend not in ('docx', 'stream'):
+            raise ValueError(f"Неизвестный способ записи документа: {backend}")
+
         self.chapters_dir = chapters_dir
         self.output_path = output_path
         self.template_path = template_path
-        
-        # Создаем копию шаблона для работы
-        shutil.copy(self.template_path, self.output_path)
-        
-        # Открываем документ на основе шаблона
-        self.document = Document(self.output_path)
-        
-        # Очищаем содержимое шаблона, но сохраняем стили
-        self._clear_template_content()
-        
-        # Настраиваем дополнительные стили, если нужно
-        self._setup_additional_styles()
+        self.workers = max(1, workers)
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.direct_formatting = direct_formatting
+        self.tracer = tracer if tracer is not None else NULL_TRACER
+        if chapter_cache is None and cache_dir:
+            chapter_cache = ChapterCache(cache_dir, self.settings_key())
+        self.chapter_cache = chapter_cache
+
+        if document is not None:
+            self.document = document
+        else:
+            # Открываем очищенную копию шаблона (файл результата пишется только при сохранении)
+            with self.tracer.span('шаблон') as span:
+                blank = self._blank_template()
+                self.document = Document(io.BytesIO(blank))
+                span.count(байт=len(blank))
+        # Стили документа разбираются один раз: проверки и назначение стилей не обходят styles.xml
+        self.styles = StyleRegistry.for_document(self.document)
+
+    def _blank_template(self) -> bytes:
+        """
+        Пакет шаблона без содержимого, но со стилями и свойствами раздела.
+
+        Готовится один раз для каждого шаблона: хранится в памяти процесса
+        и, если задан cache_dir, на диске под хэшем шаблона и версии правил.
+        """
+        key = hashlib.sha256(f'{template_hash(self.template_path)}:{self.RENDER_VERSION}'.encode('utf-8')).hexdigest()
+        blank = _BLANK_TEMPLATES.get(key)
+        if blank is not None:
+            return blank
+
+        blank_path = os.path.join(self.cache_dir, 'templates', f'{key}.docx') if self.cache_dir else None
+        if blank_path and os.path.exists(blank_path):
+            with open(blank_path, 'rb') as f:
+                blank = f.read()
+        else:
+            # Открываем шаблон, очищаем содержимое, сохраняя стили, и добавляем недостающие стили
+            self.document = Document(self.template_path)
+            self._clear_template_content()
+            self._setup_additional_styles()
+
+            stream = io.BytesIO()
+            self.document.save(stream)
+            blank = stream.getvalue()
+
+            if blank_path:
+                os.makedirs(os.path.dirname(blank_path), exist_ok=True)
+                tmp_path = f'{blank_path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(blank)
+                os.replace(tmp_path, blank_path)
+
+        _BLANK_TEMPLATES[key] = blank
+        return blank
 
     def _clear_template_content(self):
-        """Очистка содержимого шаблона, сохраняя стили и структуру"""
-        # Удаляем все параграфы, кроме последнего
-        while len(self.document.paragraphs) > 1:
-            p = self.document.paragraphs[0]._p
-            p.getparent().remove(p)
-            
-        # Если остался один параграф, очищаем его
-        if len(self.document.paragraphs) == 1:
-            self.document.paragraphs[0].text = ''
-            
-        # Удаляем все таблицы
-        while len(self.document.tables) > 0:
-            tbl = self.document.tables[0]._tbl
-            tbl.getparent().remove(tbl)
+        """Очистка содержимого шаблона за один проход по телу, сохраняя стили и структуру"""
+        body = self.document.element.body
+        last_paragraph = None
+        for child in list(body.iterchildren()):
+            if child.tag == qn('w:p'):
+                # Удаляем все параграфы, кроме последнего
+                if last_paragraph is not None:
+                    body.remove(last_paragraph)
+                last_paragraph = child
+            elif child.tag == qn('w:tbl'):
+                # Удаляем все таблицы
+                body.remove(child)
+
+        # Оставшийся параграф очищаем, сохраняя его свойства (в том числе разрыв раздела)
+        if last_paragraph is not None:
+            for child in list(last_paragraph):
+                if child.tag != qn('w:pPr'):
+                    last_paragraph.remove(child)
+            last_paragraph.append(OxmlElement('w:r'))
             
         # Добавляем пустой параграф для начала документа
         self.document.add_paragraph()
@@ -63,9 +171,10 @@ class DiplomaFormatter:
         """Настройка дополнительных стилей, если они не определены в шаблоне"""
         # Проверяем наличие основных стилей
         required_styles = ['ВКР Обычный', 'ВКР Глава-Раздел', 'ВКР Параграф', 'ВКР Пункт']
+        existing = StyleRegistry.for_document(self.document)
         
         for style_name in required_styles:
-            if style_name not in [s.name for s in self.document.styles]:
+            if not existing.has(style_name):
                 # Если стиль отсутствует, создаем его на основе базовых стилей
                 if style_name == 'ВКР Обычный':
                     style = self.document.styles.add_style(style_name, WD_STYLE_TYPE.PARAGRAPH)
@@ -100,86 +209,152 @@ class DiplomaFormatter:
                     style.paragraph_format.space_after = Pt(12)
 
     def _convert_markdown_to_docx(self, markdown_text: str):
-        """Конвертация Markdown в docx с сохранением структуры"""
-        # Обработка заголовков второго и третьего уровня
-        lines = markdown_text.split('\n')
-        processed_lines = []
-        
-        for line in lines:
-            if line.startswith('## '):
-                # Заголовок второго уровня (параграф)
-                heading_text = line.replace('## ', '').strip()
-                # Используем стиль ВКР Параграф вместо стандартного Heading 2
-                if 'ВКР Параграф' in [s.name for s in self.document.styles]:
-                    self.document.add_paragraph(heading_text, style='ВКР Параграф')
-                else:
-                    self.document.add_heading(heading_text, level=2)
-            elif line.startswith('### '):
-                # Заголовок третьего уровня (пункт)
-                heading_text = line.replace('### ', '').strip()
-                # Используем стиль ВКР Пункт вместо стандартного Heading 3
-                if 'ВКР Пункт' in [s.name for s in self.document.styles]:
-                    self.document.add_paragraph(heading_text, style='ВКР Пункт')
-                else:
-                    self.document.add_heading(heading_text, level=3)
+        """Конвертация Markdown в docx за один проход по потоку элементов разметки"""
+        MarkdownDocxRenderer(self.document, self.direct_formatting, self.styles).render(markdown_text)
+
+    def settings_key(self) -> str:
+        """Хэш шаблона и настроек, от которых зависит отрисовка глав"""
+        digest = hashlib.sha256()
+        digest.update(template_hash(self.template_path).encode('utf-8'))
+        digest.update(json.dumps({
+            'render_version': self.RENDER_VERSION,
+            'chapter_translations': self.CHAPTER_TRANSLATIONS,
+            'direct_formatting': self.direct_formatting,
+        }, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _body_elements(self) -> List[Any]:
+        """Элементы тела документа без завершающих свойств раздела"""
+        return [el for el in self.document.element.body.iterchildren() if el.tag != qn('w:sectPr')]
+
+    def _append_body_elements(self, elements: List[Any]):
+        """Вставка готовых элементов в конец тела документа (перед w:sectPr)"""
+        body = self.document.element.body
+        sect_pr = body.sectPr
+        for element in elements:
+            if sect_pr is not None:
+                sect_pr.addprevious(element)
             else:
-                processed_lines.append(line)
-        
-        # Собираем обратно текст без заголовков
-        markdown_text = '\n'.join(processed_lines)
-        
-        # Обработка списков
-        markdown_text = re.sub(r'^- ', '• ', markdown_text, flags=re.MULTILINE)
-        
-        # Обработка кода
-        markdown_text = re.sub(r'```(.*?)```', r'[Листинг кода]\n\1', markdown_text, flags=re.DOTALL)
-        
-        # Преобразуем в HTML
-        html = markdown.markdown(markdown_text)
-        
-        # Разбор HTML и добавление в документ
-        paragraphs = re.split(r'<p>|</p>', html)
-        paragraphs = [p for p in paragraphs if p.strip()]
-        
-        for paragraph in paragraphs:
-            # Удаление HTML-тегов
-            clean_text = re.sub(r'<[^>]+>', '', paragraph).strip()
-            
-            if clean_text:
-                # Используем стиль ВКР Обычный вместо стандартного Normal
-                if 'ВКР Обычный' in [s.name for s in self.document.styles]:
-                    para = self.document.add_paragraph(clean_text, style='ВКР Обычный')
-                else:
-                    para = self.document.add_paragraph(clean_text, style='Normal')
-                
-                # Явно устанавливаем шрифт для каждого фрагмента текста
-                for run in para.runs:
-                    run.font.name = 'Times New Roman'
-                    run.font.size = Pt(16)
-
-    def _process_chapter(self, chapter_path: str):
+                body.append(element)
+
+    def _chapter_key(self, entry: ChapterEntry, raw_content: bytes) -> str:
+        """Ключ главы в кэше фрагментов (заголовок главы может задаваться манифестом)"""
+        return self.chapter_cache.chapter_key(os.path.relpath(entry.path, self.chapters_dir), raw_content,
+                                              self._chapter_title(entry))
+
+    def _render_fragment(self, title: str, content: str, detach: bool = False) -> bytes:
+        """
+        Конвертация главы в сериализованный фрагмент тела документа
+
+        :param detach: Удалить отрисованные элементы из документа после сериализации
+        """
+        start = len(self._body_elements())
+        self._render_chapter(title, content)
+        elements = self._body_elements()[start:]
+        fragment = serialize_fragment(elements)
+
+        if detach:
+            for element in elements:
+                element.getparent().remove(element)
+        return fragment
+
+    def _iter_chapter_fragments(self, chapter_files: List[ChapterEntry]) -> Iterator[Tuple[bytes, bool]]:
+        """
+        Фрагменты глав в порядке документа.
+
+        Неизмененные главы берутся из кэша, остальные конвертируются в текущем
+        процессе или, при workers > 1, параллельно в пуле процессов. Каждый процесс
+        пула отрисовывает главу в собственную копию шаблона; фрагменты выдаются
+        в исходном порядке, поэтому результат совпадает с последовательной сборкой.
+
+        :return: Пары (сериализованный фрагмент, взят ли он из кэша)
+        """
+        fragments: List[Optional[bytes]] = [None] * len(chapter_files)
+        keys: List[Optional[str]] = [None] * len(chapter_files)
+
+        if self.chapter_cache is not None:
+            with self.tracer.span('кэш глав') as span:
+                for i, entry in enumerate(chapter_files):
+                    with open(entry.path, 'rb') as f:
+                        keys[i] = self._chapter_key(entry, f.read())
+                    fragments[i] = self.chapter_cache.load(keys[i])
+                span.count(найдено=sum(fragment is not None for fragment in fragments))
+
+        pending = [i for i, fragment in enumerate(fragments) if fragment is None]
+        executor = None
+        rendered = None
+        if self.workers > 1 and pending:
+            executor = ProcessPoolExecutor(
+                max_workers=min(self.workers, len(pending)),
+                initializer=_init_render_worker,
+                initargs=(self.chapters_dir, self.template_path, self.cache_dir, self.direct_formatting),
+            )
+            rendered = executor.map(_render_chapter_in_worker,
+                                    [chapter_files[i].path for i in pending],
+                                    [self._chapter_title(chapter_files[i]) for i in pending])
+
+        try:
+            for i, entry in enumerate(chapter_files):
+                fragment = fragments[i]
+                cached = fragment is not None
+                if not cached:
+                    # При workers > 1 интервал главы — ожидание результата от пула
+                    with self.tracer.span(self._chapter_label(entry), CHAPTER) as span:
+                        if rendered is not None:
+                            fragment = next(rendered)
+                        else:
+                            with open(entry.path, 'r', encoding='utf-8') as f:
+                                fragment = self._render_fragment(self._chapter_title(entry), f.read(), detach=True)
+                        if self.chapter_cache is not None:
+                            self.chapter_cache.store(keys[i], fragment)
+                        span.count(байт=len(fragment))
+                yield fragment, cached
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def _stream_chapters(self, chapter_files: List[ChapterEntry]) -> int:
+        """
+        Потоковая запись документа: очищенный шаблон, затем главы по одной
+
+        :return: Количество глав, взятых из кэша
+        """
+        # Части пакета (включая добавленные к шаблону стили) берутся из очищенного шаблона
+        package = io.BytesIO()
+        self.document.save(package)
+
+        cached_count = 0
+        with StreamingDocxWriter(package, self.output_path, self.document.element) as writer:
+            writer.write_elements(self._body_elements())
+            for fragment, cached in self._iter_chapter_fragments(chapter_files):
+                writer.write_elements(parse_fragment(fragment))
+                cached_count += cached
+        return cached_count
+
+    @staticmethod
+    def _chapter_label(entry: ChapterEntry) -> str:
+        """Имя главы для трассировки (путь относительно каталога глав)"""
+        return entry.relative_dir
+
+    def _process_chapter(self, entry: ChapterEntry):
         """Обработка главы"""
-        with open(chapter_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Определение имени главы
-        path_parts = chapter_path.split('/')
-        
-        # Проверяем структуру пути
-        if path_parts[-1] == 'content.md':
-            # Определяем, находится ли файл непосредственно в директории главы или в подкаталоге
-            if 'content.md' in path_parts[-1] and path_parts[-2] in ['6_practical_significance', '7_development_prospects', '8_appendices']:
-                chapter_name = path_parts[-2]  # Берем имя директории главы
-            else:
-                # Для подразделов (например, 1.1, 2.1, и т.д.)
-                chapter_name = path_parts[-3]  # Берем имя директории главы
-        
-        # Перевод заголовка главы
-        translated_name = self.CHAPTER_TRANSLATIONS.get(chapter_name, chapter_name)
-        
+        with self.tracer.span(self._chapter_label(entry), CHAPTER) as span:
+            with open(entry.path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            body = self.document.element.body
+            elements_before = len(body)
+            self._render_chapter(self._chapter_title(entry), content)
+            span.count(элементов=len(body) - elements_before)
+
+    def _chapter_title(self, entry: ChapterEntry) -> str:
+        """Заголовок главы, к которой относится файл: из манифеста или по имени каталога главы"""
+        return entry.title or self.CHAPTER_TRANSLATIONS.get(entry.chapter, entry.chapter)
+
+    def _render_chapter(self, translated_name: str, content: str):
+        """Конвертация текста главы с заголовком translated_name и добавление его в документ"""
         # Добавление заголовка главы с использованием специального стиля
-        if 'ВКР Глава-Раздел' in [s.name for s in self.document.styles]:
-            self.document.add_paragraph(translated_name, style='ВКР Глава-Раздел')
+        if self.styles.has('ВКР Глава-Раздел'):
+            self.styles.apply(self.document.add_paragraph(translated_name), 'ВКР Глава-Раздел')
         else:
             self.document.add_heading(translated_name, level=1)
         
@@ -189,49 +364,69 @@ class DiplomaFormatter:
         # Разрыв страницы после главы
         self.document.add_page_break()
 
-    def compile_diploma(self):
-        """Компиляция всего диплома"""
-        # Определяем порядок глав
-        chapter_order = [
-            '1_introduction',
-            '2_theoretical_part',
-            '3_practical_implementation',
-            '4_research_methodology',
-            '5_research_results',
-            '6_practical_significance',
-            '7_development_prospects',
-            '8_appendices'
-        ]
-        
-        # Находим все файлы content.md
-        all_content_files = [
-            os.path.join(root, file)
-            for root, _, files in os.walk(self.chapters_dir)
-            for file in files if file == 'content.md'
-        ]
-        
-        # Обрабатываем главы в нужном порядке
-        for chapter_name in chapter_order:
-            # Находим все файлы content.md для текущей главы
-            chapter_files = [path for path in all_content_files if f'/{chapter_name}/' in path]
-            
-            # Сортируем подразделы, если они есть
-            chapter_files.sort()
-            
-            # Обработка файлов главы
-            for chapter_path in chapter_files:
-                self._process_chapter(chapter_path)
+    def compile_diploma(self, save: bool = True):
+        """
+        Компиляция всего диплома
 
-        # Сохранение документа
-        self.document.save(self.output_path)
-        print(f"Диплом сохранен в {self.output_path}")
+        :param save: Сохранить документ в output_path. При False документ
+                     остается только в памяти (self.document) для следующих этапов.
+                     При потоковой записи (backend='stream') документ пишется всегда
+        """
+        # Файлы глав в порядке документа (манифест или нумерованные каталоги); указатель
+        # берется один раз, заголовки глав передаются дальше вместе с его записями
+        with self.tracer.span('указатель глав') as span:
+            chapter_files = chapter_index(self.chapters_dir).entries
+            span.count(файлов=len(chapter_files))
+
+        cached_count = 0
+        with self.tracer.span('главы') as span:
+            if self.backend == 'stream':
+                # Документ записывается по мере конвертации глав, отдельное сохранение не нужно
+                cached_count = self._stream_chapters(chapter_files)
+            elif self.workers > 1 or self.chapter_cache is not None:
+                for fragment, cached in self._iter_chapter_fragments(chapter_files):
+                    self._append_body_elements(parse_fragment(fragment))
+                    cached_count += cached
+            else:
+                for entry in chapter_files:
+                    self._process_chapter(entry)
+            span.count(файлов=len(chapter_files), из_кэша=cached_count)
+
+        if self.chapter_cache is not None:
+            print(f"Глав из кэша: {cached_count}, сконвертировано заново: {len(chapter_files) - cached_count}")
+
+        if self.backend == 'stream':
+            print(f"Диплом записан в {self.output_path}")
+        elif save:
+            with self.tracer.span('сохранение'):
+                self.document.save(self.output_path)
+            print(f"Диплом сохранен в {self.output_path}")
+
+# Форматер процесса-обработчика: шаблон загружается и очищается один раз на процесс
+_worker_formatter: Optional[DiplomaFormatter] = None
+
+def _init_render_worker(chapters_dir: str, template_path: str, cache_dir: Optional[str],
+                        direct_formatting: bool):
+    """Инициализация процесса пула параллельной конвертации"""
+    global _worker_formatter
+    # Очищенный шаблон берется из дискового кэша, подготовленного родительским процессом
+    _worker_formatter = DiplomaFormatter(chapters_dir, os.devnull, template_path, cache_dir=cache_dir,
+                                         direct_formatting=direct_formatting)
+
+def _render_chapter_in_worker(chapter_path: str, title: str) -> bytes:
+    """Конвертация одной главы в процессе пула (заголовок главы передает родительский процесс)"""
+    with open(chapter_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    return _worker_formatter._render_fragment(title, content, detach=True)
 
 def main():
     diploma_dir = '/home/user/study/diplom/chapters'
     output_path = '/home/user/study/diplom/diploma.docx'
     template_path = '/home/user/Downloads/vkr-2024.docx'
     
-    formatter = DiplomaFormatter(diploma_dir, output_path, template_path)
+    cache_dir = '/home/user/study/diplom/.diploma_cache'
+    
+    formatter = DiplomaFormatter(diploma_dir, output_path, template_path, cache_dir=cache_dir)
     formatter.compile_diploma()
 
 if __name__ == '__main__':
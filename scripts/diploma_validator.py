@@ -1,9 +1,248 @@
+import argparse
 import os
 import re
-from typing import Dict, List, Any
-import docx
-from docx.shared import Pt, Mm
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT, WD_LINE_SPACING
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple, Union
+
+from docx_fast_reader import BodyWalker, ParagraphRecord, SectionRecord, iter_document_elements
+from document_snapshot import open_document
+from page_estimator import SCHEMA_PATH, PageEstimator, load_page_budgets
+from style_registry import StyleRegistry
+from typography_arrays import HEADING_PREFIXES, TypographyStatistics, document_columns, print_typography_statistics
+
+class ValidationRule:
+    """
+    Правило проверки документа.
+
+    Валидатор обходит документ один раз и передает каждый абзац и раздел всем
+    зарегистрированным правилам; по окончании обхода правила записывают
+    свои замечания в результаты валидации. Перед проходом валидатор передает
+    правилам реестр стилей документа (styles) для итоговых свойств стилей.
+    """
+
+    styles: Optional[StyleRegistry] = None
+
+    def start(self):
+        """Подготовка к новому проходу по документу"""
+
+    def visit_paragraph(self, paragraph: ParagraphRecord):
+        """Обработка очередного абзаца"""
+
+    def visit_section(self, section: SectionRecord):
+        """Обработка параметров очередного раздела"""
+
+    def finish(self, results: Dict[str, Any]):
+        """Запись результатов правила после обхода документа"""
+
+class StructureRule(ValidationRule):
+    """Проверка наличия и порядка глав"""
+
+    def __init__(self, expected_chapters: List[str]):
+        self.expected_chapters = expected_chapters
+        self.headings: List[str] = []
+
+    def start(self):
+        self.headings = []
+
+    def visit_paragraph(self, paragraph: ParagraphRecord):
+        style_name = paragraph.style_name
+        if not style_name:
+            return
+        # Проверка стандартных стилей и стилей ВКР
+        if style_name in ('Heading 1', 'ВКР Глава-Раздел'):
+            self.headings.append(paragraph.text)
+        # Проверка по номеру главы
+        elif (style_name.startswith('Heading') or style_name.startswith('ВКР')) and \
+                paragraph.text.strip().startswith(tuple('12345678')):
+            self.headings.append(paragraph.text)
+
+    def finish(self, results: Dict[str, Any]):
+        # Проверка наличия глав
+        found_chapters = []
+        for expected_chapter in self.expected_chapters:
+            chapter_num = expected_chapter.split('.')[0]
+            found = False
+            for heading in self.headings:
+                if heading.startswith(chapter_num + '.') or heading.startswith(chapter_num + ' '):
+                    found = True
+                    found_chapters.append(expected_chapter)
+                    break
+
+            if not found:
+                results['структурные_требования'].append(
+                    f'❌ Отсутствует глава: {expected_chapter}'
+                )
+
+        # Проверка порядка глав
+        if found_chapters != [ch for ch in self.expected_chapters if ch in found_chapters]:
+            results['структурные_требования'].append(
+                '❌ Нарушен порядок глав в документе'
+            )
+
+class MarginsRule(ValidationRule):
+    """Проверка полей страницы (технические требования ГОСТ)"""
+
+    # (атрибут раздела, требуемое значение в дюймах, название)
+    EXPECTED_MARGINS = [
+        ('left_margin', 1.18, 'Левое поле'),
+        ('right_margin', 0.59, 'Правое поле'),
+        ('top_margin', 0.79, 'Верхнее поле'),
+        ('bottom_margin', 0.79, 'Нижнее поле'),
+    ]
+
+    def __init__(self, tolerance_mm: float = 1):
+        self.tolerance_mm = tolerance_mm
+        self.errors: List[str] = []
+
+    def start(self):
+        self.errors = []
+
+    def visit_section(self, section: SectionRecord):
+        for attribute, expected, name in self.EXPECTED_MARGINS:
+            current = (getattr(section, attribute) or 0) / 72  # пункты -> дюймы
+            if abs(current * 25.4 - expected * 25.4) > self.tolerance_mm:
+                self.errors.append(
+                    f'❌ {name} не соответствует требованиям (текущее: {current * 25.4:.2f} мм, требуется: {expected * 25.4:.2f} мм)'
+                )
+
+    def finish(self, results: Dict[str, Any]):
+        results['технические_требования'].extend(self.errors)
+
+class TypographyRule(ValidationRule):
+    """Проверка шрифта и его размера в основном тексте"""
+
+    HEADING_PREFIXES = HEADING_PREFIXES
+
+    def __init__(self, font_name: str = 'Times New Roman', font_size: float = 16, max_examples: int = 5,
+                 code_font: str = 'Courier New'):
+        self.font_name = font_name
+        self.font_size = font_size
+        self.code_font = code_font
+        self.max_examples = max_examples
+        self.font_errors = 0
+        self.font_error_details: List[str] = []
+
+    def start(self):
+        self.font_errors = 0
+        self.font_error_details = []
+
+    def _add_error(self, detail: str):
+        self.font_errors += 1
+        if len(self.font_error_details) < self.max_examples:  # Сохраняем только первые ошибки для примера
+            self.font_error_details.append(detail)
+
+    def visit_paragraph(self, paragraph: ParagraphRecord):
+        # Пропускаем пустые абзацы
+        if not paragraph.text.strip():
+            return
+
+        # Пропускаем заголовки и специальные стили
+        if paragraph.style_name and paragraph.style_name.startswith(self.HEADING_PREFIXES):
+            return
+
+        # Шрифт, не заданный во фрагменте, берется из стиля абзаца (с учетом наследования)
+        style = self.styles.effective(paragraph.style_id) if self.styles is not None else None
+        style_font = style.font_name if style is not None else None
+        style_size = style.font_size if style is not None else None
+
+        # Проверка шрифта в каждом фрагменте текста
+        for run in paragraph.runs:
+            # Фрагменты кода набираются моноширинным шрифтом своего размера
+            if run.font_name == self.code_font:
+                continue
+
+            font_name = run.font_name or style_font
+            if font_name and font_name != self.font_name:
+                self._add_error(f'Абзац {paragraph.index + 1}: Шрифт {font_name} вместо {self.font_name}')
+
+            font_size = run.font_size or style_size
+            if font_size and font_size != self.font_size:
+                self._add_error(f'Абзац {paragraph.index + 1}: Размер шрифта {font_size} вместо {self.font_size:g}')
+
+    def finish(self, results: Dict[str, Any]):
+        # Добавляем информацию об ошибках
+        if self.font_errors > 0:
+            results['технические_требования'].append(
+                f'❌ Обнаружено {self.font_errors} нарушений шрифта и размера'
+            )
+
+            # Добавляем примеры ошибок
+            if self.font_error_details:
+                results['технические_требования'].append(
+                    f'ℹ️ Примеры ошибок:\n' + '\n'.join(self.font_error_details) +
+                    (f'\n... и еще {self.font_errors - len(self.font_error_details)} ошибок'
+                     if self.font_errors > len(self.font_error_details) else '')
+                )
+
+class MetricsRule(ValidationRule):
+    """Расчет метрик документа и оценка числа страниц по раскладке строк (PageEstimator)"""
+
+    def __init__(self, budgets: Optional[Dict[str, Tuple[int, int]]] = None):
+        """
+        :param budgets: Объем глав по плану (page_estimator.load_page_budgets); без него
+                        объем глав оценивается, но не сравнивается с планом
+        """
+        self.budgets = budgets
+        self.paragraphs = 0
+        self.words = 0
+        self.characters = 0
+        self.pages: Optional[PageEstimator] = None
+
+    def start(self):
+        self.paragraphs = 0
+        self.words = 0
+        self.characters = 0
+        self.pages = PageEstimator(self.styles, self.budgets)
+
+    def visit_paragraph(self, paragraph: ParagraphRecord):
+        self.pages.add(paragraph)
+        if paragraph.text.strip():
+            self.paragraphs += 1
+            self.words += len(paragraph.text.split())
+            self.characters += len(paragraph.text)
+
+    def visit_section(self, section: SectionRecord):
+        self.pages.add(section)
+
+    def finish(self, results: Dict[str, Any]):
+        estimate = self.pages.finish()
+        results['метрики_документа'] = {
+            'количество_параграфов': self.paragraphs,
+            'количество_слов': self.words,
+            'количество_символов': self.characters,
+            'приблизительное_количество_страниц': estimate.pages
+        }
+        results['объем_глав'] = {chapter.title: chapter.pages for chapter in estimate.chapters}
+        for chapter in estimate.chapters:
+            if chapter.within_budget is False:
+                low, high = chapter.budget
+                results['структурные_требования'].append(
+                    f'⚠️ Глава «{chapter.title}»: около {chapter.pages:.1f} стр. при плане {low}-{high}'
+                )
+
+class FormattingConsistencyRule(ValidationRule):
+    """Проверка согласованности форматирования"""
+
+    def __init__(self, max_other_styles: int = 5):
+        self.max_other_styles = max_other_styles
+        self.paragraph_styles: Dict[str, int] = {}
+
+    def start(self):
+        self.paragraph_styles = {}
+
+    def visit_paragraph(self, paragraph: ParagraphRecord):
+        if paragraph.style_name:
+            self.paragraph_styles[paragraph.style_name] = self.paragraph_styles.get(paragraph.style_name, 0) + 1
+
+    def finish(self, results: Dict[str, Any]):
+        # Для шаблона ВКР допускаем больше стилей
+        vkr_styles = sum(1 for style in self.paragraph_styles if style.startswith('ВКР'))
+        other_styles = len(self.paragraph_styles) - vkr_styles
+
+        if other_styles > self.max_other_styles and vkr_styles == 0:
+            results['стилистические_замечания'].append(
+                f'⚠️ Слишком много различных стилей: {list(self.paragraph_styles.keys())}'
+            )
 
 class DiplomaValidator:
     EXPECTED_CHAPTERS = [
@@ -17,8 +256,25 @@ class DiplomaValidator:
         '8. Приложения'
     ]
 
-    def __init__(self, document_path: str):
-        self.document = docx.Document(document_path)
+    def __init__(self, document_path: str, document=None, rules: Optional[Iterable[ValidationRule]] = None,
+                 vectorized: bool = False, schema_path: Optional[str] = None):
+        """
+        :param document_path: Путь к документу; читается из снимка (document_snapshot.open_document)
+        :param document: Уже открытый документ python-docx (например, в конвейере
+                         format_diploma.py); тогда файл не читается
+        :param rules: Правила проверки; по умолчанию — default_rules()
+        :param vectorized: Проверять оформление основного текста по столбцам документа
+                           (TypographyStatistics) вместо TypographyRule: полные числа
+                           нарушений шрифта, размера, выравнивания и интервала
+                           с распределением по стилям и главам
+        :param schema_path: Схема диплома (diploma_schema.md) с объемом глав в страницах
+                            для сравнения с оценкой MetricsRule
+        """
+        self.document_path = document_path
+        self.document = document
+        self.vectorized = vectorized
+        self.page_budgets = load_page_budgets(schema_path) if schema_path else None
+        self.rules = list(rules) if rules is not None else self.default_rules()
         self.validation_results = {
             'структурные_требования': [],
             'технические_требования': [],
@@ -26,149 +282,109 @@ class DiplomaValidator:
             'метрики_документа': {}
         }
 
-    def check_document_structure(self):
-        """Проверка структуры документа"""
-        # Получаем все заголовки первого уровня
-        headings = []
-        for p in self.document.paragraphs:
-            # Проверка стандартных стилей
-            if p.style and p.style.name == 'Heading 1':
-                headings.append(p.text)
-            # Проверка стилей ВКР
-            elif p.style and p.style.name == 'ВКР Глава-Раздел':
-                headings.append(p.text)
-            # Проверка по номеру главы
-            elif p.style and (p.style.name.startswith('Heading') or p.style.name.startswith('ВКР')) and p.text.strip().startswith(tuple('12345678')):
-                headings.append(p.text)
+    def default_rules(self) -> List[ValidationRule]:
+        """Стандартный набор правил; порядок определяет порядок замечаний в отчете"""
+        rules = [
+            StructureRule(self.EXPECTED_CHAPTERS),
+            MarginsRule(),
+            TypographyRule(),
+            MetricsRule(self.page_budgets),
+            FormattingConsistencyRule(),
+        ]
+        if self.vectorized:
+            # Оформление текста проверяется по столбцам в check_typography_statistics
+            rules = [rule for rule in rules if not isinstance(rule, TypographyRule)]
+        return rules
 
-        # Проверка наличия глав
-        found_chapters = []
-        for expected_chapter in self.EXPECTED_CHAPTERS:
-            chapter_num = expected_chapter.split('.')[0]
-            found = False
-            for heading in headings:
-                if heading.startswith(chapter_num + '.') or heading.startswith(chapter_num + ' '):
-                    found = True
-                    found_chapters.append(expected_chapter)
-                    break
-            
-            if not found:
-                self.validation_results['структурные_требования'].append(
-                    f'❌ Отсутствует глава: {expected_chapter}'
-                )
+    def register_rule(self, rule: ValidationRule):
+        """Добавление правила в общий проход validate()"""
+        self.rules.append(rule)
 
-        # Проверка порядка глав
-        if found_chapters != [ch for ch in self.EXPECTED_CHAPTERS if ch in found_chapters]:
-            self.validation_results['структурные_требования'].append(
-                '❌ Нарушен порядок глав в документе'
-            )
+    @contextmanager
+    def _open(self) -> Iterator[Tuple[StyleRegistry, Iterator[Union[ParagraphRecord, SectionRecord]]]]:
+        """
+        Реестр стилей и абзацы и разделы документа в порядке следования (стили разбираются один раз);
+        снимок документа закрывается после прохода
+        """
+        if self.document is not None:
+            styles = StyleRegistry.for_document(self.document)
+            yield styles, iter_document_elements(self.document, BodyWalker(styles.table))
+            return
+        with open_document(self.document_path) as reader:
+            yield StyleRegistry(reader.styles), reader.iter_elements()
+
+    def run_rules(self, rules: Iterable[ValidationRule]):
+        """Один проход по документу с передачей каждого абзаца и раздела всем правилам"""
+        rules = list(rules)
+        with self._open() as (styles, elements):
+            for rule in rules:
+                rule.styles = styles
+                rule.start()
+
+            for record in elements:
+                if isinstance(record, ParagraphRecord):
+                    for rule in rules:
+                        rule.visit_paragraph(record)
+                else:
+                    for rule in rules:
+                        rule.visit_section(record)
+
+        for rule in rules:
+            rule.finish(self.validation_results)
+
+    def check_document_structure(self):
+        """Проверка структуры документа"""
+        self.run_rules([StructureRule(self.EXPECTED_CHAPTERS)])
 
     def check_technical_requirements(self):
         """Проверка технических требований ГОСТ"""
-        sections = self.document.sections
-        for section in sections:
-            # Проверка полей
-            checks = [
-                (section.left_margin.inches, 1.18, 'Левое поле'),
-                (section.right_margin.inches, 0.59, 'Правое поле'),
-                (section.top_margin.inches, 0.79, 'Верхнее поле'),
-                (section.bottom_margin.inches, 0.79, 'Нижнее поле')
-            ]
-
-            for current, expected, name in checks:
-                if abs(current * 25.4 - expected * 25.4) > 1:  # Погрешность 1 мм
-                    self.validation_results['технические_требования'].append(
-                        f'❌ {name} не соответствует требованиям (текущее: {current * 25.4:.2f} мм, требуется: {expected * 25.4:.2f} мм)'
-                    )
+        self.run_rules([MarginsRule()])
 
     def check_typography(self):
         """Проверка типографских требований"""
-        font_errors = 0
-        font_error_details = []
-        
-        # Проверка стилей абзацев
-        for i, paragraph in enumerate(self.document.paragraphs):
-            # Пропускаем пустые абзацы
-            if not paragraph.text.strip():
-                continue
-                
-            # Пропускаем заголовки и специальные стили
-            if paragraph.style and (paragraph.style.name.startswith('Heading') or 
-                                   paragraph.style.name.startswith('ВКР Глава') or 
-                                   paragraph.style.name.startswith('ВКР Параграф') or 
-                                   paragraph.style.name.startswith('ВКР Пункт')):
-                continue
-                
-            # Проверка шрифта в каждом фрагменте текста
-            for run in paragraph.runs:
-                # Проверка шрифта
-                if run.font.name and run.font.name != 'Times New Roman':
-                    font_errors += 1
-                    if len(font_error_details) < 5:  # Сохраняем только первые 5 ошибок для примера
-                        font_error_details.append(f'Абзац {i+1}: Шрифт {run.font.name} вместо Times New Roman')
-                
-                # Проверка размера шрифта
-                if run.font.size and run.font.size.pt != 16:
-                    font_errors += 1
-                    if len(font_error_details) < 5:
-                        font_error_details.append(f'Абзац {i+1}: Размер шрифта {run.font.size.pt} вместо 16')
+        if self.vectorized:
+            self.check_typography_statistics()
+        else:
+            self.run_rules([TypographyRule()])
 
-        # Добавляем информацию об ошибках
-        if font_errors > 0:
+    def check_typography_statistics(self):
+        """Полная статистика нарушений оформления основного текста по столбцам документа"""
+        with document_columns(self.document_path, self.document) as columns:
+            statistics = TypographyStatistics().run(columns)
+        self.validation_results['статистика_оформления'] = statistics
+
+        violations = statistics['нарушения']
+        font_errors = violations['шрифт'] + violations['размер']
+        if font_errors:
             self.validation_results['технические_требования'].append(
                 f'❌ Обнаружено {font_errors} нарушений шрифта и размера'
             )
-            
-            # Добавляем примеры ошибок
-            if font_error_details:
-                self.validation_results['технические_требования'].append(
-                    f'ℹ️ Примеры ошибок:\n' + '\n'.join(font_error_details) + 
-                    (f'\n... и еще {font_errors - len(font_error_details)} ошибок' if font_errors > len(font_error_details) else '')
-                )
+        if violations['выравнивание']:
+            self.validation_results['технические_требования'].append(
+                f"❌ Обнаружено {violations['выравнивание']} абзацев без выравнивания по ширине"
+            )
+        if violations['интервал']:
+            self.validation_results['технические_требования'].append(
+                f"❌ Обнаружено {violations['интервал']} абзацев с межстрочным интервалом, отличным от 1,5"
+            )
 
     def calculate_document_metrics(self):
         """Расчет метрик документа"""
-        paragraphs = [p for p in self.document.paragraphs if p.text.strip()]
-        words = sum(len(p.text.split()) for p in paragraphs)
-        characters = sum(len(p.text) for p in paragraphs)
-
-        self.validation_results['метрики_документа'] = {
-            'количество_параграфов': len(paragraphs),
-            'количество_слов': words,
-            'количество_символов': characters,
-            'приблизительное_количество_страниц': len(paragraphs) // 10
-        }
+        self.run_rules([MetricsRule(self.page_budgets)])
 
     def check_formatting_consistency(self):
         """Проверка согласованности форматирования"""
-        paragraph_styles = {}
-        for paragraph in self.document.paragraphs:
-            if paragraph.style:
-                paragraph_styles[paragraph.style.name] = paragraph_styles.get(paragraph.style.name, 0) + 1
-
-        # Для шаблона ВКР допускаем больше стилей
-        vkr_styles = sum(1 for style in paragraph_styles if style.startswith('ВКР'))
-        other_styles = len(paragraph_styles) - vkr_styles
-        
-        if other_styles > 5 and vkr_styles == 0:
-            self.validation_results['стилистические_замечания'].append(
-                f'⚠️ Слишком много различных стилей: {list(paragraph_styles.keys())}'
-            )
+        self.run_rules([FormattingConsistencyRule()])
 
     def validate(self):
-        """Полная валидация документа"""
-        self.check_document_structure()
-        self.check_technical_requirements()
-        self.check_typography()
-        self.calculate_document_metrics()
-        self.check_formatting_consistency()
+        """Полная валидация документа одним общим проходом всех правил"""
+        self.run_rules(self.rules)
+        if self.vectorized:
+            self.check_typography_statistics()
         return self.validation_results
 
-def main():
-    document_path = '/home/user/study/diplom/diploma.docx'
-    validator = DiplomaValidator(document_path)
-    results = validator.validate()
-
+def print_validation_results(results: Dict[str, Any]):
+    """Вывод результатов валидации"""
     print("🔍 Результаты валидации диплома:\n")
     
     print("📋 Структурные требования:")
@@ -187,5 +403,30 @@ def main():
     for metric, value in results['метрики_документа'].items():
         print(f"{metric.replace('_', ' ').capitalize()}: {value}")
 
+    if results.get('объем_глав'):
+        print("\n📄 Объем глав (оценка, стр.):")
+        for title, pages in results['объем_глав'].items():
+            print(f"{title}: {pages:.1f}")
+
+    if 'статистика_оформления' in results:
+        print_typography_statistics(results['статистика_оформления'])
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка диплома на соответствие требованиям")
+    parser.add_argument("document", nargs="?", default='/home/user/study/diplom/diploma.docx', help="файл .docx")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="полная статистика оформления по стилям и главам (NumPy, если установлен)")
+    parser.add_argument("--schema", default=SCHEMA_PATH, help="схема диплома с объемом глав в страницах")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.document):
+        print(f"Ошибка: файл {args.document} не найден")
+        return
+
+    schema_path = args.schema if os.path.exists(args.schema) else None
+    validator = DiplomaValidator(args.document, vectorized=args.vectorized, schema_path=schema_path)
+    results = validator.validate()
+    print_validation_results(results)
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from build_pipeline import BuildError, build_diploma
+from chapter_cache import ChapterCache
+from chapter_index import CONTENT_NAME, MANIFEST_NAME
+from diploma_formatter import DiplomaFormatter
+from document_text_extractor import REPORTS_DIR
+
+class DiplomaWatcher:
+    """
+    Режим наблюдения за главами диплома.
+
+    Очищенный шаблон и сконвертированные главы хранятся в памяти процесса,
+    поэтому после изменения content.md пересобираются только измененные главы,
+    а исправление отступов, валидация и сохранение выполняются над документом
+    в памяти без повторного запуска интерпретатора. Каждая пересборка проходит
+    те же этапы, что и run_pipeline (build_pipeline.build_diploma), с теми же
+    параметрами сборки.
+    """
+
+    def __init__(self, chapters_dir: str, output_path: str, template_path: str,
+                 cache_dir: Optional[str] = None, interval: float = 0.5, debounce: float = 0.3,
+                 workers: int = 1, backend: str = 'docx', formatting: str = 'direct', compact: bool = False,
+                 analysis: bool = False, reports_dir: str = REPORTS_DIR, schema_path: Optional[str] = None):
+        """
+        :param chapters_dir: Каталог с главами (content.md)
+        :param output_path: Путь к итоговому документу
+        :param template_path: Путь к шаблону ВКР
+        :param cache_dir: Каталог дискового кэша фрагментов (None — только память)
+        :param interval: Период опроса файлов глав, в секундах
+        :param debounce: Пауза без новых изменений перед пересборкой, в секундах
+        :param workers, backend, formatting, compact, analysis, reports_dir, schema_path:
+            Параметры сборки, как у run_pipeline
+        """
+        self.chapters_dir = chapters_dir
+        self.output_path = output_path
+        self.template_path = template_path
+        self.interval = interval
+        self.debounce = debounce
+        self.options = {
+            'workers': workers,
+            'backend': backend,
+            'formatting': formatting,
+            'compact': compact,
+            'analysis': analysis,
+            'reports_dir': reports_dir,
+            'schema_path': schema_path,
+        }
+
+        # Шаблон очищается один раз (DiplomaFormatter хранит его в памяти процесса);
+        # каждая сборка начинается с его копии. Ключ кэша глав зависит от режима оформления
+        formatter = DiplomaFormatter(chapters_dir, output_path, template_path, cache_dir=cache_dir,
+                                     direct_formatting=formatting == 'direct')
+        self.chapter_cache = formatter.chapter_cache or ChapterCache(None, formatter.settings_key())
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """Время изменения и размер всех content.md и манифеста глав"""
+        snapshot = {}
+        for root, _, files in os.walk(self.chapters_dir):
+            for file in files:
+                if file in (CONTENT_NAME, MANIFEST_NAME):
+                    path = os.path.join(root, file)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def rebuild(self) -> bool:
+        """Пересборка, исправление отступов, валидация и сохранение документа"""
+        started = time.perf_counter()
+        try:
+            build = build_diploma(self.chapters_dir, self.output_path, self.template_path,
+                                  chapter_cache=self.chapter_cache, verbose=False, **self.options)
+        except BuildError as e:
+            print(f"Ошибка при пересборке: {e}")
+            return False
+
+        print(f"Диплом пересобран за {time.perf_counter() - started:.2f} с, замечаний валидатора: {build.issues}")
+        if build.validation_error is not None:
+            print(f"Ошибка при валидации: {build.validation_error}")
+        if build.validation is not None:
+            for message in build.validation['структурные_требования'] + build.validation['технические_требования']:
+                print(message)
+        if build.post_build is not None:
+            for name, error in build.post_build.errors.items():
+                print(f"Ошибка в задаче «{name}»: {error}")
+        return True
+
+    def _wait_until_settled(self, snapshot: Dict[str, Tuple[int, int]]) -> Dict[str, Tuple[int, int]]:
+        """Ожидание окончания серии сохранений (debounce)"""
+        while True:
+            time.sleep(self.debounce)
+            latest = self._snapshot()
+            if latest == snapshot:
+                return snapshot
+            snapshot = latest
+
+    def watch(self):
+        """Сборка и наблюдение за изменениями до прерывания (Ctrl+C)"""
+        self.rebuild()
+        snapshot = self._snapshot()
+        print(f"Наблюдение за {self.chapters_dir} (Ctrl+C для выхода)...")
+
+        try:
+            while True:
+                time.sleep(self.interval)
+                current = self._snapshot()
+                if current == snapshot:
+                    continue
+
+                current = self._wait_until_settled(current)
+                changed = sorted(
+                    path for path in set(snapshot) | set(current)
+                    if snapshot.get(path) != current.get(path)
+                )
+                for path in changed:
+                    print(f"Изменено: {os.path.relpath(path, self.chapters_dir)}")
+                snapshot = current
+                self.rebuild()
+        except KeyboardInterrupt:
+            print("Наблюдение остановлено")
+
+def main():
+    """Основная функция для запуска режима наблюдения"""
+    parser = argparse.ArgumentParser(description="Пересборка диплома при изменении глав")
+    parser.add_argument("--interval", type=float, default=0.5, help="период опроса файлов, с")
+    parser.add_argument("--debounce", type=float, default=0.3, help="пауза после последнего изменения, с")
+    args = parser.parse_args()
+
+    watcher = DiplomaWatcher(
+        '/home/user/study/diplom/chapters',
+        '/home/user/study/diplom/diploma.docx',
+        '/home/user/Downloads/vkr-2024.docx',
+        cache_dir='/home/user/study/diplom/.diploma_cache',
+        interval=args.interval,
+        debounce=args.debounce,
+    )
+    watcher.watch()
+
+if __name__ == '__main__':
+    main()
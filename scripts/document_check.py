@@ -1,85 +1,187 @@
 import os
 import re
-from docx import Document
-from typing import List, Dict
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
+
+from docx_fast_reader import FastDocxReader, ParagraphRecord, SectionRecord
 
 class DiplomaStyleChecker:
-    def __init__(self, directory: str):
+    # Версия набора проверок: при изменении правил кэш результатов сбрасывается
+    CHECKS_VERSION = 1
+    CACHE_FILENAME = '.diploma_style_cache.json'
+
+    def __init__(self, directory: str, workers: Optional[int] = None, cache_path: Optional[str] = None):
+        """
+        :param directory: Каталог с документами .docx
+        :param workers: Число процессов для проверки файлов (по умолчанию — число ядер)
+        :param cache_path: Файл кэша результатов; по умолчанию CACHE_FILENAME в directory
+        """
         self.directory = directory
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_path = cache_path or os.path.join(directory, self.CACHE_FILENAME)
         self.errors = []
 
-    def check_font(self, file_path: str) -> List[str]:
-        """Проверка шрифта и его размера"""
-        doc = Document(file_path)
+    @staticmethod
+    def parse_document(file_path: str) -> Tuple[List[ParagraphRecord], List[SectionRecord]]:
+        """Однократный разбор документа: абзацы и разделы"""
+        paragraphs = []
+        sections = []
+        for record in FastDocxReader(file_path).iter_elements():
+            if isinstance(record, ParagraphRecord):
+                paragraphs.append(record)
+            else:
+                sections.append(record)
+        return paragraphs, sections
+
+    @staticmethod
+    def font_errors(paragraphs: List[ParagraphRecord]) -> List[str]:
+        """Шрифт и его размер по первому фрагменту каждого абзаца"""
         font_errors = []
         
-        for paragraph in doc.paragraphs:
-            if paragraph.style and paragraph.runs:
+        for paragraph in paragraphs:
+            if paragraph.style_name and paragraph.runs:
                 run = paragraph.runs[0]
-                if run.font.name != 'Times New Roman':
+                if run.font_name != 'Times New Roman':
                     font_errors.append(f"Неверный шрифт в параграфе: {paragraph.text[:50]}...")
-                if run.font.size != 14:
+                if run.font_size != 14:
                     font_errors.append(f"Неверный размер шрифта в параграфе: {paragraph.text[:50]}...")
         
         return font_errors
 
-    def check_line_spacing(self, file_path: str) -> List[str]:
-        """Проверка межстрочного интервала"""
-        doc = Document(file_path)
+    @staticmethod
+    def line_spacing_errors(paragraphs: List[ParagraphRecord]) -> List[str]:
+        """Межстрочный интервал абзацев"""
         spacing_errors = []
         
-        for paragraph in doc.paragraphs:
-            if paragraph.paragraph_format.line_spacing != 1.5:
+        for paragraph in paragraphs:
+            # Множитель 1.5 задается правилом auto (оно же действует, если правило не указано)
+            if paragraph.line_rule not in (None, 'auto') or paragraph.line_spacing != 1.5:
                 spacing_errors.append(f"Неверный межстрочный интервал в параграфе: {paragraph.text[:50]}...")
         
         return spacing_errors
 
-    def check_margins(self, file_path: str) -> List[str]:
-        """Проверка полей документа"""
-        doc = Document(file_path)
+    @staticmethod
+    def margin_errors(sections: List[SectionRecord]) -> List[str]:
+        """Поля разделов"""
         margin_errors = []
         
-        sections = doc.sections
+        # Поля в записях разделов заданы в пунктах: 72 пункта = 1 дюйм
         for section in sections:
-            if section.left_margin.inches != 1.18:  # 30 мм
+            if (section.left_margin or 0) / 72 != 1.18:  # 30 мм
                 margin_errors.append("Левое поле не соответствует 30 мм")
-            if section.right_margin.inches != 0.39:  # 10 мм
+            if (section.right_margin or 0) / 72 != 0.39:  # 10 мм
                 margin_errors.append("Правое поле не соответствует 10 мм")
-            if section.top_margin.inches != 0.79:  # 20 мм
+            if (section.top_margin or 0) / 72 != 0.79:  # 20 мм
                 margin_errors.append("Верхнее поле не соответствует 20 мм")
-            if section.bottom_margin.inches != 0.79:  # 20 мм
+            if (section.bottom_margin or 0) / 72 != 0.79:  # 20 мм
                 margin_errors.append("Нижнее поле не соответствует 20 мм")
         
         return margin_errors
 
-    def check_alignment(self, file_path: str) -> List[str]:
-        """Проверка выравнивания по ширине"""
-        doc = Document(file_path)
+    @staticmethod
+    def alignment_errors(paragraphs: List[ParagraphRecord]) -> List[str]:
+        """Выравнивание абзацев по ширине"""
         alignment_errors = []
         
-        for paragraph in doc.paragraphs:
-            if paragraph.alignment != 3:  # WD_ALIGN_PARAGRAPH.JUSTIFY
+        for paragraph in paragraphs:
+            if paragraph.alignment != 'both':  # WD_ALIGN_PARAGRAPH.JUSTIFY
                 alignment_errors.append(f"Неверное выравнивание в параграфе: {paragraph.text[:50]}...")
         
         return alignment_errors
 
+    @classmethod
+    def check_document(cls, file_path: str) -> List[str]:
+        """Все проверки документа по одному разбору файла"""
+        paragraphs, sections = cls.parse_document(file_path)
+        
+        file_errors = []
+        file_errors.extend(cls.font_errors(paragraphs))
+        file_errors.extend(cls.line_spacing_errors(paragraphs))
+        file_errors.extend(cls.margin_errors(sections))
+        file_errors.extend(cls.alignment_errors(paragraphs))
+        return file_errors
+
+    def check_font(self, file_path: str) -> List[str]:
+        """Проверка шрифта и его размера"""
+        paragraphs, _ = self.parse_document(file_path)
+        return self.font_errors(paragraphs)
+
+    def check_line_spacing(self, file_path: str) -> List[str]:
+        """Проверка межстрочного интервала"""
+        paragraphs, _ = self.parse_document(file_path)
+        return self.line_spacing_errors(paragraphs)
+
+    def check_margins(self, file_path: str) -> List[str]:
+        """Проверка полей документа"""
+        return self.margin_errors(FastDocxReader(file_path).sections())
+
+    def check_alignment(self, file_path: str) -> List[str]:
+        """Проверка выравнивания по ширине"""
+        paragraphs, _ = self.parse_document(file_path)
+        return self.alignment_errors(paragraphs)
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        """Результаты прошлых проверок: путь -> {mtime_ns, size, errors}"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+        if cache.get('version') != self.CHECKS_VERSION:
+            return {}
+        return cache.get('files', {})
+
+    def _save_cache(self, files: Dict[str, Dict]):
+        tmp_path = f'{self.cache_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.CHECKS_VERSION, 'files': files}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
     def scan_documents(self) -> Dict[str, List[str]]:
-        """Сканирование всех документов в директории"""
+        """
+        Сканирование всех документов в директории.
+
+        Каждый файл разбирается один раз; файлы, не изменившиеся с прошлого
+        сканирования (тот же путь, время изменения и размер), берутся из кэша,
+        остальные проверяются параллельно в пуле процессов.
+        """
+        document_paths = [
+            os.path.join(root, file)
+            for root, _, files in os.walk(self.directory)
+            for file in files if file.endswith('.docx')
+        ]
+
+        cached = self._load_cache()
+        files = {}
+        pending = []
+        for full_path in document_paths:
+            stat = os.stat(full_path)
+            entry = cached.get(full_path)
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                files[full_path] = entry
+            else:
+                files[full_path] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'errors': None}
+                pending.append(full_path)
+
+        if len(pending) > 1 and self.workers > 1:
+            workers = min(self.workers, len(pending))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                checked = executor.map(self.check_document, pending, chunksize=max(1, len(pending) // (workers * 4)))
+                for full_path, file_errors in zip(pending, checked):
+                    files[full_path]['errors'] = file_errors
+        else:
+            for full_path in pending:
+                files[full_path]['errors'] = self.check_document(full_path)
+
+        if pending or len(files) != len(cached):
+            self._save_cache(files)
+
         results = {}
-        
-        for root, _, files in os.walk(self.directory):
-            for file in files:
-                if file.endswith('.docx'):
-                    full_path = os.path.join(root, file)
-                    file_errors = []
-                    
-                    file_errors.extend(self.check_font(full_path))
-                    file_errors.extend(self.check_line_spacing(full_path))
-                    file_errors.extend(self.check_margins(full_path))
-                    file_errors.extend(self.check_alignment(full_path))
-                    
-                    if file_errors:
-                        results[full_path] = file_errors
+        for full_path in document_paths:
+            file_errors = files[full_path]['errors']
+            if file_errors:
+                results[full_path] = file_errors
         
         return results
 
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+from typing import NamedTuple, Optional, Tuple
+
+from lxml import etree
+from docx import Document
+from docx.oxml.ns import qn
+
+# Служебные элементы, которые Word вставляет при правке и которые не влияют на вид документа
+NOISE_TAGS = {qn('w:proofErr'), qn('w:lastRenderedPageBreak')}
+
+# Атрибуты идентификаторов сеансов правки (rsid)
+RSID_ATTRIBUTES = {
+    qn('w:rsidR'), qn('w:rsidRPr'), qn('w:rsidRDefault'), qn('w:rsidP'),
+    qn('w:rsidDel'), qn('w:rsidTr'), qn('w:rsidSect'),
+}
+
+# Содержимое фрагмента, которое можно переносить в соседний фрагмент
+TEXT_CONTENT_TAGS = {
+    qn('w:t'), qn('w:tab'), qn('w:br'), qn('w:cr'), qn('w:noBreakHyphen'), qn('w:softHyphen'),
+}
+
+# Элементы, внутри которых фрагменты текста объединяются
+RUN_CONTAINER_TAGS = (qn('w:p'), qn('w:hyperlink'), qn('w:smartTag'), qn('w:ins'))
+
+XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
+class CompactionStats(NamedTuple):
+    """Результат уплотнения документа"""
+    runs_before: int
+    runs_after: int
+    xml_bytes_before: int
+    xml_bytes_after: int
+    noise_removed: int
+    rsid_attributes_removed: int
+
+    @property
+    def runs_removed(self) -> int:
+        return self.runs_before - self.runs_after
+
+    @property
+    def xml_bytes_saved(self) -> int:
+        return self.xml_bytes_before - self.xml_bytes_after
+
+class DocumentCompactor:
+    """
+    Уплотнение тела документа Word перед исправлением и проверкой.
+
+    После правки в Word текст часто разбит на множество соседних фрагментов (runs)
+    с одинаковым оформлением, а тело засорено отметками проверки правописания
+    и идентификаторами сеансов правки. Уплотнение объединяет такие фрагменты,
+    удаляет пустые фрагменты и служебные отметки; вид документа не меняется,
+    а циклы по фрагментам в DocumentSpacingFixer и DiplomaValidator становятся короче.
+    """
+
+    def __init__(self, document_path, document=None):
+        """
+        Инициализация с путем к документу
+
+        :param document_path: Путь к документу Word
+        :param document: Уже открытый документ (python-docx); если передан,
+                         файл повторно не читается
+        """
+        self.document_path = document_path
+        self.document = document if document is not None else Document(document_path)
+        self.stats: Optional[CompactionStats] = None
+
+    def _body(self):
+        return self.document.element.body
+
+    def remove_noise(self) -> Tuple[int, int]:
+        """
+        Удаление отметок правописания и атрибутов rsid
+
+        :return: Количество удаленных элементов и атрибутов
+        """
+        noise = []
+        rsid_count = 0
+        for element in self._body().iter():
+            if element.tag in NOISE_TAGS:
+                noise.append(element)
+                continue
+            for name in RSID_ATTRIBUTES.intersection(element.attrib):
+                del element.attrib[name]
+                rsid_count += 1
+
+        for element in noise:
+            element.getparent().remove(element)
+        return len(noise), rsid_count
+
+    @staticmethod
+    def _format_key(run) -> bytes:
+        """Оформление фрагмента для сравнения с соседними"""
+        rPr = run.find(qn('w:rPr'))
+        return etree.tostring(rPr) if rPr is not None else b''
+
+    @staticmethod
+    def _is_text_run(run) -> bool:
+        """Фрагмент содержит только текст (без полей, рисунков, сносок)"""
+        return all(child.tag in TEXT_CONTENT_TAGS for child in run if child.tag != qn('w:rPr'))
+
+    @staticmethod
+    def _is_empty_run(run) -> bool:
+        """Фрагмент без содержимого или только с пустым текстом"""
+        for child in run:
+            if child.tag == qn('w:rPr'):
+                continue
+            if child.tag != qn('w:t') or child.text:
+                return False
+        return True
+
+    @staticmethod
+    def _merge_text(run):
+        """Объединение соседних w:t внутри фрагмента"""
+        previous = None
+        for child in list(run):
+            if child.tag != qn('w:t'):
+                previous = None
+                continue
+            if previous is None:
+                previous = child
+                continue
+            previous.text = (previous.text or '') + (child.text or '')
+            run.remove(child)
+
+        for child in run.iterchildren(qn('w:t')):
+            text = child.text or ''
+            if text != text.strip():
+                child.set(XML_SPACE, 'preserve')
+
+    def _compact_container(self, container) -> int:
+        """
+        Объединение соседних фрагментов с одинаковым оформлением
+
+        :return: Количество удаленных фрагментов
+        """
+        removed = 0
+        target = None
+        target_key = None
+        for child in list(container):
+            if child.tag != qn('w:r'):
+                # Закладки, поля и прочие элементы разделяют фрагменты
+                if child.tag not in NOISE_TAGS:
+                    target = None
+                continue
+
+            if self._is_empty_run(child):
+                container.remove(child)
+                removed += 1
+                continue
+
+            if not self._is_text_run(child):
+                target = None
+                continue
+
+            key = self._format_key(child)
+            if target is not None and key == target_key:
+                for content in list(child):
+                    if content.tag != qn('w:rPr'):
+                        target.append(content)
+                container.remove(child)
+                removed += 1
+                continue
+
+            if target is not None:
+                self._merge_text(target)
+            target = child
+            target_key = key
+
+        if target is not None:
+            self._merge_text(target)
+        return removed
+
+    def merge_runs(self) -> int:
+        """
+        Объединение фрагментов во всех абзацах, гиперссылках и таблицах
+
+        :return: Количество удаленных фрагментов
+        """
+        containers = list(self._body().iter(*RUN_CONTAINER_TAGS))
+        return sum(self._compact_container(container) for container in containers)
+
+    def compact(self, save=True) -> CompactionStats:
+        """
+        Применение всех шагов уплотнения к документу
+
+        :param save: Сохранить документ в document_path после уплотнения
+        """
+        body = self._body()
+        runs_before = sum(1 for _ in body.iter(qn('w:r')))
+        xml_bytes_before = len(etree.tostring(body, encoding='UTF-8'))
+
+        noise_removed, rsid_removed = self.remove_noise()
+        self.merge_runs()
+
+        self.stats = CompactionStats(
+            runs_before=runs_before,
+            runs_after=sum(1 for _ in body.iter(qn('w:r'))),
+            xml_bytes_before=xml_bytes_before,
+            xml_bytes_after=len(etree.tostring(body, encoding='UTF-8')),
+            noise_removed=noise_removed,
+            rsid_attributes_removed=rsid_removed,
+        )
+
+        if save:
+            self.document.save(self.document_path)
+            print(f"Документ {self.document_path} уплотнен")
+        return self.stats
+
+def print_compaction_stats(stats: CompactionStats):
+    """Вывод результатов уплотнения"""
+    print("\n🗜️ Уплотнение документа:")
+    runs_percent = stats.runs_removed / stats.runs_before * 100 if stats.runs_before else 0
+    bytes_percent = stats.xml_bytes_saved / stats.xml_bytes_before * 100 if stats.xml_bytes_before else 0
+    print(f"Фрагментов текста: {stats.runs_before} → {stats.runs_after} (-{runs_percent:.1f}%)")
+    print(f"Размер XML тела: {stats.xml_bytes_before} → {stats.xml_bytes_after} байт (-{bytes_percent:.1f}%)")
+    print(f"Удалено отметок правописания: {stats.noise_removed}, атрибутов rsid: {stats.rsid_attributes_removed}")
+
+def main():
+    """Основная функция для запуска уплотнения документа"""
+    document_path = '/home/user/study/diplom/diploma.docx'
+
+    # Проверка существования файла
+    if not os.path.exists(document_path):
+        print(f"Ошибка: файл {document_path} не найден")
+        return
+
+    compactor = DocumentCompactor(document_path)
+    print_compaction_stats(compactor.compact())
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,14 @@
+import argparse
+import hashlib
+import json
 import docx
 from docx.shared import Pt, RGBColor
 import os
+from collections import defaultdict, deque
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from docx_fast_reader import ParagraphRecord
+from document_snapshot import open_document
 
 def compare_documents(template_path, generated_path):
     """Детальное сравнение документов"""
@@ -78,10 +86,354 @@ def compare_documents(template_path, generated_path):
     print(f"Шаблон: {len(template_text)} символов")
     print(f"Сгенерированный: {len(generated_text)} символов")
 
+class ParagraphSignature(NamedTuple):
+    """Отпечаток абзаца для структурного сравнения"""
+    index: int
+    text_hash: bytes
+    format_hash: bytes
+    style_name: Optional[str]
+    paragraph_format: Tuple
+    runs_format: Tuple
+    preview: str
+
+# Свойства абзаца, входящие в отпечаток оформления
+PARAGRAPH_FORMAT_FIELDS = (
+    'style_name', 'alignment', 'line_spacing', 'line_rule',
+    'space_before', 'space_after', 'first_line_indent', 'left_indent',
+)
+
+PREVIEW_LENGTH = 80
+
+def _digest(data: str) -> bytes:
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=8).digest()
+
+def paragraph_signature(paragraph: ParagraphRecord) -> ParagraphSignature:
+    """
+    Отпечаток абзаца: хэш текста и хэш оформления
+
+    Оформление фрагментов учитывается по участкам текста, а не по самим
+    фрагментам, поэтому разбиение текста на runs на отпечаток не влияет.
+    """
+    paragraph_format = tuple(getattr(paragraph, field) for field in PARAGRAPH_FORMAT_FIELDS)
+
+    runs_format: List[List[Any]] = []
+    for run in paragraph.runs:
+        if not run.text:
+            continue
+        run_format = (run.font_name, run.font_size, run.bold, run.italic)
+        if runs_format and tuple(runs_format[-1][1:]) == run_format:
+            runs_format[-1][0] += len(run.text)
+        else:
+            runs_format.append([len(run.text), *run_format])
+    runs_format = tuple(tuple(item) for item in runs_format)
+
+    return ParagraphSignature(
+        index=paragraph.index,
+        text_hash=_digest(paragraph.text),
+        format_hash=_digest(repr((paragraph_format, runs_format))),
+        style_name=paragraph.style_name,
+        paragraph_format=paragraph_format,
+        runs_format=runs_format,
+        preview=paragraph.text[:PREVIEW_LENGTH],
+    )
+
+def document_signatures(document_path: str, skip_empty: bool = True) -> List[ParagraphSignature]:
+    """Отпечатки абзацев документа (из снимка документа, если он уже есть)"""
+    with open_document(document_path) as reader:
+        return [
+            paragraph_signature(paragraph)
+            for paragraph in reader.iter_paragraphs()
+            if not skip_empty or paragraph.text.strip()
+        ]
+
+def _bisect(a: Sequence, b: Sequence, a_lo: int, a_hi: int, b_lo: int, b_hi: int) -> Optional[Tuple[int, int]]:
+    """
+    Средняя «змея» алгоритма Майерса: точка, через которую проходит
+    кратчайший путь редактирования. Память — O(N + M).
+
+    :return: Точка разбиения (x, y) в координатах a и b или None, если общих элементов нет
+    """
+    n = a_hi - a_lo
+    m = b_hi - b_lo
+    max_d = (n + m + 1) // 2
+    v_offset = max_d
+    v_length = 2 * max_d
+    v1 = [-1] * v_length
+    v1[v_offset + 1] = 0
+    v2 = v1[:]
+    delta = n - m
+    front = delta % 2 != 0
+    k1_start = k1_end = k2_start = k2_end = 0
+
+    for d in range(max_d):
+        # Прямой проход
+        for k1 in range(-d + k1_start, d + 1 - k1_end, 2):
+            k1_offset = v_offset + k1
+            if k1 == -d or (k1 != d and v1[k1_offset - 1] < v1[k1_offset + 1]):
+                x1 = v1[k1_offset + 1]
+            else:
+                x1 = v1[k1_offset - 1] + 1
+            y1 = x1 - k1
+            while x1 < n and y1 < m and a[a_lo + x1] == b[b_lo + y1]:
+                x1 += 1
+                y1 += 1
+            v1[k1_offset] = x1
+            if x1 > n:
+                k1_end += 2
+            elif y1 > m:
+                k1_start += 2
+            elif front:
+                k2_offset = v_offset + delta - k1
+                if 0 <= k2_offset < v_length and v2[k2_offset] != -1 and x1 >= n - v2[k2_offset]:
+                    return a_lo + x1, b_lo + y1
+
+        # Обратный проход
+        for k2 in range(-d + k2_start, d + 1 - k2_end, 2):
+            k2_offset = v_offset + k2
+            if k2 == -d or (k2 != d and v2[k2_offset - 1] < v2[k2_offset + 1]):
+                x2 = v2[k2_offset + 1]
+            else:
+                x2 = v2[k2_offset - 1] + 1
+            y2 = x2 - k2
+            while x2 < n and y2 < m and a[a_hi - 1 - x2] == b[b_hi - 1 - y2]:
+                x2 += 1
+                y2 += 1
+            v2[k2_offset] = x2
+            if x2 > n:
+                k2_end += 2
+            elif y2 > m:
+                k2_start += 2
+            elif not front:
+                k1_offset = v_offset + delta - k2
+                if 0 <= k1_offset < v_length and v1[k1_offset] != -1:
+                    x1 = v1[k1_offset]
+                    y1 = v_offset + x1 - k1_offset
+                    if x1 >= n - x2:
+                        return a_lo + x1, b_lo + y1
+    return None
+
+def _diff_single(a: Sequence, b: Sequence, a_lo: int, a_hi: int, b_lo: int, b_hi: int) -> List[Tuple]:
+    """Сценарий правки, когда одна из частей состоит из одного элемента"""
+    if a_hi - a_lo == 1:
+        for j in range(b_lo, b_hi):
+            if a[a_lo] == b[j]:
+                return ([('insert', None, k) for k in range(b_lo, j)] + [('equal', a_lo, j)]
+                        + [('insert', None, k) for k in range(j + 1, b_hi)])
+        return [('delete', a_lo, None)] + [('insert', None, k) for k in range(b_lo, b_hi)]
+
+    for i in range(a_lo, a_hi):
+        if a[i] == b[b_lo]:
+            return ([('delete', k, None) for k in range(a_lo, i)] + [('equal', i, b_lo)]
+                    + [('delete', k, None) for k in range(i + 1, a_hi)])
+    return [('delete', k, None) for k in range(a_lo, a_hi)] + [('insert', None, b_lo)]
+
+def diff_sequences(a: Sequence, b: Sequence) -> List[Tuple[str, Optional[int], Optional[int]]]:
+    """
+    Кратчайший сценарий правки последовательности a в b (Myers, линейная память)
+
+    Элементы, которых нет во второй последовательности, заранее исключаются:
+    они не могут войти в общую подпоследовательность, а без них сравнение
+    сильно различающихся документов (шаблон и сборка) не вырождается в O(N·M).
+
+    :return: Операции ('equal', i, j), ('delete', i, None), ('insert', None, j) в порядке документов
+    """
+    a_keys = set(a)
+    b_keys = set(b)
+    a_index = [i for i, item in enumerate(a) if item in b_keys]
+    b_index = [j for j, item in enumerate(b) if item in a_keys]
+
+    matches = [
+        (a_index[i], b_index[j])
+        for op, i, j in _diff_core([a[i] for i in a_index], [b[j] for j in b_index])
+        if op == 'equal'
+    ]
+
+    operations: List[Tuple[str, Optional[int], Optional[int]]] = []
+    i = j = 0
+    for match_i, match_j in matches + [(len(a), len(b))]:
+        operations.extend(('delete', k, None) for k in range(i, match_i))
+        operations.extend(('insert', None, k) for k in range(j, match_j))
+        if match_i < len(a):
+            operations.append(('equal', match_i, match_j))
+        i, j = match_i + 1, match_j + 1
+    return operations
+
+def _diff_core(a: Sequence, b: Sequence) -> List[Tuple[str, Optional[int], Optional[int]]]:
+    """Алгоритм Майерса с делением по средней змее (без предварительной фильтрации)"""
+    operations: List[Tuple[str, Optional[int], Optional[int]]] = []
+    # Явный стек вместо рекурсии: (a_lo, a_hi, b_lo, b_hi) или готовые операции
+    stack: List[Any] = [(0, len(a), 0, len(b))]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            operations.extend(item)
+            continue
+        a_lo, a_hi, b_lo, b_hi = item
+
+        # Общее начало и общий конец
+        while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+            operations.append(('equal', a_lo, b_lo))
+            a_lo += 1
+            b_lo += 1
+        suffix = []
+        while a_lo < a_hi and b_lo < b_hi and a[a_hi - 1] == b[b_hi - 1]:
+            a_hi -= 1
+            b_hi -= 1
+            suffix.append(('equal', a_hi, b_hi))
+        suffix.reverse()
+
+        if a_lo == a_hi or b_lo == b_hi:
+            operations.extend(('delete', i, None) for i in range(a_lo, a_hi))
+            operations.extend(('insert', None, j) for j in range(b_lo, b_hi))
+            operations.extend(suffix)
+            continue
+
+        # Один элемент с одной стороны: средняя змея не нужна
+        if a_hi - a_lo == 1 or b_hi - b_lo == 1:
+            operations.extend(_diff_single(a, b, a_lo, a_hi, b_lo, b_hi))
+            operations.extend(suffix)
+            continue
+
+        split = _bisect(a, b, a_lo, a_hi, b_lo, b_hi)
+        if split is None:
+            operations.extend(('delete', i, None) for i in range(a_lo, a_hi))
+            operations.extend(('insert', None, j) for j in range(b_lo, b_hi))
+            operations.extend(suffix)
+            continue
+
+        x, y = split
+        # Порядок обработки: левая часть, правая часть, затем общий конец
+        stack.append(suffix)
+        stack.append((x, a_hi, y, b_hi))
+        stack.append((a_lo, x, b_lo, y))
+    return operations
+
+def _format_changes(old: ParagraphSignature, new: ParagraphSignature) -> List[str]:
+    """Названия изменившихся свойств оформления"""
+    changes = [
+        field for field, old_value, new_value
+        in zip(PARAGRAPH_FORMAT_FIELDS, old.paragraph_format, new.paragraph_format)
+        if old_value != new_value
+    ]
+    if old.runs_format != new.runs_format:
+        changes.append('runs')
+    return changes
+
+def diff_signatures(old: List[ParagraphSignature], new: List[ParagraphSignature]) -> Dict[str, Any]:
+    """
+    Структурное сравнение двух документов по отпечаткам абзацев
+
+    Абзацы выравниваются по хэшам текста; удаленный абзац, текст которого
+    вставлен в другом месте, считается перемещенным, а совпавшие по тексту
+    абзацы с разным хэшем оформления — переформатированными.
+    """
+    operations = diff_sequences([s.text_hash for s in old], [s.text_hash for s in new])
+
+    deleted = [i for op, i, _ in operations if op == 'delete']
+    inserted = [j for op, _, j in operations if op == 'insert']
+
+    # Перемещения: удаленный текст, вставленный в другом месте
+    inserted_by_hash: Dict[bytes, deque] = defaultdict(deque)
+    for j in inserted:
+        inserted_by_hash[new[j].text_hash].append(j)
+    moved: Dict[int, int] = {}
+    for i in deleted:
+        candidates = inserted_by_hash.get(old[i].text_hash)
+        if candidates:
+            moved[i] = candidates.popleft()
+    moved_targets = set(moved.values())
+
+    changes: List[Dict[str, Any]] = []
+    summary = {'вставлено': 0, 'удалено': 0, 'перемещено': 0, 'переформатировано': 0, 'без_изменений': 0}
+
+    for op, i, j in operations:
+        if op == 'equal':
+            if old[i].format_hash != new[j].format_hash:
+                summary['переформатировано'] += 1
+                changes.append({
+                    'тип': 'переформатирование',
+                    'старый_абзац': old[i].index,
+                    'новый_абзац': new[j].index,
+                    'свойства': _format_changes(old[i], new[j]),
+                    'стиль': new[j].style_name,
+                    'текст': new[j].preview,
+                })
+            else:
+                summary['без_изменений'] += 1
+        elif op == 'delete':
+            if i in moved:
+                target = new[moved[i]]
+                summary['перемещено'] += 1
+                changes.append({
+                    'тип': 'перемещение',
+                    'старый_абзац': old[i].index,
+                    'новый_абзац': target.index,
+                    'свойства': _format_changes(old[i], target) if old[i].format_hash != target.format_hash else [],
+                    'стиль': target.style_name,
+                    'текст': target.preview,
+                })
+            else:
+                summary['удалено'] += 1
+                changes.append({
+                    'тип': 'удаление',
+                    'старый_абзац': old[i].index,
+                    'стиль': old[i].style_name,
+                    'текст': old[i].preview,
+                })
+        elif j not in moved_targets:
+            summary['вставлено'] += 1
+            changes.append({
+                'тип': 'вставка',
+                'новый_абзац': new[j].index,
+                'стиль': new[j].style_name,
+                'текст': new[j].preview,
+            })
+
+    return {'сводка': summary, 'изменения': changes}
+
+def diff_documents(old_path: str, new_path: str, skip_empty: bool = True) -> Dict[str, Any]:
+    """
+    Структурное сравнение двух версий документа
+
+    :param skip_empty: Не учитывать пустые абзацы (разрывы страниц и т.п.)
+    :return: Отчет: пути документов, сводка и список изменений
+    """
+    report = diff_signatures(document_signatures(old_path, skip_empty), document_signatures(new_path, skip_empty))
+    return {'старая_версия': old_path, 'новая_версия': new_path, **report}
+
+def print_diff_summary(report: Dict[str, Any], limit: int = 10):
+    """Вывод сводки структурного сравнения"""
+    print("🔍 Структурное сравнение документов:")
+    print(f"Старая версия: {report['старая_версия']}")
+    print(f"Новая версия: {report['новая_версия']}")
+    for name, count in report['сводка'].items():
+        print(f"  {name.replace('_', ' ')}: {count}")
+
+    for change in report['изменения'][:limit]:
+        position = change.get('новый_абзац', change.get('старый_абзац'))
+        print(f"  • {change['тип']} (абзац {position + 1}): {change['текст']}")
+    if len(report['изменения']) > limit:
+        print(f"  ... и еще {len(report['изменения']) - limit} изменений")
+
 def main():
     template_path = '/home/user/Downloads/vkr-2024.docx'
     generated_path = '/home/user/study/diplom/diploma.docx'
-    compare_documents(template_path, generated_path)
+
+    parser = argparse.ArgumentParser(description="Сравнение документов Word")
+    parser.add_argument("old", nargs="?", default=template_path, help="исходный документ")
+    parser.add_argument("new", nargs="?", default=generated_path, help="новый документ")
+    parser.add_argument("--diff", metavar="REPORT_JSON",
+                        help="структурное сравнение абзацев с сохранением отчета в JSON")
+    args = parser.parse_args()
+
+    if args.diff:
+        report = diff_documents(args.old, args.new)
+        with open(args.diff, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print_diff_summary(report)
+        print(f"Отчет сохранен в {args.diff}")
+    else:
+        compare_documents(args.old, args.new)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from docx_fast_reader import (
+    BodyWalker, FastDocxReader, ParagraphRecord, RunRecord, SectionRecord, StyleInfo, StyleTable,
+    iter_document_elements,
+)
+
+SNAPSHOT_SUFFIX = '.snapshot'
+SNAPSHOT_VERSION = 2
+
+# Заголовок: сигнатура, SHA-256 документа, длина метаданных (JSON)
+_MAGIC = b'DOCXSNAP'
+_HEADER = struct.Struct('<8s32sQ')
+_ALIGNMENT = 8
+
+# Столбцы таблиц абзацев и фрагментов: имя -> код типа array
+# Строки хранятся номерами в общей таблице строк (-1 — не задано), числа с плавающей
+# точкой — NaN вместо None, логические значения — -1/0/1
+PARAGRAPH_COLUMNS = {
+    'style_id': 'i',
+    'style_name': 'i',
+    'alignment': 'i',
+    'line_spacing': 'd',
+    'line_rule': 'i',
+    'space_before': 'd',
+    'space_after': 'd',
+    'first_line_indent': 'd',
+    'left_indent': 'd',
+    'page_break': 'b',
+    'run_start': 'q',        # N + 1 границ: фрагменты абзаца i — run_start[i]:run_start[i + 1]
+}
+RUN_COLUMNS = {
+    'font_name': 'i',
+    'font_size': 'd',
+    'bold': 'b',
+    'italic': 'b',
+    'text_offset': 'q',      # M + 1 границ текста фрагментов в байтах UTF-8
+}
+
+class SnapshotCounters(NamedTuple):
+    """Счетчики документа (те же поля, что у BodyWalker)"""
+    paragraph_count: int
+    table_count: int
+    inline_shape_count: int
+
+def snapshot_path(document_path: str) -> str:
+    """Файл снимка рядом с документом"""
+    return document_path + SNAPSHOT_SUFFIX
+
+def document_hash(document_path: str) -> str:
+    """SHA-256 содержимого документа — ключ снимка"""
+    digest = hashlib.sha256()
+    with open(document_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _float(value: Optional[float]) -> float:
+    return math.nan if value is None else value
+
+def _tristate(value: Optional[bool]) -> int:
+    return -1 if value is None else int(value)
+
+class _StringTable:
+    """Интернирование строк: одинаковые стили и шрифты хранятся один раз"""
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+    def __call__(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+class DocumentColumns:
+    """
+    Абзацы и фрагменты документа по столбцам в памяти.
+
+    То же содержимое, что в файле снимка, и тот же интерфейс: columns (p.*, r.*, text),
+    strings, styles, paragraph_count; используется при записи снимка и для документа,
+    открытого в python-docx, когда снимка нет.
+    """
+
+    def __init__(self, styles: StyleTable, elements: Iterable[Union[ParagraphRecord, SectionRecord]]):
+        """
+        :param styles: Таблица стилей документа
+        :param elements: Записи тела документа (FastDocxReader.iter_elements или iter_document_elements)
+        """
+        intern = _StringTable()
+        paragraphs = {name: array(code) for name, code in PARAGRAPH_COLUMNS.items()}
+        runs = {name: array(code) for name, code in RUN_COLUMNS.items()}
+        text = bytearray()
+        sections: List[List[Any]] = []
+
+        paragraphs['run_start'].append(0)
+        runs['text_offset'].append(0)
+        paragraph_count = 0
+        for record in elements:
+            if isinstance(record, SectionRecord):
+                # Раздел хранится с числом абзацев перед ним, чтобы восстановить порядок
+                sections.append([paragraph_count, *record])
+                continue
+
+            paragraphs['style_id'].append(intern(record.style_id))
+            paragraphs['style_name'].append(intern(record.style_name))
+            paragraphs['alignment'].append(intern(record.alignment))
+            paragraphs['line_spacing'].append(_float(record.line_spacing))
+            paragraphs['line_rule'].append(intern(record.line_rule))
+            paragraphs['space_before'].append(_float(record.space_before))
+            paragraphs['space_after'].append(_float(record.space_after))
+            paragraphs['first_line_indent'].append(_float(record.first_line_indent))
+            paragraphs['left_indent'].append(_float(record.left_indent))
+            paragraphs['page_break'].append(int(record.page_break))
+            for run in record.runs:
+                runs['font_name'].append(intern(run.font_name))
+                runs['font_size'].append(_float(run.font_size))
+                runs['bold'].append(_tristate(run.bold))
+                runs['italic'].append(_tristate(run.italic))
+                text += run.text.encode('utf-8')
+                runs['text_offset'].append(len(text))
+            paragraphs['run_start'].append(len(runs['font_name']))
+            paragraph_count += 1
+
+        self.styles = styles
+        self.strings = intern.strings
+        self.sections = sections
+        self.paragraph_count = paragraph_count
+        self.columns: Dict[str, Any] = {f'p.{name}': column for name, column in paragraphs.items()}
+        self.columns.update((f'r.{name}', column) for name, column in runs.items())
+        self.columns['text'] = bytes(text)
+
+    @classmethod
+    def from_document(cls, document) -> 'DocumentColumns':
+        """Столбцы документа, открытого в python-docx"""
+        styles = StyleTable.from_element(document.styles.element)
+        return cls(styles, iter_document_elements(document, BodyWalker(styles)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Столбцы в памяти, освобождать нечего (интерфейс DocumentSnapshot)"""
+
+def write_snapshot(path: str, content_hash: str, styles: StyleTable,
+                   elements: Iterable[Union[ParagraphRecord, SectionRecord]], walker: BodyWalker):
+    """
+    Запись снимка: таблицы абзацев и фрагментов по столбцам, текст, стили и разделы
+
+    :param content_hash: SHA-256 документа, для которого построен снимок
+    :param elements: Записи тела документа (FastDocxReader.iter_elements или iter_document_elements)
+    :param walker: Обходчик, выдавший записи (счетчики читаются после прохода)
+    """
+    table = DocumentColumns(styles, elements)
+    blocks: List[Tuple[str, bytes]] = [
+        (name, column if isinstance(column, bytes) else column.tobytes())
+        for name, column in table.columns.items()
+    ]
+
+    def meta_bytes(columns):
+        return json.dumps({
+            'version': SNAPSHOT_VERSION,
+            'byteorder': sys.byteorder,
+            'paragraphs': table.paragraph_count,
+            'runs': len(table.columns['r.font_name']),
+            'counters': [walker.paragraph_count, walker.table_count, walker.inline_shape_count],
+            'strings': table.strings,
+            'styles': [list(style) for style in styles.by_id.values()],
+            'doc_defaults': list(styles.doc_defaults) if styles.doc_defaults is not None else None,
+            'sections': table.sections,
+            'columns': columns,
+        }, ensure_ascii=False).encode('utf-8')
+
+    def padded(size):
+        return -(-size // _ALIGNMENT) * _ALIGNMENT
+
+    # Смещения столбцов зависят от длины метаданных, а метаданные содержат смещения:
+    # повторяем расчет, пока длина метаданных не перестанет меняться
+    columns: Dict[str, List[int]] = {}
+    meta = meta_bytes(columns)
+    while True:
+        offset = padded(_HEADER.size + len(meta))
+        columns = {}
+        for name, data in blocks:
+            columns[name] = [offset, len(data)]
+            offset = padded(offset + len(data))
+        new_meta = meta_bytes(columns)
+        if len(new_meta) == len(meta):
+            meta = new_meta
+            break
+        meta = new_meta
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, bytes.fromhex(content_hash), len(meta)))
+        f.write(meta)
+        for name, data in blocks:
+            f.seek(columns[name][0])
+            f.write(data)
+    os.replace(tmp_path, path)
+
+class DocumentSnapshot:
+    """
+    Снимок разобранного документа Word, общий для инструментов анализа.
+
+    Абзацы и фрагменты текста хранятся по столбцам (стили и шрифты — номерами
+    в таблице строк), файл отображается в память (mmap), и записи абзацев
+    собираются прямо из столбцов без распаковки архива и разбора XML.
+    Интерфейс совпадает с FastDocxReader: styles, walker, iter_elements,
+    iter_paragraphs, sections; столбцы (columns, strings) — с DocumentColumns.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Файл снимка (snapshot_path документа)
+        :raises ValueError: Файл не является снимком этой версии
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, digest, meta_length = _HEADER.unpack_from(self._mmap, 0)
+            if magic != _MAGIC:
+                raise ValueError(f"{path} не является снимком документа")
+            meta = json.loads(self._mmap[_HEADER.size:_HEADER.size + meta_length].decode('utf-8'))
+            if meta['version'] != SNAPSHOT_VERSION or meta['byteorder'] != sys.byteorder:
+                raise ValueError(f"Снимок {path} записан в другом формате")
+        except (ValueError, struct.error, KeyError):
+            self._mmap.close()
+            raise
+
+        self.content_hash = digest.hex()
+        self.paragraph_count = meta['paragraphs']
+        self.walker = SnapshotCounters(*meta['counters'])
+        doc_defaults = meta['doc_defaults']
+        self.styles = StyleTable(
+            {style[0]: StyleInfo(*style) for style in meta['styles']},
+            StyleInfo(*doc_defaults) if doc_defaults is not None else None,
+        )
+        self.strings: List[str] = meta['strings']
+        self._sections = [(position, SectionRecord(*values)) for position, *values in meta['sections']]
+
+        # Столбцы — типизированные представления поверх отображения файла, без копирования
+        view = memoryview(self._mmap)
+        self._views = [view]
+        self.columns: Dict[str, memoryview] = {}
+        codes = {**{f'p.{k}': v for k, v in PARAGRAPH_COLUMNS.items()},
+                 **{f'r.{k}': v for k, v in RUN_COLUMNS.items()}}
+        for name, (offset, length) in meta['columns'].items():
+            column = view[offset:offset + length]
+            self._views.append(column)
+            if name in codes:
+                column = column.cast(codes[name])
+                self._views.append(column)
+            self.columns[name] = column
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Освобождение отображения файла"""
+        if self._mmap.closed:
+            return
+        self.columns = {}
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def _string(self, string_id: int) -> Optional[str]:
+        return self.strings[string_id] if string_id >= 0 else None
+
+    def _paragraph(self, i: int) -> ParagraphRecord:
+        c = self.columns
+        string = self._string
+        text_offset = c['r.text_offset']
+        text = c['text']
+        first, last = c['p.run_start'][i], c['p.run_start'][i + 1]
+
+        runs = tuple(
+            RunRecord(
+                str(text[text_offset[j]:text_offset[j + 1]], 'utf-8'),
+                string(c['r.font_name'][j]),
+                _optional(c['r.font_size'][j]),
+                _optional_bool(c['r.bold'][j]),
+                _optional_bool(c['r.italic'][j]),
+            )
+            for j in range(first, last)
+        )
+        return ParagraphRecord(
+            i,
+            string(c['p.style_id'][i]),
+            string(c['p.style_name'][i]),
+            str(text[text_offset[first]:text_offset[last]], 'utf-8'),
+            string(c['p.alignment'][i]),
+            _optional(c['p.line_spacing'][i]),
+            string(c['p.line_rule'][i]),
+            _optional(c['p.space_before'][i]),
+            _optional(c['p.space_after'][i]),
+            _optional(c['p.first_line_indent'][i]),
+            _optional(c['p.left_indent'][i]),
+            bool(c['p.page_break'][i]),
+            runs,
+        )
+
+    def iter_elements(self) -> Iterator[Union[ParagraphRecord, SectionRecord]]:
+        """Абзацы и разделы тела документа в порядке следования"""
+        sections = iter(self._sections)
+        next_section = next(sections, None)
+        for i in range(self.paragraph_count):
+            while next_section is not None and next_section[0] == i:
+                yield next_section[1]
+                next_section = next(sections, None)
+            yield self._paragraph(i)
+        while next_section is not None:
+            yield next_section[1]
+            next_section = next(sections, None)
+
+    def iter_paragraphs(self) -> Iterator[ParagraphRecord]:
+        """Абзацы тела документа"""
+        for i in range(self.paragraph_count):
+            yield self._paragraph(i)
+
+    def sections(self) -> List[SectionRecord]:
+        """Параметры всех разделов документа"""
+        return [record for _, record in self._sections]
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+def _optional_bool(value: int) -> Optional[bool]:
+    return None if value < 0 else bool(value)
+
+def save_snapshot(document_path: str, document=None) -> str:
+    """
+    Построение снимка для документа
+
+    :param document: Тот же документ, уже открытый в python-docx (например, в конвейере
+                     сразу после сохранения); тогда архив повторно не разбирается
+    :return: Путь к файлу снимка
+    """
+    path = snapshot_path(document_path)
+    if document is not None:
+        styles = StyleTable.from_element(document.styles.element)
+        walker = BodyWalker(styles)
+        elements = iter_document_elements(document, walker)
+    else:
+        reader = FastDocxReader(document_path)
+        styles = reader.styles
+        walker = BodyWalker(styles)
+        elements = reader.iter_elements(walker)
+    write_snapshot(path, document_hash(document_path), styles, elements, walker)
+    return path
+
+def open_document(document_path: str, use_snapshot: bool = True) -> Union[DocumentSnapshot, FastDocxReader]:
+    """
+    Читатель документа для инструментов анализа
+
+    Если рядом с документом есть снимок с тем же хэшем содержимого, документ
+    читается из снимка; иначе документ разбирается один раз, снимок записывается
+    для следующих инструментов и возвращается он. Если снимок записать нельзя
+    (например, каталог только для чтения), возвращается FastDocxReader.
+    """
+    if not use_snapshot:
+        return FastDocxReader(document_path)
+
+    path = snapshot_path(document_path)
+    if os.path.exists(path):
+        try:
+            snapshot = DocumentSnapshot(path)
+        except (OSError, ValueError):
+            snapshot = None
+        if snapshot is not None:
+            if snapshot.content_hash == document_hash(document_path):
+                return snapshot
+            snapshot.close()
+
+    try:
+        return DocumentSnapshot(save_snapshot(document_path))
+    except OSError:
+        return FastDocxReader(document_path)
+
+def main():
+    """Построение снимка документа и вывод его размеров"""
+    parser = argparse.ArgumentParser(description="Снимок разобранного документа для инструментов анализа")
+    parser.add_argument("document", nargs="?", default='/home/user/study/diplom/diploma.docx', help="файл .docx")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.document):
+        print(f"Ошибка: файл {args.document} не найден")
+        return
+
+    with DocumentSnapshot(save_snapshot(args.document)) as snapshot:
+        runs = len(snapshot.columns['r.font_name'])
+        print(f"📸 Снимок {snapshot.path}: {snapshot.paragraph_count} абзацев, {runs} фрагментов, "
+              f"{len(snapshot.styles.by_id)} стилей, {os.path.getsize(snapshot.path)} байт")
+
+if __name__ == '__main__':
+    main()
@@ -2,87 +2,210 @@
 # -*- coding: utf-8 -*-
 
 import os
+from typing import Any, Dict, List, NamedTuple, Optional
+
 from docx import Document
-from docx.shared import Pt, Mm
+from docx.oxml.ns import qn
+from docx.shared import Pt, Mm, Length
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
 
+from markdown_renderer import CODE_FONT
+from style_registry import StyleRegistry
+
+class StyleFormat(NamedTuple):
+    """Оформление абзацев стиля ВКР"""
+    space_before: Length
+    space_after: Length
+    alignment: WD_PARAGRAPH_ALIGNMENT
+    first_line_indent: Length
+    font_size: Length
+    bold: Optional[bool]
+
 class DocumentSpacingFixer:
     """
     Класс для исправления отступов и интервалов в документе Word
     после его создания основным форматером.
+
+    Режимы:
+    - 'direct' — свойства записываются в каждый абзац и фрагмент текста;
+    - 'style' — свойства задаются один раз в определениях стилей ВКР (styles.xml),
+      а совпадающее со стилем прямое форматирование удаляется из тела документа.
+      Документ выглядит так же, но document.xml заметно меньше.
     """
+
+    FONT_NAME = 'Times New Roman'
+    FONT_SIZE = Pt(16)
+    LINE_SPACING = 1.5
+    LIST_INDENT = Mm(12.5)
+    BODY_STYLE = 'ВКР Обычный'
+
+    STYLE_FORMATS = {
+        # Заголовки глав
+        'ВКР Глава-Раздел': StyleFormat(Pt(24), Pt(18), WD_PARAGRAPH_ALIGNMENT.CENTER, Mm(0), Pt(20), True),
+        # Заголовки параграфов
+        'ВКР Параграф': StyleFormat(Pt(18), Pt(12), WD_PARAGRAPH_ALIGNMENT.CENTER, Mm(0), Pt(18), True),
+        # Заголовки пунктов
+        'ВКР Пункт': StyleFormat(Pt(12), Pt(8), WD_PARAGRAPH_ALIGNMENT.LEFT, Mm(0), Pt(16), True),
+        # Обычный текст: отступ первой строки 1.25 см, начертание из разметки главы сохраняется
+        'ВКР Обычный': StyleFormat(Pt(0), Pt(8), WD_PARAGRAPH_ALIGNMENT.JUSTIFY, Mm(12.5), Pt(16), None),
+    }
+
+    MODES = ('direct', 'style')
     
-    def __init__(self, document_path):
-        """Инициализация с путем к документу"""
+    def __init__(self, document_path, document=None, mode='direct'):
+        """
+        Инициализация с путем к документу
+
+        :param document_path: Путь к документу Word
+        :param document: Уже открытый документ (python-docx); если передан,
+                         файл повторно не читается
+        :param mode: 'direct' — прямое форматирование абзацев и фрагментов,
+                     'style' — форматирование через стили ВКР
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Неизвестный режим исправления: {mode}")
         self.document_path = document_path
-        self.document = Document(document_path)
+        self.document = document if document is not None else Document(document_path)
+        self.mode = mode
+        self.styles = StyleRegistry.for_document(self.document)
+
+    @staticmethod
+    def is_code_paragraph(paragraph) -> bool:
+        """Листинг кода: все фрагменты абзаца набраны моноширинным шрифтом"""
+        runs = paragraph.runs
+        return bool(runs) and all(run.font.name == CODE_FONT for run in runs)
+
+    def paragraph_properties(self, paragraph, style_name: str, fmt: StyleFormat) -> Dict[str, Any]:
+        """Свойства абзаца стиля ВКР с учетом листингов и элементов списков"""
+        properties = {
+            'space_before': fmt.space_before,
+            'space_after': fmt.space_after,
+            'alignment': fmt.alignment,
+            'first_line_indent': fmt.first_line_indent,
+        }
+        if style_name != self.BODY_STYLE:
+            return properties
+
+        if self.is_code_paragraph(paragraph):
+            # Листинг кода: без выравнивания по ширине и отступа первой строки
+            properties['alignment'] = WD_PARAGRAPH_ALIGNMENT.LEFT
+            properties['first_line_indent'] = Mm(0)
+        elif paragraph.text.startswith('•') or paragraph.paragraph_format.left_indent:
+            # Элемент списка (маркированного или вложенного с отступом слева)
+            properties['first_line_indent'] = Mm(0)  # Без отступа первой строки
+            if not paragraph.paragraph_format.left_indent:
+                properties['left_indent'] = self.LIST_INDENT  # Отступ слева для списка
+        return properties
     
     def fix_paragraph_spacing(self):
         """Исправление отступов между параграфами"""
         for paragraph in self.document.paragraphs:
-            style_name = paragraph.style.name
-            
+            style_name = self.styles.paragraph_style_name(paragraph)
+            fmt = self.STYLE_FORMATS.get(style_name)
+            if fmt is None:
+                continue
+
             # Настройка отступов в зависимости от стиля
-            if style_name == 'ВКР Глава-Раздел':
-                # Заголовки глав
-                paragraph.paragraph_format.space_before = Pt(24)
-                paragraph.paragraph_format.space_after = Pt(18)
-                paragraph.paragraph_format.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-                paragraph.paragraph_format.first_line_indent = Mm(0)  # Без отступа первой строки
-            
-            elif style_name == 'ВКР Параграф':
-                # Заголовки параграфов
-                paragraph.paragraph_format.space_before = Pt(18)
-                paragraph.paragraph_format.space_after = Pt(12)
-                paragraph.paragraph_format.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-                paragraph.paragraph_format.first_line_indent = Mm(0)  # Без отступа первой строки
-            
-            elif style_name == 'ВКР Пункт':
-                # Заголовки пунктов
-                paragraph.paragraph_format.space_before = Pt(12)
-                paragraph.paragraph_format.space_after = Pt(8)
-                paragraph.paragraph_format.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-                paragraph.paragraph_format.first_line_indent = Mm(0)  # Без отступа первой строки
-            
-            elif style_name == 'ВКР Обычный':
-                # Обычный текст
-                paragraph.paragraph_format.space_before = Pt(0)
-                paragraph.paragraph_format.space_after = Pt(8)
-                paragraph.paragraph_format.alignment = WD_PARAGRAPH_ALIGNMENT.JUSTIFY
-                paragraph.paragraph_format.first_line_indent = Mm(12.5)  # Отступ первой строки 1.25 см
-                
-                # Проверка на маркированный список
-                if paragraph.text.startswith('•'):
-                    paragraph.paragraph_format.first_line_indent = Mm(0)  # Без отступа первой строки
-                    paragraph.paragraph_format.left_indent = Mm(12.5)  # Отступ слева для списка
+            for name, value in self.paragraph_properties(paragraph, style_name, fmt).items():
+                setattr(paragraph.paragraph_format, name, value)
     
     def fix_font_properties(self):
         """Исправление свойств шрифта для всех элементов"""
         for paragraph in self.document.paragraphs:
+            fmt = self.STYLE_FORMATS.get(self.styles.paragraph_style_name(paragraph))
             for run in paragraph.runs:
+                # Фрагменты кода сохраняют моноширинный шрифт и размер
+                if run.font.name == CODE_FONT:
+                    continue
+
                 # Установка шрифта Times New Roman для всего текста
-                run.font.name = 'Times New Roman'
+                run.font.name = self.FONT_NAME
                 
                 # Установка размера шрифта в зависимости от стиля параграфа
-                style_name = paragraph.style.name
-                if style_name == 'ВКР Глава-Раздел':
-                    run.font.size = Pt(20)
-                    run.font.bold = True
-                elif style_name == 'ВКР Параграф':
-                    run.font.size = Pt(18)
+                run.font.size = fmt.font_size if fmt else self.FONT_SIZE
+                if fmt and fmt.bold:
                     run.font.bold = True
-                elif style_name == 'ВКР Пункт':
-                    run.font.size = Pt(16)
-                    run.font.bold = True
-                else:
-                    run.font.size = Pt(16)
-                    run.font.bold = False
     
     def fix_line_spacing(self):
         """Исправление межстрочных интервалов"""
         for paragraph in self.document.paragraphs:
+            # Листинги кода набираются с одинарным интервалом
+            if self.is_code_paragraph(paragraph):
+                continue
+
             # Установка межстрочного интервала 1.5 для всех параграфов
-            paragraph.paragraph_format.line_spacing = 1.5
+            paragraph.paragraph_format.line_spacing = self.LINE_SPACING
+
+    def normalize_styles(self) -> List[str]:
+        """
+        Запись оформления в определения стилей ВКР
+
+        :return: Имена стилей, которые есть в документе и были настроены
+        """
+        normalized = []
+        for style_name, fmt in self.STYLE_FORMATS.items():
+            if not self.styles.has(style_name):
+                continue
+
+            style = self.document.styles[style_name]
+            style.paragraph_format.space_before = fmt.space_before
+            style.paragraph_format.space_after = fmt.space_after
+            style.paragraph_format.alignment = fmt.alignment
+            style.paragraph_format.first_line_indent = fmt.first_line_indent
+            style.paragraph_format.line_spacing = self.LINE_SPACING
+            style.font.name = self.FONT_NAME
+            style.font.size = fmt.font_size
+            if fmt.bold is not None:
+                style.font.bold = fmt.bold
+            normalized.append(style_name)
+        # Итоговые свойства стилей изменились
+        self.styles.refresh()
+        return normalized
+
+    def strip_direct_formatting(self, normalized: List[str]):
+        """
+        Удаление прямого форматирования, совпадающего со стилем абзаца
+
+        Абзацы остальных стилей исправляются прямым форматированием, как в режиме 'direct'.
+        """
+        for paragraph in self.document.paragraphs:
+            style_name = self.styles.paragraph_style_name(paragraph)
+            if style_name not in normalized:
+                self._fix_paragraph_directly(paragraph)
+                continue
+
+            fmt = self.STYLE_FORMATS[style_name]
+            paragraph_format = paragraph.paragraph_format
+            code = self.is_code_paragraph(paragraph)
+            for name, value in self.paragraph_properties(paragraph, style_name, fmt).items():
+                # Значение, заданное стилем, из абзаца убирается
+                setattr(paragraph_format, name, None if value == getattr(fmt, name, None) else value)
+            if not code:
+                paragraph_format.line_spacing = None
+            _drop_empty(paragraph._p.pPr, ('w:spacing', 'w:ind'))
+
+            for run in paragraph.runs:
+                if run.font.name == CODE_FONT:
+                    continue
+                run.font.name = None
+                run.font.size = None
+                if fmt.bold and run.font.bold:
+                    run.font.bold = None
+                rPr = run._r.rPr
+                if rPr is not None:
+                    _drop_empty(rPr, ('w:rFonts',))
+                    if len(rPr) == 0 and not rPr.attrib:
+                        run._r.remove(rPr)
+
+    def _fix_paragraph_directly(self, paragraph):
+        """Прямое форматирование абзаца стиля, не относящегося к ВКР"""
+        if not self.is_code_paragraph(paragraph):
+            paragraph.paragraph_format.line_spacing = self.LINE_SPACING
+        for run in paragraph.runs:
+            if run.font.name == CODE_FONT:
+                continue
+            run.font.name = self.FONT_NAME
+            run.font.size = self.FONT_SIZE
     
     def fix_page_margins(self):
         """Исправление полей страницы"""
@@ -92,16 +215,33 @@ class DocumentSpacingFixer:
             section.top_margin = Mm(20)     # Верхнее поле 2 см
             section.bottom_margin = Mm(20)  # Нижнее поле 2 см
     
-    def fix_document_spacing(self):
-        """Применение всех исправлений к документу"""
-        self.fix_paragraph_spacing()
-        self.fix_font_properties()
-        self.fix_line_spacing()
+    def fix_document_spacing(self, save=True):
+        """
+        Применение всех исправлений к документу
+
+        :param save: Сохранить документ в document_path после исправлений
+        """
+        if self.mode == 'style':
+            self.strip_direct_formatting(self.normalize_styles())
+        else:
+            self.fix_paragraph_spacing()
+            self.fix_font_properties()
+            self.fix_line_spacing()
         self.fix_page_margins()
         
         # Сохранение исправленного документа
-        self.document.save(self.document_path)
-        print(f"Отступы и интервалы в документе {self.document_path} исправлены")
+        if save:
+            self.document.save(self.document_path)
+            print(f"Отступы и интервалы в документе {self.document_path} исправлены")
+
+def _drop_empty(parent, tags):
+    """Удаление дочерних элементов без атрибутов и содержимого"""
+    if parent is None:
+        return
+    for tag in tags:
+        child = parent.find(qn(tag))
+        if child is not None and not child.attrib and len(child) == 0:
+            parent.remove(child)
 
 def main():
     """Основная функция для запуска исправления отступов"""
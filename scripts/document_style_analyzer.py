@@ -1,11 +1,24 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import json
 import os
-from docx import Document
-from docx.shared import Pt, Mm
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT, WD_LINE_SPACING
-from docx.styles.style import _ParagraphStyle
+from typing import Any, Dict, List, Optional
+
+from docx.shared import Pt
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from docx.enum.style import WD_STYLE_TYPE
+
+from docx_fast_reader import StyleInfo
+from document_snapshot import open_document
+from style_registry import INHERITED_FIELDS, EffectiveStyle, StyleRegistry
+
+def _enum_name(enum, xml_value):
+    """Значение перечисления python-docx по значению атрибута XML (как в прежних отчетах)"""
+    try:
+        return str(enum.from_xml(xml_value))
+    except (KeyError, ValueError):
+        return xml_value
 
 class DocumentStyleAnalyzer:
     """
@@ -15,7 +28,11 @@ class DocumentStyleAnalyzer:
     def __init__(self, document_path):
         """Инициализация анализатора с путем к документу"""
         self.document_path = document_path
-        self.document = Document(document_path)
+        # Таблица стилей берется из снимка документа, общего с валидатором и экстрактором
+        with open_document(document_path) as reader:
+            self.styles = reader.styles
+        # Итоговые свойства стилей разрешаются по цепочкам basedOn один раз на стиль
+        self.registry = StyleRegistry(self.styles)
     
     def analyze_document_styles(self):
         """Полный анализ стилей документа"""
@@ -28,47 +45,49 @@ class DocumentStyleAnalyzer:
         }
         
         # Анализ всех стилей в документе
-        for style in self.document.styles:
+        for style in self.styles.by_id.values():
             try:
                 style_info = {
                     "имя": style.name,
-                    "тип": str(style.type),
+                    "тип": _enum_name(WD_STYLE_TYPE, style.type),
                 }
                 
-                # Безопасная проверка базового стиля
-                if hasattr(style, 'base_style') and style.base_style:
-                    style_info["базовый_стиль"] = style.base_style.name
-                else:
-                    style_info["базовый_стиль"] = "Нет"
+                # Базовый стиль
+                base_style = self.styles.by_id.get(style.based_on) if style.based_on else None
+                style_info["базовый_стиль"] = base_style.name if base_style is not None else "Нет"
                 
                 # Детальный анализ параграф-стилей
-                if style.type == 1:  # Paragraph style
-                    para_style = style
+                if style.type == 'paragraph':
+                    if style.line_spacing is None:
+                        line_spacing = "Не установлено"
+                    elif style.line_rule in (None, 'auto'):
+                        line_spacing = style.line_spacing
+                    else:
+                        line_spacing = Pt(style.line_spacing)
                     style_info.update({
-                        "выравнивание": str(para_style.paragraph_format.alignment) if para_style.paragraph_format.alignment else "Не установлено",
-                        "межстрочный_интервал": para_style.paragraph_format.line_spacing if para_style.paragraph_format.line_spacing else "Не установлено",
-                        "отступ_первой_строки": str(para_style.paragraph_format.first_line_indent) if para_style.paragraph_format.first_line_indent else "Нет",
-                        "интервал_перед": str(para_style.paragraph_format.space_before) if para_style.paragraph_format.space_before else "Нет",
-                        "интервал_после": str(para_style.paragraph_format.space_after) if para_style.paragraph_format.space_after else "Нет",
+                        "выравнивание": _enum_name(WD_PARAGRAPH_ALIGNMENT, style.alignment) if style.alignment else "Не установлено",
+                        "межстрочный_интервал": line_spacing,
+                        "отступ_первой_строки": str(Pt(style.first_line_indent)) if style.first_line_indent else "Нет",
+                        "интервал_перед": str(Pt(style.space_before)) if style.space_before else "Нет",
+                        "интервал_после": str(Pt(style.space_after)) if style.space_after else "Нет",
                     })
                     
                     # Параметры шрифта
-                    if hasattr(para_style, 'font') and para_style.font:
-                        style_info.update({
-                            "шрифт": para_style.font.name,
-                            "размер_шрифта": str(para_style.font.size),
-                            "жирный": para_style.font.bold,
-                            "курсив": para_style.font.italic,
-                        })
+                    style_info.update({
+                        "шрифт": style.font_name,
+                        "размер_шрифта": str(Pt(style.font_size)) if style.font_size is not None else str(None),
+                        "жирный": style.bold,
+                        "курсив": style.italic,
+                    })
                     
                     style_report["параграф_стили"].append(style_info)
                 
                 # Для других типов стилей
-                elif style.type == 2:  # Character style
+                elif style.type == 'character':
                     style_report["символ_стили"].append(style_info)
-                elif style.type == 3:  # Table style
+                elif style.type == 'table':
                     style_report["таблица_стили"].append(style_info)
-                elif style.type == 4:  # Numbering style
+                elif style.type == 'numbering':
                     style_report["нумерация_стили"].append(style_info)
                 else:
                     style_report["общие_стили"].append(style_info)
@@ -78,39 +97,88 @@ class DocumentStyleAnalyzer:
         
         return style_report
     
-    def generate_style_report(self):
-        """Генерация подробного текстового отчета о стилях"""
-        styles = self.analyze_document_styles()
-        
-        report = "🔍 Полный анализ стилей документа\n\n"
-        
-        # Параграф стили
-        report += "### Стили параграфов:\n"
-        for style in styles["параграф_стили"]:
-            report += f"#### {style['имя']}\n"
-            report += f"- Базовый стиль: {style['базовый_стиль']}\n"
-            report += f"- Выравнивание: {style.get('выравнивание', 'Не указано')}\n"
-            report += f"- Межстрочный интервал: {style.get('межстрочный_интервал', 'Не указано')}\n"
-            report += f"- Отступ первой строки: {style.get('отступ_первой_строки', 'Нет')}\n"
-            report += f"- Интервал перед: {style.get('интервал_перед', 'Нет')}\n"
-            report += f"- Интервал после: {style.get('интервал_после', 'Нет')}\n"
-            
-            # Параметры шрифта
-            if 'шрифт' in style:
-                report += f"- Шрифт: {style['шрифт']}\n"
-                report += f"- Размер шрифта: {style.get('размер_шрифта', 'Не указан')}\n"
-                report += f"- Жирный: {style.get('жирный', False)}\n"
-                report += f"- Курсив: {style.get('курсив', False)}\n"
-            
-            report += "\n"
-        
-        # Сохранение отчета
-        report_path = os.path.join(os.path.dirname(self.document_path), "document_style_report.md")
+    def effective_styles(self) -> List[EffectiveStyle]:
+        """Итоговые свойства всех стилей абзацев (с учетом базовых стилей и docDefaults)"""
+        return [
+            self.registry.resolve(style.style_id)
+            for style in self.styles.by_id.values() if style.type == 'paragraph'
+        ]
+
+    def _base_chain(self, style: StyleInfo) -> List[str]:
+        """Имена базовых стилей от ближайшего к корню"""
+        chain = []
+        seen = {style.style_id}
+        base = self.styles.by_id.get(style.based_on) if style.based_on else None
+        while base is not None and base.style_id not in seen:
+            seen.add(base.style_id)
+            chain.append(base.name)
+            base = self.styles.by_id.get(base.based_on) if base.based_on else None
+        return chain
+
+    def style_report(self) -> Dict[str, Any]:
+        """
+        Отчет о стилях в виде JSON-совместимого словаря.
+
+        Для каждого стиля — цепочка базовых стилей, свойства, заданные в самом
+        стиле, и итоговые свойства; размеры и интервалы — в пунктах, выравнивание —
+        значение w:jc.
+        """
+        defaults = self.registry.resolve(None)
+        styles = []
+        for style in self.styles.by_id.values():
+            effective = self.registry.resolve(style.style_id)
+            styles.append({
+                'имя': style.name,
+                'идентификатор': style.style_id,
+                'тип': style.type,
+                'по_умолчанию': style.is_default,
+                'базовые_стили': self._base_chain(style),
+                'заданные': {field: getattr(style, field) for field in INHERITED_FIELDS
+                             if getattr(style, field) is not None},
+                'итоговые': {field: getattr(effective, field) for field in INHERITED_FIELDS},
+            })
+        return {
+            'документ': self.document_path,
+            'свойства_по_умолчанию': {field: getattr(defaults, field) for field in INHERITED_FIELDS},
+            'стили': styles,
+        }
+
+    def style_table(self) -> str:
+        """Компактная таблица итоговых свойств стилей абзацев"""
+        def value(item, digits=''):
+            if item is None:
+                return '—'
+            if isinstance(item, bool):
+                return 'да' if item else 'нет'
+            return f'{item:{digits}}' if digits else str(item)
+
+        lines = [
+            f"{'стиль':<28} {'шрифт':<18} {'пт':>5} {'ж':>3} {'к':>3} {'выравн.':<8} "
+            f"{'интервал':>8} {'перед':>6} {'после':>6} {'отступ':>6}"
+        ]
+        for effective in self.effective_styles():
+            lines.append(
+                f"{effective.name[:28]:<28} {value(effective.font_name)[:18]:<18} {value(effective.font_size, 'g'):>5} "
+                f"{value(effective.bold):>3} {value(effective.italic):>3} {value(effective.alignment):<8} "
+                f"{value(effective.line_spacing, 'g'):>8} {value(effective.space_before, 'g'):>6} "
+                f"{value(effective.space_after, 'g'):>6} {value(effective.first_line_indent, 'g'):>6}"
+            )
+        return '\n'.join(lines)
+
+    def generate_style_report(self, report_path: Optional[str] = None) -> str:
+        """
+        Сохранение отчета о стилях в JSON и таблица итоговых свойств
+
+        :param report_path: Файл отчета (по умолчанию document_style_report.json рядом с документом)
+        :return: Текст таблицы итоговых свойств стилей абзацев
+        """
+        if report_path is None:
+            report_path = os.path.join(os.path.dirname(self.document_path), "document_style_report.json")
         with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(report)
-        
+            json.dump(self.style_report(), f, ensure_ascii=False, indent=2)
+
         print(f"📄 Отчет о стилях сохранен в {report_path}")
-        return report
+        return self.style_table()
 
 def main():
     """Основная функция для запуска анализа стилей"""
@@ -123,7 +191,7 @@ def main():
     
     # Создание объекта для анализа стилей
     analyzer = DocumentStyleAnalyzer(document_path)
-    analyzer.generate_style_report()
+    print(analyzer.generate_style_report())
 
 if __name__ == '__main__':
     main()
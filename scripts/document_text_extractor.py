@@ -2,8 +2,13 @@
 # -*- coding: utf-8 -*-
 
 import os
-import docx
 import json
+from typing import Any, Dict, Iterator
+
+from document_snapshot import open_document, document_hash
+
+# Каталог отчетов по умолчанию
+REPORTS_DIR = '/home/user/study/diplom/reports/full_text'
 
 class DocumentTextExtractor:
     """
@@ -11,14 +16,33 @@ class DocumentTextExtractor:
     с сохранением структуры и метаданных
     """
     
-    def __init__(self, document_path):
+    # Роли абзацев в структуре документа по стилю
+    TITLE_STYLES = ("Title", "ВКР Глава-Раздел")
+    CHAPTER_STYLES = ("Heading 1", "ВКР Параграф")
+    SECTION_STYLES = ("Heading 2", "ВКР Пункт")
+    BODY_STYLES = ("Normal", "ВКР Обычный")
+
+    def __init__(self, document_path, reports_dir=REPORTS_DIR):
         """
         Инициализация экстрактора
         
         :param document_path: Путь к документу Word
+        :param reports_dir: Каталог, в который сохраняются извлеченные тексты
         """
         self.document_path = document_path
-        self.document = docx.Document(document_path)
+        self.reports_dir = reports_dir
+        # Снимок документа (документ разбирается один раз для всех инструментов анализа)
+        self.reader = open_document(document_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Закрытие снимка документа"""
+        self.reader.close()
     
     def extract_full_text(self):
         """
@@ -27,7 +51,7 @@ class DocumentTextExtractor:
         :return: Полный текст документа
         """
         full_text = []
-        for paragraph in self.document.paragraphs:
+        for paragraph in self.reader.iter_paragraphs():
             if paragraph.text.strip():
                 full_text.append(paragraph.text)
         
@@ -47,20 +71,20 @@ class DocumentTextExtractor:
         current_chapter = None
         current_section = None
         
-        for paragraph in self.document.paragraphs:
+        for paragraph in self.reader.iter_paragraphs():
             # Пропускаем пустые параграфы
             if not paragraph.text.strip():
                 continue
             
             # Определение стиля параграфа
-            style_name = paragraph.style.name if paragraph.style else "Normal"
+            style_name = paragraph.style_name or "Normal"
             
             # Обработка заголовков
-            if style_name in ["Title", "ВКР Глава-Раздел"]:
+            if style_name in self.TITLE_STYLES:
                 document_structure["заголовок"] = paragraph.text
             
             # Обработка глав
-            elif style_name in ["Heading 1", "ВКР Параграф"]:
+            elif style_name in self.CHAPTER_STYLES:
                 current_chapter = {
                     "название": paragraph.text,
                     "разделы": []
@@ -69,7 +93,7 @@ class DocumentTextExtractor:
                 current_section = None
             
             # Обработка разделов
-            elif style_name in ["Heading 2", "ВКР Пункт"]:
+            elif style_name in self.SECTION_STYLES:
                 if current_chapter:
                     current_section = {
                         "название": paragraph.text,
@@ -78,7 +102,7 @@ class DocumentTextExtractor:
                     current_chapter["разделы"].append(current_section)
             
             # Обработка основного текста
-            elif style_name in ["Normal", "ВКР Обычный"]:
+            elif style_name in self.BODY_STYLES:
                 if current_section:
                     current_section["параграфы"].append(paragraph.text)
                 elif current_chapter:
@@ -92,12 +116,15 @@ class DocumentTextExtractor:
         
         :return: Словарь с метаданными
         """
+        styles = [paragraph.style_name for paragraph in self.reader.iter_paragraphs() if paragraph.style_name]
+        walker = self.reader.walker
+
         metadata = {
             "путь_файла": self.document_path,
-            "количество_параграфов": len(self.document.paragraphs),
-            "количество_таблиц": len(self.document.tables),
-            "количество_изображений": len(self.document.inline_shapes),
-            "стили": [paragraph.style.name for paragraph in self.document.paragraphs if paragraph.style]
+            "количество_параграфов": walker.paragraph_count,
+            "количество_таблиц": walker.table_count,
+            "количество_изображений": walker.inline_shape_count,
+            "стили": styles
         }
         
         return metadata
@@ -107,9 +134,9 @@ class DocumentTextExtractor:
         Сохранение извлеченного текста в файл
         
         :param output_format: Формат вывода (txt, json)
+        :return: Путь к сохраненному файлу
         """
-        # Базовый путь для сохранения отчетов
-        reports_dir = '/home/user/study/diplom/reports/full_text'
+        reports_dir = self.reports_dir
         os.makedirs(reports_dir, exist_ok=True)
         
         if output_format == 'txt':
@@ -132,6 +159,132 @@ class DocumentTextExtractor:
                 json.dump(structured_text, f, ensure_ascii=False, indent=2)
             print(f"Структурированный текст сохранен в {output_path}")
 
+        else:
+            raise ValueError(f"Неизвестный формат вывода: {output_format}")
+
+        return output_path
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """
+        Записи непустых абзацев в порядке документа за один проход
+
+        Каждая запись содержит роль абзаца, его стиль, текущие заголовок, главу
+        и раздел (как в extract_structured_text), номер абзаца, текст и смещения
+        текста в полном тексте документа (в символах; абзацы разделяются переводом
+        строки, как в extract_full_text).
+        """
+        title = chapter = section = None
+        offset = 0
+        first = True
+
+        for paragraph in self.reader.iter_paragraphs():
+            # Пропускаем пустые параграфы
+            if not paragraph.text.strip():
+                continue
+
+            style_name = paragraph.style_name or "Normal"
+            if style_name in self.TITLE_STYLES:
+                role = "заголовок"
+                title = paragraph.text
+                chapter = section = None
+            elif style_name in self.CHAPTER_STYLES:
+                role = "глава"
+                chapter = paragraph.text
+                section = None
+            elif style_name in self.SECTION_STYLES:
+                role = "раздел"
+                section = paragraph.text
+            elif style_name in self.BODY_STYLES:
+                role = "параграф"
+            else:
+                role = "прочее"
+
+            if not first:
+                offset += 1
+            first = False
+
+            yield {
+                "тип": role,
+                "абзац": paragraph.index,
+                "стиль": style_name,
+                "заголовок": title,
+                "глава": chapter,
+                "раздел": section,
+                "начало": offset,
+                "конец": offset + len(paragraph.text),
+                "текст": paragraph.text,
+            }
+            offset += len(paragraph.text)
+
+    def metadata_counters(self, written: int) -> Dict[str, Any]:
+        """Счетчики документа после прохода iter_records"""
+        walker = self.reader.walker
+        return {
+            "путь_файла": self.document_path,
+            "количество_параграфов": walker.paragraph_count,
+            "количество_таблиц": walker.table_count,
+            "количество_изображений": walker.inline_shape_count,
+            "непустых_параграфов": written,
+        }
+
+    def save_streaming(self) -> Dict[str, Any]:
+        """
+        Потоковое извлечение за один проход по документу
+
+        Абзацы по мере чтения дописываются в full_text.txt и в structured_text.jsonl
+        (одна JSON-запись iter_records на строку), поэтому расход памяти не зависит
+        от размера документа, а результат можно читать построчно, не дожидаясь конца
+        файла. Последняя запись с типом "метаданные" содержит счетчики документа.
+
+        :return: Метаданные документа (как в последней записи)
+        """
+        os.makedirs(self.reports_dir, exist_ok=True)
+        text_path = os.path.join(self.reports_dir, 'full_text.txt')
+        records_path = os.path.join(self.reports_dir, 'structured_text.jsonl')
+
+        written = 0
+        with open(text_path, 'w', encoding='utf-8') as text_file, \
+                open(records_path, 'w', encoding='utf-8') as records_file:
+            for record in self.iter_records():
+                # Абзацы в full_text.txt разделяются переводом строки, как в extract_full_text
+                if written:
+                    text_file.write("\n")
+                text_file.write(record["текст"])
+                records_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                written += 1
+
+            metadata = self.metadata_counters(written)
+            records_file.write(json.dumps({"тип": "метаданные", **metadata}, ensure_ascii=False) + "\n")
+
+        print(f"Полный текст сохранен в {text_path}")
+        print(f"Структурированный текст сохранен в {records_path}")
+        return metadata
+
+    def build_hash(self) -> str:
+        """SHA-256 файла документа — ключ сборки в поисковом индексе"""
+        return document_hash(self.document_path)
+
+    def index_text(self, search_index, build_hash=None) -> bool:
+        """
+        Добавление абзацев документа в полнотекстовый индекс (TextSearchIndex)
+
+        :param search_index: Открытый индекс
+        :param build_hash: Ключ сборки; по умолчанию хэш файла документа
+        :return: False, если сборка с таким ключом уже проиндексирована
+        """
+        return search_index.add_build(build_hash or self.build_hash(), self.document_path, self.iter_records())
+
+def iter_text_records(records_path):
+    """
+    Построчное чтение записей structured_text.jsonl
+
+    :param records_path: Путь к файлу, созданному DocumentTextExtractor.save_streaming
+    """
+    with open(records_path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
 def main():
     """Основная функция для запуска извлечения текста"""
     document_path = '/home/user/study/diplom/diploma.docx'
@@ -142,11 +295,9 @@ def main():
         return
     
     # Создание объекта для извлечения текста
-    extractor = DocumentTextExtractor(document_path)
-    
-    # Извлечение и сохранение текста в разных форматах
-    extractor.save_text_to_file('txt')
-    extractor.save_text_to_file('json')
+    with DocumentTextExtractor(document_path) as extractor:
+        # Полный текст и структурированные записи за один проход по документу
+        extractor.save_streaming()
 
 if __name__ == '__main__':
     main()
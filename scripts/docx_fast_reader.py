@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import posixpath
+import zipfile
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from lxml import etree
+from docx.styles import BabelFish
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+WP_NS = 'http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing'
+PACKAGE_RELS_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+OFFICE_DOCUMENT_RELTYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+STYLES_RELTYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles'
+
+def _w(tag: str) -> str:
+    return f'{{{W_NS}}}{tag}'
+
+W_VAL = _w('val')
+W_BODY = _w('body')
+W_P = _w('p')
+W_R = _w('r')
+W_T = _w('t')
+W_TBL = _w('tbl')
+W_SDT = _w('sdt')
+W_PPR = _w('pPr')
+W_RPR = _w('rPr')
+W_SECTPR = _w('sectPr')
+W_HYPERLINK = _w('hyperlink')
+W_BR = _w('br')
+W_TYPE = _w('type')
+WP_INLINE = f'{{{WP_NS}}}inline'
+
+# Элементы фрагмента текста и их текстовое представление (как в python-docx)
+_RUN_TEXT = {
+    _w('tab'): '\t',
+    _w('ptab'): '\t',
+    _w('cr'): '\n',
+    _w('noBreakHyphen'): '-',
+}
+_OFF_VALUES = ('0', 'false', 'off')
+
+class StyleInfo(NamedTuple):
+    """Стиль из styles.xml со свойствами, заданными непосредственно в нем"""
+    style_id: str
+    name: str
+    type: str                          # paragraph, character, table, numbering
+    based_on: Optional[str]
+    is_default: bool
+    alignment: Optional[str]           # значение w:jc: both, center, left, ...
+    line_spacing: Optional[float]      # множитель при line_rule auto, иначе пункты
+    line_rule: Optional[str]
+    space_before: Optional[float]      # здесь и далее — в пунктах
+    space_after: Optional[float]
+    first_line_indent: Optional[float]
+    left_indent: Optional[float]
+    font_name: Optional[str]
+    font_size: Optional[float]
+    bold: Optional[bool]
+    italic: Optional[bool]
+
+class RunRecord(NamedTuple):
+    """Фрагмент текста с непосредственно заданными свойствами шрифта"""
+    text: str
+    font_name: Optional[str]
+    font_size: Optional[float]         # в пунктах
+    bold: Optional[bool]
+    italic: Optional[bool]
+
+class ParagraphRecord(NamedTuple):
+    """Абзац тела документа с непосредственно заданными свойствами"""
+    index: int
+    style_id: Optional[str]
+    style_name: Optional[str]
+    text: str
+    alignment: Optional[str]
+    line_spacing: Optional[float]
+    line_rule: Optional[str]
+    space_before: Optional[float]
+    space_after: Optional[float]
+    first_line_indent: Optional[float]
+    left_indent: Optional[float]
+    page_break: bool
+    runs: Tuple[RunRecord, ...]
+
+class SectionRecord(NamedTuple):
+    """Параметры страницы раздела, в пунктах"""
+    page_width: Optional[float]
+    page_height: Optional[float]
+    left_margin: Optional[float]
+    right_margin: Optional[float]
+    top_margin: Optional[float]
+    bottom_margin: Optional[float]
+
+def _twips_to_pt(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return int(value) / 20
+    except ValueError:
+        return None
+
+def _on_off(element) -> Optional[bool]:
+    if element is None:
+        return None
+    return element.get(W_VAL) not in _OFF_VALUES
+
+def _paragraph_format(ppr) -> Tuple:
+    """(alignment, line_spacing, line_rule, space_before, space_after, first_line_indent, left_indent)"""
+    if ppr is None:
+        return None, None, None, None, None, None, None
+
+    jc = ppr.find(_w('jc'))
+    alignment = jc.get(W_VAL) if jc is not None else None
+
+    line_spacing = line_rule = space_before = space_after = None
+    spacing = ppr.find(_w('spacing'))
+    if spacing is not None:
+        space_before = _twips_to_pt(spacing.get(_w('before')))
+        space_after = _twips_to_pt(spacing.get(_w('after')))
+        line = spacing.get(_w('line'))
+        line_rule = spacing.get(_w('lineRule'))
+        if line is not None:
+            if line_rule in (None, 'auto'):
+                line_spacing = int(line) / 240
+            else:
+                line_spacing = _twips_to_pt(line)
+
+    first_line_indent = left_indent = None
+    ind = ppr.find(_w('ind'))
+    if ind is not None:
+        left_indent = _twips_to_pt(ind.get(_w('left'), ind.get(_w('start'))))
+        hanging = _twips_to_pt(ind.get(_w('hanging')))
+        first_line_indent = -hanging if hanging is not None else _twips_to_pt(ind.get(_w('firstLine')))
+
+    return alignment, line_spacing, line_rule, space_before, space_after, first_line_indent, left_indent
+
+def _run_format(rpr) -> Tuple:
+    """(font_name, font_size, bold, italic)"""
+    if rpr is None:
+        return None, None, None, None
+
+    fonts = rpr.find(_w('rFonts'))
+    font_name = fonts.get(_w('ascii')) if fonts is not None else None
+    sz = rpr.find(_w('sz'))
+    font_size = int(sz.get(W_VAL)) / 2 if sz is not None else None
+    return font_name, font_size, _on_off(rpr.find(_w('b'))), _on_off(rpr.find(_w('i')))
+
+def _section_record(sect_pr) -> SectionRecord:
+    size = sect_pr.find(_w('pgSz'))
+    margins = sect_pr.find(_w('pgMar'))
+
+    def attr(element, name):
+        return _twips_to_pt(element.get(_w(name))) if element is not None else None
+
+    return SectionRecord(
+        attr(size, 'w'), attr(size, 'h'),
+        attr(margins, 'left'), attr(margins, 'right'),
+        attr(margins, 'top'), attr(margins, 'bottom'),
+    )
+
+class StyleTable:
+    """Таблица стилей документа: поиск по идентификатору и по имени"""
+
+    def __init__(self, styles: Dict[str, StyleInfo], doc_defaults: Optional[StyleInfo] = None):
+        """
+        :param styles: Стили по идентификатору
+        :param doc_defaults: Свойства по умолчанию документа (w:docDefaults)
+        """
+        self.by_id = styles
+        self.doc_defaults = doc_defaults
+        self.by_name = {style.name: style for style in styles.values()}
+        self.default_paragraph_style = next(
+            (style for style in styles.values() if style.type == 'paragraph' and style.is_default),
+            None,
+        )
+
+    @classmethod
+    def from_element(cls, styles_element) -> 'StyleTable':
+        """Построение таблицы по корневому элементу w:styles"""
+        styles = {}
+        doc_defaults = None
+        if styles_element is not None:
+            for style in styles_element.iterchildren(_w('style')):
+                styles[style.get(_w('styleId'))] = cls._style_info(style)
+            defaults = styles_element.find(_w('docDefaults'))
+            if defaults is not None:
+                doc_defaults = StyleInfo(
+                    '', 'docDefaults', 'paragraph', None, False,
+                    *_paragraph_format(defaults.find(f"{_w('pPrDefault')}/{W_PPR}")),
+                    *_run_format(defaults.find(f"{_w('rPrDefault')}/{W_RPR}")),
+                )
+        return cls(styles, doc_defaults)
+
+    @staticmethod
+    def _style_info(style) -> StyleInfo:
+        name = style.find(_w('name'))
+        based_on = style.find(_w('basedOn'))
+        return StyleInfo(
+            style.get(_w('styleId')),
+            # Имена встроенных стилей в том же виде, что и в python-docx ('heading 1' -> 'Heading 1')
+            BabelFish.internal2ui(name.get(W_VAL)) if name is not None else style.get(_w('styleId')),
+            style.get(_w('type'), 'paragraph'),
+            based_on.get(W_VAL) if based_on is not None else None,
+            style.get(_w('default')) in ('1', 'true', 'on'),
+            *_paragraph_format(style.find(W_PPR)),
+            *_run_format(style.find(W_RPR)),
+        )
+
+    def paragraph_style(self, style_id: Optional[str]) -> Optional[StyleInfo]:
+        """Стиль абзаца по значению w:pStyle (как в python-docx: иначе стиль по умолчанию)"""
+        style = self.by_id.get(style_id) if style_id is not None else None
+        if style is None or style.type != 'paragraph':
+            return self.default_paragraph_style
+        return style
+
+class BodyWalker:
+    """
+    Разбор элементов тела документа в компактные записи.
+
+    Используется как при потоковом чтении архива, так и для документа,
+    уже открытого в python-docx.
+    """
+
+    def __init__(self, styles: StyleTable):
+        self.styles = styles
+        self.paragraph_count = 0
+        self.table_count = 0
+        self.inline_shape_count = 0
+
+    def _runs(self, p) -> Tuple[Tuple[RunRecord, ...], bool]:
+        runs = []
+        page_break = False
+        for child in p.iterchildren(W_R, W_HYPERLINK):
+            for r in ([child] if child.tag == W_R else child.iterchildren(W_R)):
+                parts = []
+                for item in r.iterchildren():
+                    tag = item.tag
+                    if tag == W_T:
+                        parts.append(item.text or '')
+                    elif tag == W_BR:
+                        br_type = item.get(W_TYPE)
+                        if br_type == 'page':
+                            page_break = True
+                        elif br_type in (None, 'textWrapping'):
+                            parts.append('\n')
+                    elif tag in _RUN_TEXT:
+                        parts.append(_RUN_TEXT[tag])
+                runs.append(RunRecord(''.join(parts), *_run_format(r.find(W_RPR))))
+        return tuple(runs), page_break
+
+    def paragraph(self, p) -> ParagraphRecord:
+        """Запись абзаца w:p"""
+        ppr = p.find(W_PPR)
+        style_id = None
+        if ppr is not None:
+            pstyle = ppr.find(_w('pStyle'))
+            if pstyle is not None:
+                style_id = pstyle.get(W_VAL)
+        style = self.styles.paragraph_style(style_id)
+
+        runs, page_break = self._runs(p)
+        if ppr is not None and _on_off(ppr.find(_w('pageBreakBefore'))):
+            page_break = True
+
+        self.inline_shape_count += sum(1 for _ in p.iter(WP_INLINE))
+        record = ParagraphRecord(
+            self.paragraph_count,
+            style_id,
+            style.name if style is not None else None,
+            ''.join(run.text for run in runs),
+            *_paragraph_format(ppr),
+            page_break,
+            runs,
+        )
+        self.paragraph_count += 1
+        return record
+
+    def element(self, element) -> List[Union[ParagraphRecord, SectionRecord]]:
+        """
+        Записи для элемента верхнего уровня тела документа:
+        абзац и, если им заканчивается раздел, параметры раздела
+        """
+        tag = element.tag
+        if tag == W_P:
+            records = [self.paragraph(element)]
+            ppr = element.find(W_PPR)
+            sect_pr = ppr.find(W_SECTPR) if ppr is not None else None
+            if sect_pr is not None:
+                records.append(_section_record(sect_pr))
+            return records
+        if tag == W_SECTPR:
+            return [_section_record(element)]
+        if tag == W_TBL:
+            self.table_count += 1
+        self.inline_shape_count += sum(1 for _ in element.iter(WP_INLINE))
+        return []
+
+class FastDocxReader:
+    """
+    Быстрое чтение документа Word только для анализа.
+
+    word/document.xml разбирается потоково (iterparse) прямо из архива;
+    обработанные элементы сразу удаляются, поэтому память не зависит
+    от размера документа. Вместо объектов python-docx выдаются компактные
+    записи абзацев, фрагментов текста и разделов.
+    """
+
+    def __init__(self, document_path: str):
+        """
+        :param document_path: Путь к документу Word
+        """
+        self.document_path = document_path
+        self._styles: Optional[StyleTable] = None
+        self._parts: Optional[Tuple[str, Optional[str]]] = None
+        self.walker: Optional[BodyWalker] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Архив открывается только на время чтения, освобождать нечего (интерфейс DocumentSnapshot)"""
+
+    @staticmethod
+    def _relationship_target(zf: zipfile.ZipFile, rels_path: str, reltype: str) -> Optional[str]:
+        try:
+            rels = etree.fromstring(zf.read(rels_path))
+        except KeyError:
+            return None
+        for rel in rels.iterchildren(f'{{{PACKAGE_RELS_NS}}}Relationship'):
+            if rel.get('Type') == reltype:
+                return rel.get('Target')
+        return None
+
+    def _part_names(self, zf: zipfile.ZipFile) -> Tuple[str, Optional[str]]:
+        """Имена частей документа и стилей по связям пакета"""
+        if self._parts is None:
+            target = self._relationship_target(zf, '_rels/.rels', OFFICE_DOCUMENT_RELTYPE)
+            document_part = target.lstrip('/') if target else 'word/document.xml'
+
+            base, name = posixpath.split(document_part)
+            styles_target = self._relationship_target(
+                zf, posixpath.join(base, '_rels', f'{name}.rels'), STYLES_RELTYPE
+            )
+            styles_part = posixpath.normpath(posixpath.join(base, styles_target)) if styles_target else None
+            self._parts = (document_part, styles_part)
+        return self._parts
+
+    @property
+    def styles(self) -> StyleTable:
+        """Таблица стилей документа (styles.xml читается один раз)"""
+        if self._styles is None:
+            with zipfile.ZipFile(self.document_path) as zf:
+                _, styles_part = self._part_names(zf)
+                root = None
+                if styles_part is not None and styles_part in zf.namelist():
+                    root = etree.fromstring(zf.read(styles_part))
+                self._styles = StyleTable.from_element(root)
+        return self._styles
+
+    def iter_elements(self, walker: Optional[BodyWalker] = None) -> Iterator[Union[ParagraphRecord, SectionRecord]]:
+        """
+        Абзацы и разделы тела документа в порядке следования
+
+        :param walker: Обходчик, в котором накапливаются счетчики; по умолчанию новый
+        """
+        if walker is None:
+            walker = BodyWalker(self.styles)
+        self.walker = walker
+
+        with zipfile.ZipFile(self.document_path) as zf:
+            document_part, _ = self._part_names(zf)
+            with zf.open(document_part) as stream:
+                for _, element in etree.iterparse(stream, events=('end',), tag=(W_P, W_TBL, W_SDT, W_SECTPR)):
+                    parent = element.getparent()
+                    if parent is None or parent.tag != W_BODY:
+                        continue
+
+                    yield from walker.element(element)
+
+                    # Освобождаем разобранный элемент и все предыдущие элементы тела
+                    element.clear()
+                    while element.getprevious() is not None:
+                        del parent[0]
+
+    def iter_paragraphs(self) -> Iterator[ParagraphRecord]:
+        """Абзацы тела документа"""
+        for record in self.iter_elements():
+            if isinstance(record, ParagraphRecord):
+                yield record
+
+    def sections(self) -> List[SectionRecord]:
+        """Параметры всех разделов документа"""
+        return [record for record in self.iter_elements() if isinstance(record, SectionRecord)]
+
+def iter_document_elements(document, walker: Optional[BodyWalker] = None) -> Iterator[Union[ParagraphRecord, SectionRecord]]:
+    """
+    Те же записи для документа, уже открытого в python-docx (например, в конвейере
+    format_diploma.py), без создания объектов-оберток python-docx
+
+    :param document: Документ python-docx
+    :param walker: Обходчик, в котором накапливаются счетчики; по умолчанию новый
+    """
+    if walker is None:
+        walker = BodyWalker(StyleTable.from_element(document.styles.element))
+    for element in document.element.body.iterchildren():
+        yield from walker.element(element)
@@ -1,15 +1,34 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
 import os
 import subprocess
 import time
 
+from build_pipeline import BuildError, build_diploma
+from document_compactor import print_compaction_stats
+from diploma_validator import print_validation_results
+from diploma_watch import DiplomaWatcher
+from build_tracing import BuildTracer
+from post_build_analysis import print_post_build_analysis
+
+DIPLOMA_DIR = "/home/user/study/diplom"
+CHAPTERS_DIR = os.path.join(DIPLOMA_DIR, "chapters")
+OUTPUT_PATH = os.path.join(DIPLOMA_DIR, "diploma.docx")
+TEMPLATE_PATH = "/home/user/Downloads/vkr-2024.docx"
+SCRIPTS_DIR = os.path.join(DIPLOMA_DIR, "scripts")
+CACHE_DIR = os.path.join(DIPLOMA_DIR, ".diploma_cache")
+TRACE_PATH = os.path.join(DIPLOMA_DIR, "reports", "build_trace.json")
+PROFILE_DIR = os.path.join(DIPLOMA_DIR, "reports", "profiles")
+REPORTS_DIR = os.path.join(DIPLOMA_DIR, "reports", "full_text")
+SCHEMA_PATH = os.path.join(DIPLOMA_DIR, "diploma_schema.md")
+
 def run_formatter():
     """Запуск основного форматера диплома"""
     print("Запуск форматирования диплома...")
-    formatter_script = "/home/user/study/diplom/scripts/diploma_formatter.py"
-    
+    formatter_script = os.path.join(SCRIPTS_DIR, "diploma_formatter.py")
+
     try:
         subprocess.run(["python3", formatter_script], check=True)
         print("Основное форматирование завершено успешно")
@@ -21,8 +40,8 @@ def run_formatter():
 def run_spacing_fixer():
     """Запуск исправления отступов и интервалов"""
     print("Запуск исправления отступов и интервалов...")
-    fixer_script = "/home/user/study/diplom/scripts/document_spacing_fixer.py"
-    
+    fixer_script = os.path.join(SCRIPTS_DIR, "document_spacing_fixer.py")
+
     try:
         subprocess.run(["python3", fixer_script], check=True)
         print("Исправление отступов завершено успешно")
@@ -34,8 +53,8 @@ def run_spacing_fixer():
 def run_validator():
     """Запуск валидатора диплома"""
     print("Запуск валидации диплома...")
-    validator_script = "/home/user/study/diplom/scripts/diploma_validator.py"
-    
+    validator_script = os.path.join(SCRIPTS_DIR, "diploma_validator.py")
+
     try:
         subprocess.run(["python3", validator_script], check=True)
         print("Валидация завершена")
@@ -44,31 +63,179 @@ def run_validator():
         print(f"Ошибка при валидации: {e}")
         return False
 
-def main():
-    """Основная функция для запуска всего процесса форматирования"""
-    print("=== Начало процесса форматирования диплома ===")
-    
+def run_subprocess_pipeline():
+    """Последовательный запуск этапов отдельными процессами (прежний режим)"""
     # Шаг 1: Основное форматирование
     if not run_formatter():
         print("Процесс остановлен из-за ошибки в основном форматировании")
-        return
-    
+        return False
+
     # Пауза для завершения операций с файлом
     time.sleep(1)
-    
+
     # Шаг 2: Исправление отступов и интервалов
     if not run_spacing_fixer():
         print("Процесс остановлен из-за ошибки в исправлении отступов")
-        return
-    
+        return False
+
     # Пауза для завершения операций с файлом
     time.sleep(1)
-    
+
     # Шаг 3: Валидация результата
     run_validator()
-    
+    return True
+
+def run_pipeline(chapters_dir=CHAPTERS_DIR, output_path=OUTPUT_PATH, template_path=TEMPLATE_PATH,
+                 cache_dir=CACHE_DIR, workers=1, backend="docx", formatting="direct",
+                 compact=False, tracer=None, analysis=False, reports_dir=REPORTS_DIR,
+                 schema_path=SCHEMA_PATH):
+    """
+    Все этапы в одном процессе над одним документом в памяти
+    (build_pipeline.build_diploma; те же этапы у режима наблюдения и пакетной сборки).
+
+    Шаблон загружается один раз, документ проходит через форматер,
+    исправление отступов и валидацию и записывается на диск один раз в конце.
+    Неизмененные главы берутся из кэша фрагментов в cache_dir (None — без кэша),
+    остальные при workers > 1 конвертируются параллельно в пуле процессов.
+    При backend="stream" форматер сам пишет документ на диск по мере конвертации,
+    и исправление отступов с валидацией работают над прочитанным с диска файлом.
+    При formatting="style" шрифты и отступы задаются в стилях ВКР, а не в каждом
+    абзаце и фрагменте текста. При compact=True перед исправлением отступов соседние
+    фрагменты с одинаковым оформлением объединяются (DocumentCompactor).
+    Если передан tracer (BuildTracer), каждый этап и каждая глава замеряются
+    в отдельном интервале трассировки. При analysis=True вместо валидации документа
+    в памяти после сохранения запускается этап анализа готового файла: валидация,
+    извлечение текста (в reports_dir) и анализ стилей выполняются одновременно.
+    Если есть схема диплома schema_path, валидатор сравнивает оценку объема глав
+    с объемом по плану.
+    """
+    if schema_path and not os.path.exists(schema_path):
+        schema_path = None
+
+    try:
+        build = build_diploma(chapters_dir, output_path, template_path, cache_dir=cache_dir, workers=workers,
+                              backend=backend, formatting=formatting, compact=compact, tracer=tracer,
+                              analysis=analysis, reports_dir=reports_dir, schema_path=schema_path)
+    except BuildError as e:
+        print(e)
+        print(e.stopped)
+        return False
+
+    if build.compaction is not None:
+        print_compaction_stats(build.compaction)
+    if build.post_build is not None:
+        print_post_build_analysis(build.post_build)
+        print("Анализ документа завершен")
+    elif build.validation is not None:
+        print_validation_results(build.validation)
+        print("Валидация завершена")
+    return True
+
+def main():
+    """Основная функция для запуска всего процесса форматирования"""
+    parser = argparse.ArgumentParser(description="Форматирование диплома по шаблону ВКР")
+    parser.add_argument(
+        "--subprocess",
+        action="store_true",
+        help="запускать этапы отдельными процессами с сохранением файла между ними",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="конвертировать все главы заново, не используя кэш фрагментов",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="число процессов для параллельной конвертации глав",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["docx", "stream"],
+        default="docx",
+        help="способ записи документа форматером: целиком через python-docx или потоково",
+    )
+    parser.add_argument(
+        "--formatting",
+        choices=["direct", "style"],
+        default="direct",
+        help="оформление текста: прямое в каждом абзаце или через стили ВКР (меньше document.xml)",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="объединять соседние фрагменты текста с одинаковым оформлением перед исправлением отступов",
+    )
+    parser.add_argument(
+        "--analysis",
+        action="store_true",
+        help="после сохранения одновременно выполнить валидацию, извлечение текста и анализ стилей",
+    )
+    parser.add_argument(
+        "--trace",
+        nargs="?",
+        const=TRACE_PATH,
+        metavar="TRACE_JSON",
+        help="замерить этапы и главы, вывести сводку и сохранить трассировку Chrome (chrome://tracing)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=PROFILE_DIR,
+        metavar="DIR",
+        help="профилировать каждый этап cProfile и сохранить профили в каталог (включает --trace)",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="пиковая память этапов по tracemalloc вместо RSS процесса (медленнее; включает --trace)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="пересобирать диплом при каждом изменении глав (шаблон и главы остаются в памяти)",
+    )
+    args = parser.parse_args()
+
+    if args.watch:
+        # Трассировка и профилирование описывают одну сборку, а не сессию наблюдения
+        if args.subprocess or args.trace or args.profile or args.trace_memory:
+            parser.error("--watch несовместим с --subprocess, --trace, --profile и --trace-memory")
+        DiplomaWatcher(
+            CHAPTERS_DIR, OUTPUT_PATH, TEMPLATE_PATH,
+            cache_dir=None if args.no_cache else CACHE_DIR,
+            workers=args.workers, backend=args.backend, formatting=args.formatting,
+            compact=args.compact, analysis=args.analysis, reports_dir=REPORTS_DIR,
+            schema_path=SCHEMA_PATH if os.path.exists(SCHEMA_PATH) else None,
+        ).watch()
+        return
+
+    print("=== Начало процесса форматирования диплома ===")
+
+    tracer = None
+    if args.trace or args.profile or args.trace_memory:
+        tracer = BuildTracer(memory=args.trace_memory, profile_dir=args.profile)
+
+    if args.subprocess:
+        completed = run_subprocess_pipeline()
+    else:
+        completed = run_pipeline(cache_dir=None if args.no_cache else CACHE_DIR, workers=args.workers,
+                                 backend=args.backend, formatting=args.formatting,
+                                 compact=args.compact, tracer=tracer, analysis=args.analysis)
+
+    if tracer is not None:
+        tracer.close()
+        tracer.print_summary()
+        trace_path = args.trace or TRACE_PATH
+        tracer.save_chrome_trace(trace_path)
+        print(f"Трассировка сохранена в {trace_path}")
+
+    if not completed:
+        return
+
     print("=== Процесс форматирования диплома завершен ===")
-    print("Результат сохранен в файле: /home/user/study/diplom/diploma.docx")
+    print(f"Результат сохранен в файле: {OUTPUT_PATH}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+from typing import Iterator, List, NamedTuple, Optional
+
+from docx.shared import Pt, Mm
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+
+from style_registry import StyleRegistry
+
+# Шрифты текста и листингов
+BODY_FONT = 'Times New Roman'
+BODY_FONT_SIZE = Pt(16)
+CODE_FONT = 'Courier New'
+CODE_FONT_SIZE = Pt(14)
+
+# Отступ одного уровня вложенности списка
+LIST_INDENT = Mm(12.5)
+
+class BlockToken(NamedTuple):
+    """
+    Блочный элемент Markdown
+
+    kind: 'heading', 'paragraph', 'list_item' или 'code'
+    level: уровень заголовка (1-6) или вложенности элемента списка (с 0)
+    marker: маркер элемента списка ('-', '*', '+' или номер '1.')
+    """
+    kind: str
+    text: str
+    level: int = 0
+    marker: str = ''
+
+class InlineRun(NamedTuple):
+    """Фрагмент текста с единым начертанием"""
+    text: str
+    bold: bool = False
+    italic: bool = False
+    code: bool = False
+
+_FENCE = re.compile(r'^( {0,3})(`{3,}|~{3,})\s*([^`\s]*)')
+_HEADING = re.compile(r'^ {0,3}(#{1,6})(?:\s+(.*?))?(?:\s+#+)?\s*$')
+_THEMATIC_BREAK = re.compile(r'^ {0,3}([-*_])(?:\s*\1){2,}\s*$')
+_LIST_ITEM = re.compile(r'^(\s*)([-*+]|\d{1,9}[.)])\s+(.*)$')
+_BLOCKQUOTE = re.compile(r'^ {0,3}>\s?')
+
+# Код, экранирование, ссылки/изображения и разделители выделения
+_INLINE = re.compile(
+    r'(?P<code>`+)(?P<code_text>.+?)(?<!`)(?P=code)(?!`)'
+    r'|\\(?P<escape>[\\`*_{}\[\]()#+\-.!>|])'
+    r'|!?\[(?P<link_text>[^\]]*)\]\([^)]*\)'
+    r'|(?P<delim>\*\*|__|\*|_)'
+)
+
+def _indent_width(prefix: str) -> int:
+    """Ширина отступа строки (табуляция — 4 пробела)"""
+    return len(prefix.expandtabs(4))
+
+def _strip_indent(line: str, width: int) -> str:
+    """Удаление не более width пробелов в начале строки"""
+    i = 0
+    while i < width and i < len(line) and line[i] == ' ':
+        i += 1
+    return line[i:]
+
+def iter_block_tokens(text: str) -> Iterator[BlockToken]:
+    """
+    Блочные элементы Markdown в порядке следования за один проход по строкам
+
+    Абзацы и элементы списков собираются из строк-продолжений, уровень
+    вложенности списка определяется по отступу маркера, содержимое
+    блоков кода передается без изменений.
+    """
+    paragraph: List[str] = []
+    item: Optional[BlockToken] = None
+    item_lines: List[str] = []
+    list_indents: List[int] = []
+    fence: Optional[str] = None
+    fence_indent = 0
+    code_lines: List[str] = []
+
+    def flush() -> Iterator[BlockToken]:
+        nonlocal item
+        if paragraph:
+            yield BlockToken('paragraph', ' '.join(paragraph))
+            paragraph.clear()
+        if item is not None:
+            yield item._replace(text=' '.join(item_lines))
+            item = None
+            item_lines.clear()
+
+    for line in text.splitlines():
+        # Содержимое блока кода
+        if fence is not None:
+            stripped = line.strip()
+            if stripped.startswith(fence) and not stripped.strip(fence[0]):
+                yield BlockToken('code', '\n'.join(code_lines))
+                fence = None
+                code_lines = []
+            else:
+                # Отступ открывающей ограды убирается из строк кода
+                code_lines.append(_strip_indent(line, fence_indent))
+            continue
+
+        if not line.strip():
+            yield from flush()
+            continue
+
+        match = _FENCE.match(line)
+        if match:
+            yield from flush()
+            list_indents.clear()
+            fence = match.group(2)
+            fence_indent = len(match.group(1))
+            continue
+
+        match = _HEADING.match(line)
+        if match:
+            yield from flush()
+            list_indents.clear()
+            yield BlockToken('heading', (match.group(2) or '').strip(), level=len(match.group(1)))
+            continue
+
+        if _THEMATIC_BREAK.match(line):
+            yield from flush()
+            list_indents.clear()
+            continue
+
+        match = _LIST_ITEM.match(line)
+        if match:
+            yield from flush()
+            indent = _indent_width(match.group(1))
+            while list_indents and indent < list_indents[-1]:
+                list_indents.pop()
+            if not list_indents or indent > list_indents[-1]:
+                list_indents.append(indent)
+            item = BlockToken('list_item', '', level=len(list_indents) - 1, marker=match.group(2))
+            item_lines.append(match.group(3).strip())
+            continue
+
+        line = _BLOCKQUOTE.sub('', line, count=1).strip()
+        if item is not None:
+            # Продолжение элемента списка
+            item_lines.append(line)
+        else:
+            list_indents.clear()
+            paragraph.append(line)
+
+    yield from flush()
+    if fence is not None:
+        # Незакрытый блок кода продолжается до конца текста
+        yield BlockToken('code', '\n'.join(code_lines))
+
+def _has_closer(text: str, delim: str, start: int) -> bool:
+    """Есть ли дальше в тексте закрывающий разделитель выделения"""
+    pos = text.find(delim, start)
+    while pos != -1:
+        if pos > start and not text[pos - 1].isspace():
+            return True
+        pos = text.find(delim, pos + len(delim))
+    return False
+
+def iter_inline_runs(text: str) -> Iterator[InlineRun]:
+    """
+    Фрагменты строчной разметки: полужирный, курсив и код
+
+    Разметка ссылок и изображений заменяется их текстом, экранированные
+    символы выводятся как есть. Разделитель без пары остается текстом.
+    """
+    bold = italic = False
+    buffer: List[str] = []
+    pos = 0
+
+    def flush_buffer() -> Iterator[InlineRun]:
+        if buffer:
+            yield InlineRun(''.join(buffer), bold, italic)
+            buffer.clear()
+
+    for match in _INLINE.finditer(text):
+        buffer.append(text[pos:match.start()])
+        pos = match.end()
+
+        if match.group('code') is not None:
+            yield from flush_buffer()
+            yield InlineRun(match.group('code_text').strip(' ') or match.group('code_text'), bold, italic, code=True)
+        elif match.group('escape') is not None:
+            buffer.append(match.group('escape'))
+        elif match.group('link_text') is not None:
+            buffer.append(match.group('link_text'))
+        else:
+            delim = match.group('delim')
+            before = text[match.start() - 1] if match.start() > 0 else ' '
+            after = text[pos] if pos < len(text) else ' '
+            strong = len(delim) == 2
+            active = bold if strong else italic
+
+            # Подчеркивание внутри слова (snake_case) не является разметкой
+            if delim[0] == '_' and before.isalnum() and after.isalnum():
+                buffer.append(delim)
+                continue
+
+            if active and not before.isspace():
+                yield from flush_buffer()
+                if strong:
+                    bold = False
+                else:
+                    italic = False
+            elif not active and not after.isspace() and _has_closer(text, delim, pos):
+                yield from flush_buffer()
+                if strong:
+                    bold = True
+                else:
+                    italic = True
+            else:
+                buffer.append(delim)
+
+    buffer.append(text[pos:])
+    yield from flush_buffer()
+
+def inline_text(text: str) -> str:
+    """Текст строки без строчной разметки"""
+    return ''.join(run.text for run in iter_inline_runs(text))
+
+class MarkdownDocxRenderer:
+    """
+    Отрисовка Markdown в документ Word по потоку блочных элементов.
+
+    Каждый элемент сразу добавляется в документ абзацем нужного стиля ВКР,
+    строчная разметка переносится во фрагменты (runs) с начертанием:
+    - заголовки '#' и '##' — ВКР Параграф, '###' и глубже — ВКР Пункт;
+    - абзацы — ВКР Обычный;
+    - элементы списков — ВКР Обычный с маркером и отступом по уровню;
+    - блоки кода — ВКР Обычный моноширинным шрифтом без отступа первой строки.
+    """
+
+    BODY_STYLE = 'ВКР Обычный'
+    SECTION_STYLE = 'ВКР Параграф'
+    SUBSECTION_STYLE = 'ВКР Пункт'
+    BULLET = '•'
+
+    def __init__(self, document, direct_formatting: bool = True, styles: Optional[StyleRegistry] = None):
+        """
+        :param document: Документ python-docx, в конец которого добавляются абзацы
+        :param direct_formatting: Записывать шрифт и размер основного текста в каждый
+                                  фрагмент; при False они берутся из стилей ВКР
+                                  (начертание и шрифт кода записываются всегда)
+        :param styles: Реестр стилей документа (по умолчанию строится по document)
+        """
+        self.document = document
+        self.direct_formatting = direct_formatting
+        self.styles = styles if styles is not None else StyleRegistry.for_document(document)
+
+    def render(self, markdown_text: str):
+        """Добавление всех элементов текста в конец документа"""
+        for token in iter_block_tokens(markdown_text):
+            if token.kind == 'heading':
+                self.add_heading(token)
+            elif token.kind == 'list_item':
+                self.add_list_item(token)
+            elif token.kind == 'code':
+                self.add_code_block(token)
+            else:
+                self.add_runs(self.add_paragraph(self.BODY_STYLE), token.text)
+
+    def add_paragraph(self, style: str, text: str = ''):
+        """Абзац заданного стиля в конце документа (стиль ищется в реестре, а не в styles.xml)"""
+        paragraph = self.document.add_paragraph(text)
+        self.styles.apply(paragraph, style)
+        return paragraph
+
+    def add_heading(self, token: BlockToken):
+        """Заголовок параграфа или пункта"""
+        style = self.SECTION_STYLE if token.level <= 2 else self.SUBSECTION_STYLE
+        self.add_paragraph(style, inline_text(token.text))
+
+    def add_list_item(self, token: BlockToken):
+        """Элемент маркированного или нумерованного списка"""
+        paragraph = self.add_paragraph(self.BODY_STYLE)
+        paragraph.paragraph_format.first_line_indent = Mm(0)
+        paragraph.paragraph_format.left_indent = LIST_INDENT * (token.level + 1)
+
+        marker = self.BULLET if token.marker in ('-', '*', '+') else token.marker
+        self._add_run(paragraph, InlineRun(f'{marker} '))
+        self.add_runs(paragraph, token.text)
+
+    def add_code_block(self, token: BlockToken):
+        """Листинг: строки кода разделены разрывами строки внутри одного абзаца"""
+        paragraph = self.add_paragraph(self.BODY_STYLE)
+        paragraph.paragraph_format.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
+        paragraph.paragraph_format.first_line_indent = Mm(0)
+        paragraph.paragraph_format.line_spacing = 1.0
+
+        lines = token.text.split('\n')
+        run = self._add_run(paragraph, InlineRun(lines[0], code=True))
+        for line in lines[1:]:
+            run.add_break()
+            if line:
+                run.add_text(line)
+
+    def add_runs(self, paragraph, text: str):
+        """Фрагменты строчной разметки в конец абзаца"""
+        for run in iter_inline_runs(text):
+            if run.text:
+                self._add_run(paragraph, run)
+
+    def _add_run(self, paragraph, inline: InlineRun):
+        run = paragraph.add_run(inline.text)
+        if inline.code:
+            run.font.name = CODE_FONT
+            run.font.size = CODE_FONT_SIZE
+        elif self.direct_formatting:
+            run.font.name = BODY_FONT
+            run.font.size = BODY_FONT_SIZE
+        if inline.bold:
+            run.font.bold = True
+        if inline.italic:
+            run.font.italic = True
+        return run
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from docx_fast_reader import ParagraphRecord, SectionRecord
+from document_snapshot import open_document
+from style_registry import EffectiveStyle, StyleRegistry
+
+SCHEMA_PATH = '/home/user/study/diplom/diploma_schema.md'
+
+# Ширины символов Times New Roman в тысячных долях кегля
+_TIMES_ASCII = (  # символы 32..126
+    250, 333, 408, 500, 500, 833, 778, 180, 333, 333, 500, 564, 250, 333, 250, 278,
+    500, 500, 500, 500, 500, 500, 500, 500, 500, 500, 278, 278, 564, 564, 564, 444,
+    921, 722, 667, 667, 722, 611, 556, 722, 722, 333, 389, 722, 611, 889, 722, 722,
+    556, 722, 667, 556, 611, 722, 722, 944, 722, 722, 611, 333, 278, 333, 469, 500,
+    333, 444, 500, 444, 500, 444, 333, 500, 500, 278, 278, 500, 278, 778, 500, 500,
+    500, 500, 333, 389, 278, 500, 500, 722, 500, 500, 444, 480, 200, 480, 541,
+)
+_TIMES_CYRILLIC_UPPER = (  # А..Я
+    722, 574, 667, 578, 682, 611, 896, 501, 722, 722, 667, 678, 889, 722, 722, 722,
+    556, 667, 611, 715, 790, 722, 722, 671, 1028, 1028, 713, 901, 574, 661, 1023, 667,
+)
+_TIMES_CYRILLIC_LOWER = (  # а..я
+    444, 509, 472, 410, 509, 444, 691, 395, 535, 535, 486, 499, 633, 535, 500, 535,
+    500, 444, 437, 500, 648, 500, 535, 503, 770, 770, 517, 672, 456, 429, 747, 460,
+)
+TIMES_WIDTHS: Dict[str, int] = {
+    **{chr(32 + i): width for i, width in enumerate(_TIMES_ASCII)},
+    **{chr(ord('А') + i): width for i, width in enumerate(_TIMES_CYRILLIC_UPPER)},
+    **{chr(ord('а') + i): width for i, width in enumerate(_TIMES_CYRILLIC_LOWER)},
+    'Ё': 611, 'ё': 444, ' ': 250, '«': 500, '»': 500, '–': 500, '—': 1000, '…': 1000,
+    '“': 444, '”': 444, '„': 444, '‘': 333, '’': 333, '•': 350, '№': 956, '°': 400,
+    '×': 564, '±': 564, '≈': 549, '≤': 549, '≥': 549, '→': 1000,
+}
+
+class FontMetrics(NamedTuple):
+    """Метрики шрифта для разбиения на строки"""
+    widths: Dict[str, int]      # ширины символов, тысячные доли кегля
+    default_width: int          # ширина символов, которых нет в таблице
+    line_height: float          # высота одинарной строки в долях кегля (ascent + descent + lineGap)
+
+TIMES_NEW_ROMAN = FontMetrics(TIMES_WIDTHS, 500, 1.15)
+# Моноширинный шрифт листингов: все символы одной ширины
+COURIER_NEW = FontMetrics({}, 600, 1.133)
+FONTS = {'Times New Roman': TIMES_NEW_ROMAN, 'Courier New': COURIER_NEW}
+# Полужирное начертание в среднем шире обычного
+BOLD_FACTOR = 1.05
+# Позиции табуляции по умолчанию, пт
+TAB_STOP = 35.45
+
+# Страница по умолчанию (если в документе нет свойств раздела): A4, поля 30/15/20/20 мм
+DEFAULT_SECTION = SectionRecord(595.3, 841.9, 85.05, 42.5, 56.7, 56.7)
+DEFAULT_FONT_SIZE = 10.0
+
+# Стили заголовков глав: с них начинается очередная глава
+CHAPTER_STYLES = ('Heading 1', 'ВКР Глава-Раздел')
+_PIECES = re.compile(r'( +|\t|\n)')
+_BUDGET = re.compile(r'^##\s+(.+?)\s*\((\d+)\s*-\s*(\d+)\s+страниц')
+_NUMBERING = re.compile(r'^[\d.]+\s*')
+
+def chapter_name(title: str) -> str:
+    """Название главы без номера, для сопоставления с планом ('2. Теоретическая часть' -> 'теоретическая часть')"""
+    return _NUMBERING.sub('', title.strip()).lower()
+
+def load_page_budgets(schema_path: str) -> Dict[str, Tuple[int, int]]:
+    """Объем глав по плану из заголовков '## 1. Введение (3-4 страницы)' схемы диплома"""
+    budgets = {}
+    with open(schema_path, encoding='utf-8') as f:
+        for line in f:
+            match = _BUDGET.match(line)
+            if match:
+                budgets[chapter_name(match.group(1))] = (int(match.group(2)), int(match.group(3)))
+    return budgets
+
+class ChapterPages(NamedTuple):
+    """Оценка объема главы"""
+    title: str
+    pages: float
+    budget: Optional[Tuple[int, int]]        # (от, до) страниц по плану
+
+    @property
+    def within_budget(self) -> Optional[bool]:
+        if self.budget is None:
+            return None
+        return self.budget[0] <= round(self.pages) <= self.budget[1]
+
+class PageEstimate(NamedTuple):
+    """Оценка числа страниц документа"""
+    pages: int
+    lines: int
+    chapters: List[ChapterPages]
+
+class PageEstimator:
+    """
+    Оценка числа страниц без программы верстки.
+
+    Абзацы разбиваются на строки жадно, по словам, с шириной символов из
+    таблиц Times New Roman (кегль, начертание и шрифт каждого фрагмента),
+    с учетом ширины страницы, полей, отступов первой строки и слева. Строки
+    раскладываются по страницам с учетом межстрочного интервала, интервалов
+    перед и после абзаца и разрывов страниц. Свойства, не заданные в абзаце,
+    берутся из его стиля (StyleRegistry). Запрет висячих строк, сноски, таблицы
+    и рисунки не учитываются — это оценка, а не верстка.
+
+    Абзацы добавляются по одному (add), как в правилах валидатора: свойства
+    раздела идут после его абзацев, поэтому раскладка выполняется в finish.
+    """
+
+    def __init__(self, styles: Optional[StyleRegistry] = None, budgets: Optional[Dict[str, Tuple[int, int]]] = None):
+        """
+        :param styles: Реестр стилей документа (без него — только свойства абзацев и фрагментов)
+        :param budgets: Объем глав по плану: название без номера -> (от, до) страниц
+        """
+        self.styles = styles
+        self.budgets = budgets or {}
+        self._word_widths: Dict[Tuple[int, str], int] = {}
+        self._pending: List[ParagraphRecord] = []
+        # Высота области текста текущего раздела; до первого раздела — страницы по умолчанию
+        self._height = DEFAULT_SECTION.page_height - DEFAULT_SECTION.top_margin - DEFAULT_SECTION.bottom_margin
+        self._page = 0
+        self._y = 0.0
+        self._lines = 0
+        self._chapters: List[Tuple[str, float]] = []
+
+    def add(self, record: Union[ParagraphRecord, SectionRecord]):
+        """Очередной абзац или свойства раздела, которым заканчиваются предыдущие абзацы"""
+        if isinstance(record, SectionRecord):
+            self._layout(self._pending, record)
+            self._pending = []
+        else:
+            self._pending.append(record)
+
+    def estimate(self, elements: Iterable[Union[ParagraphRecord, SectionRecord]]) -> PageEstimate:
+        """Оценка по всем записям документа (FastDocxReader, снимок или iter_document_elements)"""
+        for record in elements:
+            self.add(record)
+        return self.finish()
+
+    def finish(self) -> PageEstimate:
+        """Раскладка оставшихся абзацев и итог по главам"""
+        if self._pending:
+            self._layout(self._pending, DEFAULT_SECTION)
+            self._pending = []
+        end = self._position()
+        pages = self._page + (1 if self._y > 0 else 0)
+
+        chapters: Dict[str, float] = {}
+        for (title, start), (_, next_start) in zip(self._chapters, self._chapters[1:] + [('', end)]):
+            # Повторяющиеся заголовки (несколько файлов одной главы) складываются
+            chapters[title] = chapters.get(title, 0.0) + next_start - start
+        return PageEstimate(
+            pages=max(pages, 1),
+            lines=self._lines,
+            chapters=[
+                ChapterPages(title, round(value, 1), self.budgets.get(chapter_name(title)))
+                for title, value in chapters.items()
+            ],
+        )
+
+    def _position(self) -> float:
+        """Текущее место на странице: номер страницы и доля ее заполнения"""
+        return self._page + self._y / self._height if self._height else float(self._page)
+
+    def _style(self, style_id: Optional[str]) -> Optional[EffectiveStyle]:
+        return self.styles.effective(style_id) if self.styles is not None else None
+
+    def _layout(self, paragraphs: List[ParagraphRecord], section: SectionRecord):
+        """Раскладка абзацев раздела по страницам"""
+        width = (section.page_width or DEFAULT_SECTION.page_width) \
+            - (section.left_margin or 0) - (section.right_margin or 0)
+        self._height = (section.page_height or DEFAULT_SECTION.page_height) \
+            - (section.top_margin or 0) - (section.bottom_margin or 0)
+
+        for paragraph in paragraphs:
+            style = self._style(paragraph.style_id)
+
+            def prop(name, default=None):
+                value = getattr(paragraph, name)
+                if value is None and style is not None:
+                    value = getattr(style, name)
+                return default if value is None else value
+
+            if paragraph.page_break and self._y > 0:
+                self._page += 1
+                self._y = 0.0
+            if self._y > 0:
+                # Интервал перед абзацем в начале страницы не добавляется
+                self._y += prop('space_before', 0.0)
+            if paragraph.style_name in CHAPTER_STYLES:
+                self._chapters.append((paragraph.text.strip(), self._position()))
+
+            left_indent = prop('left_indent', 0.0)
+            first_line = width - left_indent - prop('first_line_indent', 0.0)
+            lines, font_size, line_factor = self._lines_of(paragraph, style, first_line, width - left_indent)
+
+            line_spacing = prop('line_spacing', 1.0)
+            line_rule = paragraph.line_rule if paragraph.line_spacing is not None else (
+                style.line_rule if style is not None else None)
+            natural = font_size * line_factor
+            if line_rule == 'exact':
+                line_height = line_spacing
+            elif line_rule == 'atLeast':
+                line_height = max(line_spacing, natural)
+            else:
+                line_height = natural * line_spacing
+
+            self._place_lines(lines, line_height)
+            self._y += prop('space_after', 0.0)
+
+    def _place_lines(self, lines: int, line_height: float):
+        """Строки абзаца: сколько поместится на текущей странице, остальные — на следующих"""
+        self._lines += lines
+        while lines:
+            fit = int((self._height - self._y) // line_height) if line_height > 0 else lines
+            if fit <= 0:
+                if self._y == 0:
+                    fit = 1  # строка выше страницы все равно занимает страницу
+                else:
+                    self._page += 1
+                    self._y = 0.0
+                    continue
+            taken = min(fit, lines)
+            self._y += taken * line_height
+            lines -= taken
+
+    def _word_width(self, font: FontMetrics, word: str) -> int:
+        key = (id(font), word)
+        width = self._word_widths.get(key)
+        if width is None:
+            widths, default = font.widths, font.default_width
+            width = self._word_widths[key] = sum(widths.get(char, default) for char in word)
+        return width
+
+    def _lines_of(self, paragraph: ParagraphRecord, style: Optional[EffectiveStyle],
+                  first_line: float, width: float) -> Tuple[int, float, float]:
+        """
+        Число строк абзаца при жадном переносе по словам
+
+        :return: (строк, наибольший кегль, высота одинарной строки в долях кегля)
+        """
+        style_font = style.font_name if style is not None else None
+        style_size = style.font_size if style is not None and style.font_size else DEFAULT_FONT_SIZE
+        style_bold = style.bold if style is not None else None
+
+        lines = 1
+        x = 0.0           # занятая ширина текущей строки, пт
+        limit = first_line
+        word = 0.0        # ширина собираемого слова (слово может продолжаться в следующем фрагменте)
+        font_size = style_size if not paragraph.runs else 0.0
+        line_factor = TIMES_NEW_ROMAN.line_height
+
+        def place(word, x, lines, limit):
+            if x > 0 and x + word > limit:
+                lines += 1
+                x = 0.0
+                limit = width
+            if word > limit > 0:
+                # Слово длиннее строки переносится по символам
+                extra = int(word // limit)
+                lines += extra
+                word -= extra * limit
+            return x + word, lines, limit
+
+        for run in paragraph.runs:
+            size = run.font_size or style_size
+            font = FONTS.get(run.font_name or style_font, TIMES_NEW_ROMAN)
+            bold = run.bold if run.bold is not None else style_bold
+            scale = size / 1000 * (BOLD_FACTOR if bold else 1.0)
+            if size > font_size:
+                font_size, line_factor = size, font.line_height
+
+            for piece in _PIECES.split(run.text):
+                if not piece:
+                    continue
+                first = piece[0]
+                if first == ' ':
+                    if word:
+                        x, lines, limit = place(word, x, lines, limit)
+                        word = 0.0
+                    x += len(piece) * font.widths.get(' ', font.default_width) * scale
+                elif first == '\t':
+                    if word:
+                        x, lines, limit = place(word, x, lines, limit)
+                        word = 0.0
+                    x = (x // TAB_STOP + 1) * TAB_STOP
+                elif first == '\n':
+                    if word:
+                        x, lines, limit = place(word, x, lines, limit)
+                        word = 0.0
+                    lines += 1
+                    x = 0.0
+                    limit = width
+                else:
+                    word += self._word_width(font, piece) * scale
+        if word:
+            x, lines, limit = place(word, x, lines, limit)
+        return lines, font_size or style_size, line_factor
+
+def estimate_pages(document_path: str, schema_path: Optional[str] = None) -> PageEstimate:
+    """Оценка числа страниц документа (читается из снимка) и объема глав по плану"""
+    budgets = load_page_budgets(schema_path) if schema_path else None
+    with open_document(document_path) as reader:
+        return PageEstimator(StyleRegistry(reader.styles), budgets).estimate(reader.iter_elements())
+
+def print_page_estimate(estimate: PageEstimate):
+    """Вывод числа страниц по главам и сравнения с планом"""
+    print(f"\n📄 Оценка объема: {estimate.pages} стр., {estimate.lines} строк")
+    for chapter in estimate.chapters:
+        if chapter.budget is None:
+            status, plan = 'ℹ️', 'плана нет'
+        else:
+            status = '✅' if chapter.within_budget else '⚠️'
+            plan = f"план {chapter.budget[0]}-{chapter.budget[1]}"
+        print(f"{status} {chapter.title:<40} {chapter.pages:>6.1f} стр.  ({plan})")
+
+def main():
+    """Оценка числа страниц диплома"""
+    parser = argparse.ArgumentParser(description="Оценка числа страниц диплома по главам")
+    parser.add_argument("document", nargs="?", default='/home/user/study/diplom/diploma.docx', help="файл .docx")
+    parser.add_argument("--schema", default=SCHEMA_PATH, help="схема диплома с объемом глав")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.document):
+        print(f"Ошибка: файл {args.document} не найден")
+        return
+
+    schema_path = args.schema if os.path.exists(args.schema) else None
+    print_page_estimate(estimate_pages(args.document, schema_path))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from diploma_validator import DiplomaValidator, print_validation_results
+from document_text_extractor import DocumentTextExtractor, REPORTS_DIR
+from document_style_analyzer import DocumentStyleAnalyzer
+from document_snapshot import open_document
+from page_estimator import SCHEMA_PATH
+
+def validate_document(document_path: str, reports_dir: str, schema_path: Optional[str]) -> Dict[str, Any]:
+    """Проверка диплома на соответствие требованиям (и объема глав плану из схемы диплома)"""
+    return DiplomaValidator(document_path, schema_path=schema_path).validate()
+
+def extract_document_text(document_path: str, reports_dir: str, schema_path: Optional[str]) -> List[str]:
+    """Полный и структурированный текст документа; возвращает пути к файлам"""
+    with DocumentTextExtractor(document_path, reports_dir=reports_dir) as extractor:
+        return [extractor.save_text_to_file('txt'), extractor.save_text_to_file('json')]
+
+def analyze_document_styles(document_path: str, reports_dir: str, schema_path: Optional[str]) -> str:
+    """Отчет о стилях документа (JSON рядом с документом); возвращает таблицу итоговых свойств"""
+    return DocumentStyleAnalyzer(document_path).generate_style_report()
+
+# Задачи этапа анализа: имя -> функция (документ, каталог отчетов, схема диплома);
+# на уровне модуля, чтобы передавать в процессы пула
+ANALYSIS_TASKS: Dict[str, Callable[[str, str, Optional[str]], Any]] = {
+    'валидация': validate_document,
+    'текст': extract_document_text,
+    'стили': analyze_document_styles,
+}
+
+def _run_task(name: str, document_path: str, reports_dir: str, schema_path: Optional[str] = None):
+    """Выполнение одной задачи с замером времени; ошибка возвращается, а не выбрасывается"""
+    started = time.perf_counter()
+    try:
+        result, error = ANALYSIS_TASKS[name](document_path, reports_dir, schema_path), None
+    except Exception as e:
+        result, error = None, f'{type(e).__name__}: {e}'
+    return result, error, time.perf_counter() - started
+
+class PostBuildAnalysis(NamedTuple):
+    """Результаты анализа готового документа"""
+    validation: Optional[Dict[str, Any]]     # результаты DiplomaValidator.validate
+    text_files: Optional[List[str]]          # full_text.txt и structured_text.json
+    style_report: Optional[str]              # таблица итоговых свойств стилей DocumentStyleAnalyzer
+    errors: Dict[str, str]                   # задача -> текст ошибки
+    timings: Dict[str, float]                # задача -> время выполнения, с
+    elapsed: float                           # общее время этапа, с
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+def run_post_build_analysis(document_path: str, reports_dir: str = REPORTS_DIR,
+                            workers: int = len(ANALYSIS_TASKS), schema_path: Optional[str] = None) -> PostBuildAnalysis:
+    """
+    Валидация, извлечение текста и анализ стилей готового документа.
+
+    Все задачи только читают документ, поэтому выполняются одновременно в пуле
+    процессов, и этап длится примерно столько, сколько самая долгая из них.
+    Снимок документа (document_snapshot) строится заранее в текущем процессе,
+    чтобы процессы пула не разбирали документ каждый сам. Если снимок записать
+    нельзя (каталог только для чтения), задачи читают документ без него.
+
+    :param document_path: Путь к готовому документу
+    :param reports_dir: Каталог для извлеченного текста
+    :param workers: Число процессов (1 — задачи по очереди в текущем процессе)
+    :param schema_path: Схема диплома с объемом глав для валидации (None — без сравнения с планом)
+    """
+    started = time.perf_counter()
+    open_document(document_path).close()
+
+    names = list(ANALYSIS_TASKS)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(names))) as executor:
+            futures = [executor.submit(_run_task, name, document_path, reports_dir, schema_path) for name in names]
+            outcomes = [future.result() for future in futures]
+    else:
+        outcomes = [_run_task(name, document_path, reports_dir, schema_path) for name in names]
+
+    results = {}
+    errors = {}
+    timings = {}
+    for name, (result, error, seconds) in zip(names, outcomes):
+        results[name] = result
+        timings[name] = round(seconds, 3)
+        if error is not None:
+            errors[name] = error
+
+    return PostBuildAnalysis(
+        validation=results['валидация'],
+        text_files=results['текст'],
+        style_report=results['стили'],
+        errors=errors,
+        timings=timings,
+        elapsed=round(time.perf_counter() - started, 3),
+    )
+
+def print_post_build_analysis(analysis: PostBuildAnalysis):
+    """Вывод результатов анализа"""
+    if analysis.validation is not None:
+        print_validation_results(analysis.validation)
+
+    print("\n🧪 Анализ документа:")
+    for name, seconds in analysis.timings.items():
+        status = '❌' if name in analysis.errors else '✅'
+        print(f"{status} {name}: {seconds:.2f} с")
+    for name, error in analysis.errors.items():
+        print(f"Ошибка в задаче «{name}»: {error}")
+    print(f"Общее время анализа: {analysis.elapsed:.2f} с (сумма задач: {sum(analysis.timings.values()):.2f} с)")
+
+def main():
+    """Анализ готового диплома"""
+    parser = argparse.ArgumentParser(description="Валидация, извлечение текста и анализ стилей готового диплома")
+    parser.add_argument("document", nargs="?", default='/home/user/study/diplom/diploma.docx', help="файл .docx")
+    parser.add_argument("--reports-dir", default=REPORTS_DIR, help="каталог для извлеченного текста")
+    parser.add_argument("--workers", type=int, default=len(ANALYSIS_TASKS), help="число процессов")
+    parser.add_argument("--schema", default=SCHEMA_PATH, help="схема диплома с объемом глав в страницах")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.document):
+        print(f"Ошибка: файл {args.document} не найден")
+        return
+
+    schema_path = args.schema if os.path.exists(args.schema) else None
+    print_post_build_analysis(run_post_build_analysis(args.document, args.reports_dir, args.workers, schema_path))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import zipfile
+from typing import BinaryIO, Dict, Iterable, Optional, Union
+
+from lxml import etree
+from docx.oxml.ns import qn
+
+# Объявления пространств имен в открывающем теге сериализованного элемента
+_START_TAG_NSDECLS = re.compile(rb'^<[^\s/>]+((?:\s+xmlns(?::[\w.-]+)?="[^"]*")+)')
+_NSDECL = re.compile(rb'\s+xmlns(?::([\w.-]+))?="([^"]*)"')
+
+OFFICE_DOCUMENT_RELTYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+PACKAGE_RELS_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+class StreamingDocxWriter:
+    """
+    Потоковая запись документа Word на основе шаблона.
+
+    Все части пакета (styles.xml, numbering.xml, колонтитулы, связи) копируются
+    из шаблона без изменений, а основная часть (word/document.xml) пишется
+    в архив по мере поступления элементов тела документа. В памяти в каждый
+    момент находится только записываемый элемент. Архив пишется во временный
+    файл рядом с результатом и заменяет его только в close(), поэтому при
+    ошибке записи предыдущий документ остается на месте.
+    """
+
+    def __init__(self, template_path: Union[str, BinaryIO], output_path: str, document_element,
+                 replace_parts: Optional[Dict[str, bytes]] = None):
+        """
+        Инициализация писателя
+
+        :param template_path: Путь к шаблону (или открытый двоичный поток с ним),
+                              из которого копируются части пакета
+        :param output_path: Путь к создаваемому документу
+        :param document_element: Корневой элемент w:document шаблона; из него берутся
+                                 объявления пространств имен и завершающий w:sectPr
+        :param replace_parts: Части пакета, которые нужно записать вместо шаблонных
+        """
+        self.template_path = template_path
+        self.output_path = output_path
+        self.document_element = document_element
+        self.replace_parts = replace_parts or {}
+        self.tmp_path = f'{output_path}.{os.getpid()}.tmp'
+
+        self._zip = None
+        self._stream = None
+        self._root_namespaces = {
+            (prefix or '').encode('utf-8'): uri.encode('utf-8')
+            for prefix, uri in document_element.nsmap.items()
+        }
+        self.elements_written = 0
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._abort()
+
+    @staticmethod
+    def _main_part_name(template: zipfile.ZipFile) -> str:
+        """Имя основной части документа по связям пакета"""
+        rels = etree.fromstring(template.read('_rels/.rels'))
+        for rel in rels.iterchildren(f'{{{PACKAGE_RELS_NS}}}Relationship'):
+            if rel.get('Type') == OFFICE_DOCUMENT_RELTYPE:
+                return rel.get('Target').lstrip('/')
+        return 'word/document.xml'
+
+    def open(self):
+        """Копирование частей шаблона и запись начала word/document.xml"""
+        self._zip = zipfile.ZipFile(self.tmp_path, 'w', compression=zipfile.ZIP_DEFLATED)
+        try:
+            self._write_head()
+        except BaseException:
+            self._abort()
+            raise
+
+    def _write_head(self):
+        with zipfile.ZipFile(self.template_path) as template:
+            main_part = self._main_part_name(template)
+            for info in template.infolist():
+                if info.filename == main_part:
+                    continue
+                data = self.replace_parts.get(info.filename)
+                if data is None:
+                    data = template.read(info.filename)
+                self._zip.writestr(info, data, compress_type=zipfile.ZIP_DEFLATED)
+
+        self._stream = self._zip.open(main_part, 'w', force_zip64=True)
+
+        # Открывающий тег w:document со всеми объявлениями и атрибутами шаблона
+        root = etree.Element(self.document_element.tag, dict(self.document_element.attrib),
+                             nsmap=self.document_element.nsmap)
+        root_tag = etree.tostring(root, encoding='UTF-8')
+        self._stream.write(b"<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n")
+        self._stream.write(root_tag[:-2] + b'>')
+        self._stream.write(b'<w:body>')
+
+    def _serialize(self, element) -> bytes:
+        """Сериализация элемента без объявлений, уже сделанных в корне документа"""
+        data = etree.tostring(element, encoding='UTF-8')
+        match = _START_TAG_NSDECLS.match(data)
+        if match is None:
+            return data
+
+        kept = b''.join(
+            decl.group(0)
+            for decl in _NSDECL.finditer(match.group(1))
+            if self._root_namespaces.get(decl.group(1) or b'') != decl.group(2)
+        )
+        return data[:match.start(1)] + kept + data[match.end(1):]
+
+    def write_element(self, element):
+        """Запись одного элемента тела документа (w:p, w:tbl и т.п.)"""
+        self._stream.write(self._serialize(element))
+        self.elements_written += 1
+
+    def write_elements(self, elements: Iterable):
+        """Запись последовательности элементов тела документа"""
+        for element in elements:
+            self.write_element(element)
+
+    def close(self):
+        """Запись свойств раздела шаблона и завершение документа"""
+        sect_pr = self.document_element.find(qn('w:body')).find(qn('w:sectPr'))
+        if sect_pr is not None:
+            self._stream.write(self._serialize(sect_pr))
+        self._stream.write(b'</w:body></w:document>')
+
+        self._stream.close()
+        self._zip.close()
+        self._stream = None
+        self._zip = None
+        os.replace(self.tmp_path, self.output_path)
+
+    def _abort(self):
+        """Закрытие архива после ошибки и удаление временного файла (документ результата не меняется)"""
+        try:
+            if self._stream is not None:
+                self._stream.close()
+            if self._zip is not None:
+                self._zip.close()
+        finally:
+            self._stream = None
+            self._zip = None
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
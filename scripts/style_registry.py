@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, NamedTuple, Optional
+
+from docx_fast_reader import StyleInfo, StyleTable
+
+# Свойства, которые наследуются по цепочке w:basedOn и из w:docDefaults
+INHERITED_FIELDS = StyleInfo._fields[5:]
+
+class EffectiveStyle(NamedTuple):
+    """Итоговые свойства стиля с учетом цепочки basedOn и свойств документа по умолчанию"""
+    style_id: Optional[str]
+    name: Optional[str]
+    alignment: Optional[str]
+    line_spacing: Optional[float]
+    line_rule: Optional[str]
+    space_before: Optional[float]
+    space_after: Optional[float]
+    first_line_indent: Optional[float]
+    left_indent: Optional[float]
+    font_name: Optional[str]
+    font_size: Optional[float]
+    bold: Optional[bool]
+    italic: Optional[bool]
+
+class StyleRegistry:
+    """
+    Реестр стилей документа, построенный за один разбор styles.xml.
+
+    Имя стиля сопоставляется идентификатору, идентификатор — итоговым свойствам
+    (наследование разрешается при первом обращении и запоминается). Заменяет
+    перебор document.styles и paragraph.style, которые в python-docx каждый раз
+    ищут стиль в styles.xml, в циклах по абзацам форматера, исправителя отступов
+    и валидатора.
+    """
+
+    def __init__(self, table: StyleTable, styles_element=None):
+        """
+        :param table: Таблица стилей (docx_fast_reader или снимок документа)
+        :param styles_element: Элемент w:styles документа python-docx (для refresh)
+        """
+        self.table = table
+        self.styles_element = styles_element
+        self._effective: Dict[Optional[str], EffectiveStyle] = {}
+
+    @classmethod
+    def for_document(cls, document) -> 'StyleRegistry':
+        """Реестр стилей документа, открытого в python-docx"""
+        element = document.styles.element
+        return cls(StyleTable.from_element(element), element)
+
+    def refresh(self):
+        """Повторный разбор styles.xml после добавления или изменения стилей"""
+        if self.styles_element is not None:
+            self.table = StyleTable.from_element(self.styles_element)
+        self._effective.clear()
+
+    def has(self, name: str) -> bool:
+        """Есть ли в документе стиль с таким именем"""
+        return name in self.table.by_name
+
+    def style_id(self, name: str) -> Optional[str]:
+        """
+        Значение w:pStyle для стиля абзаца с таким именем.
+
+        Для стиля абзаца по умолчанию — None, как при присваивании paragraph.style
+        в python-docx. Неизвестное имя — KeyError.
+        """
+        style = self.table.by_name.get(name)
+        if style is None:
+            raise KeyError(f"no style with name '{name}'")
+        if style is self.table.default_paragraph_style:
+            return None
+        return style.style_id
+
+    def apply(self, paragraph, name: str):
+        """Назначение стиля абзацу python-docx без поиска по styles.xml"""
+        paragraph._p.style = self.style_id(name)
+
+    def paragraph_style_name(self, paragraph) -> Optional[str]:
+        """Имя стиля абзаца python-docx (то же, что paragraph.style.name)"""
+        style = self.table.paragraph_style(paragraph._p.style)
+        return style.name if style is not None else None
+
+    def effective(self, style_id: Optional[str]) -> EffectiveStyle:
+        """Итоговые свойства стиля абзаца по значению w:pStyle (неизвестный — стиль по умолчанию)"""
+        style = self.table.paragraph_style(style_id)
+        return self.resolve(style.style_id if style is not None else None)
+
+    def effective_by_name(self, name: str) -> EffectiveStyle:
+        """Итоговые свойства стиля по имени"""
+        style = self.table.by_name.get(name)
+        if style is None:
+            raise KeyError(f"no style with name '{name}'")
+        return self.resolve(style.style_id)
+
+    def resolve(self, style_id: Optional[str]) -> EffectiveStyle:
+        """
+        Итоговые свойства стиля любого типа по идентификатору.
+
+        Стиль наследует от базового недостающие свойства, корни цепочек — от
+        w:docDefaults. Результат запоминается для каждого стиля цепочки, поэтому
+        общие базовые стили ('Normal', 'ВКР Обычный') разрешаются один раз.
+        """
+        effective = self._effective.get(style_id)
+        if effective is not None:
+            return effective
+
+        # Цепочка до первого уже разрешенного стиля; защита от циклов в basedOn испорченных шаблонов
+        chain = []
+        seen = set()
+        current = self.table.by_id.get(style_id) if style_id is not None else None
+        base = None
+        while current is not None and current.style_id not in seen:
+            base = self._effective.get(current.style_id)
+            if base is not None:
+                break
+            seen.add(current.style_id)
+            chain.append(current)
+            current = self.table.by_id.get(current.based_on) if current.based_on else None
+
+        if base is None:
+            base = self._root()
+        for style in reversed(chain):
+            base = self._effective[style.style_id] = self._inherit(style, base)
+        if not chain:
+            self._effective[style_id] = base
+        return base
+
+    def _root(self) -> EffectiveStyle:
+        """Свойства документа по умолчанию (w:docDefaults)"""
+        defaults = self.table.doc_defaults
+        values = [getattr(defaults, field) if defaults is not None else None for field in INHERITED_FIELDS]
+        return EffectiveStyle(None, None, *values)
+
+    @staticmethod
+    def _inherit(style: StyleInfo, base: EffectiveStyle) -> EffectiveStyle:
+        values = []
+        for field in INHERITED_FIELDS:
+            value = getattr(style, field)
+            values.append(value if value is not None else getattr(base, field))
+        return EffectiveStyle(style.style_id, style.name, *values)
@@ -1,41 +1,50 @@
-import docx
-from docx.shared import Pt, Mm
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT, WD_LINE_SPACING
+from docx_fast_reader import FastDocxReader
+
+def _mm(points):
+    """Пункты -> миллиметры"""
+    return points * 25.4 / 72 if points is not None else None
 
 def analyze_document_template(template_path):
     """Анализ шаблона документа"""
-    document = docx.Document(template_path)
+    reader = FastDocxReader(template_path)
+    
+    # Анализ стилей и шрифтов за один проход по документу
+    font_sizes = []
+    font_stats = {}
+    sections = []
+    for record in reader.iter_elements():
+        if not hasattr(record, 'runs'):
+            sections.append(record)
+            continue
+        for run in record.runs:
+            if run.font_name:
+                font_stats[run.font_name] = font_stats.get(run.font_name, 0) + 1
+            if run.font_size:
+                font_sizes.append(run.font_size)
     
     # Анализ секций и полей
-    sections = document.sections
     section = sections[0]
     
     print("📏 Параметры страницы:")
-    print(f"Высота страницы: {section.page_height.mm} мм")
-    print(f"Ширина страницы: {section.page_width.mm} мм")
-    print(f"Левое поле: {section.left_margin.mm} мм")
-    print(f"Правое поле: {section.right_margin.mm} мм")
-    print(f"Верхнее поле: {section.top_margin.mm} мм")
-    print(f"Нижнее поле: {section.bottom_margin.mm} мм")
+    print(f"Высота страницы: {_mm(section.page_height)} мм")
+    print(f"Ширина страницы: {_mm(section.page_width)} мм")
+    print(f"Левое поле: {_mm(section.left_margin)} мм")
+    print(f"Правое поле: {_mm(section.right_margin)} мм")
+    print(f"Верхнее поле: {_mm(section.top_margin)} мм")
+    print(f"Нижнее поле: {_mm(section.bottom_margin)} мм")
     
     # Анализ стилей
     print("\n🔤 Стили документа:")
-    for style in document.styles:
-        if style.type == 1:  # Paragraph style
+    for style in reader.styles.by_id.values():
+        if style.type == 'paragraph':
             print(f"Стиль: {style.name}")
-            if style.paragraph_format:
-                print(f"  Выравнивание: {style.paragraph_format.alignment}")
-                print(f"  Межстрочный интервал: {style.paragraph_format.line_spacing}")
+            print(f"  Выравнивание: {style.alignment}")
+            print(f"  Межстрочный интервал: {style.line_spacing}")
     
     # Анализ шрифтов
     print("\n🖋️ Шрифты:")
-    font_stats = {}
-    for paragraph in document.paragraphs:
-        for run in paragraph.runs:
-            if run.font.name:
-                font_stats[run.font.name] = font_stats.get(run.font.name, 0) + 1
-            if run.font.size:
-                print(f"Размер шрифта: {run.font.size.pt} пт")
+    for size in font_sizes:
+        print(f"Размер шрифта: {size} пт")
     
     print("\nИспользованные шрифты:")
     for font, count in font_stats.items():
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import re
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+# Путь к индексу по умолчанию
+INDEX_PATH = '/home/user/study/diplom/reports/search_index.sqlite'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    build_hash TEXT PRIMARY KEY,
+    document_path TEXT NOT NULL,
+    indexed_at REAL NOT NULL,
+    paragraph_count INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS paragraphs USING fts5(
+    text,
+    chapter,
+    section,
+    title UNINDEXED,
+    style UNINDEXED,
+    role UNINDEXED,
+    paragraph UNINDEXED,
+    start UNINDEXED,
+    build_hash UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Слова запроса (буквы, цифры, подчеркивание)
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+class SearchHit(NamedTuple):
+    """Найденный абзац"""
+    build_hash: str
+    document_path: str
+    title: Optional[str]
+    chapter: Optional[str]
+    section: Optional[str]
+    paragraph: int
+    style: str
+    snippet: str
+    score: float
+
+class BuildInfo(NamedTuple):
+    """Проиндексированная сборка"""
+    build_hash: str
+    document_path: str
+    indexed_at: float
+    paragraph_count: int
+
+def fts_query(text: str, prefix: bool = True) -> str:
+    """
+    Запрос FTS5 из произвольной строки: все слова должны встретиться в абзаце
+
+    :param prefix: Искать слова как префиксы ('классиф' найдет 'классификация')
+    """
+    words = _WORD.findall(text)
+    suffix = '*' if prefix else ''
+    return ' '.join(f'"{word}"{suffix}' for word in words)
+
+class TextSearchIndex:
+    """
+    Полнотекстовый индекс абзацев диплома (SQLite FTS5).
+
+    Для каждой сборки (ключ — хэш файла документа) хранятся непустые абзацы
+    с главой, разделом и стилем из DocumentTextExtractor.iter_records.
+    Поиск ранжирует абзацы по BM25 (совпадение в тексте весит больше,
+    чем в названии главы или раздела) и возвращает фрагмент с подсветкой.
+    """
+
+    # Веса столбцов text, chapter, section для bm25()
+    COLUMN_WEIGHTS = (1.0, 0.5, 0.5)
+
+    def __init__(self, index_path: str = INDEX_PATH):
+        """
+        :param index_path: Файл базы SQLite (создается при необходимости)
+        """
+        self.index_path = index_path
+        directory = os.path.dirname(index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(index_path)
+        self.connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def has_build(self, build_hash: str) -> bool:
+        """Проиндексирована ли сборка"""
+        row = self.connection.execute('SELECT 1 FROM builds WHERE build_hash = ?', (build_hash,)).fetchone()
+        return row is not None
+
+    def add_build(self, build_hash: str, document_path: str, records: Iterable[Dict[str, Any]]) -> bool:
+        """
+        Добавление абзацев сборки в индекс
+
+        :param records: Записи DocumentTextExtractor.iter_records (читаются потоком)
+        :return: False, если сборка уже проиндексирована
+        """
+        if self.has_build(build_hash):
+            return False
+
+        rows = (
+            (record["текст"], record["глава"], record["раздел"], record["заголовок"], record["стиль"],
+             record["тип"], record["абзац"], record["начало"], build_hash)
+            for record in records
+            if record.get("тип") != "метаданные"
+        )
+        with self.connection:
+            cursor = self.connection.executemany(
+                'INSERT INTO paragraphs (text, chapter, section, title, style, role, paragraph, start, build_hash) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rows,
+            )
+            self.connection.execute(
+                'INSERT INTO builds (build_hash, document_path, indexed_at, paragraph_count) VALUES (?, ?, ?, ?)',
+                (build_hash, os.path.abspath(document_path), time.time(), cursor.rowcount),
+            )
+        return True
+
+    def remove_build(self, build_hash: str):
+        """Удаление сборки из индекса"""
+        with self.connection:
+            self.connection.execute('DELETE FROM paragraphs WHERE build_hash = ?', (build_hash,))
+            self.connection.execute('DELETE FROM builds WHERE build_hash = ?', (build_hash,))
+
+    def builds(self) -> List[BuildInfo]:
+        """Проиндексированные сборки, начиная с последней"""
+        rows = self.connection.execute(
+            'SELECT build_hash, document_path, indexed_at, paragraph_count FROM builds ORDER BY indexed_at DESC'
+        )
+        return [BuildInfo(*row) for row in rows]
+
+    def search(self, query: str, limit: int = 20, build_hash: Optional[str] = None,
+               raw: bool = False) -> List[SearchHit]:
+        """
+        Поиск абзацев
+
+        :param query: Слова для поиска (или выражение FTS5 при raw=True)
+        :param limit: Максимальное количество результатов
+        :param build_hash: Искать только в одной сборке (допускается префикс хэша)
+        :param raw: Передать запрос в FTS5 без преобразования
+        """
+        match = query if raw else fts_query(query)
+        if not match:
+            return []
+
+        sql = (
+            'SELECT paragraphs.build_hash, builds.document_path, title, chapter, section, paragraph, style, '
+            "snippet(paragraphs, 0, '[', ']', '…', 16), bm25(paragraphs, ?, ?, ?) AS score "
+            'FROM paragraphs JOIN builds ON builds.build_hash = paragraphs.build_hash '
+            'WHERE paragraphs MATCH ?'
+        )
+        params: List[Any] = [*self.COLUMN_WEIGHTS, match]
+        if build_hash:
+            sql += ' AND paragraphs.build_hash LIKE ?'
+            params.append(build_hash + '%')
+        sql += ' ORDER BY score LIMIT ?'
+        params.append(limit)
+
+        return [SearchHit(*row) for row in self.connection.execute(sql, params)]
+
+def print_hits(hits: List[SearchHit], elapsed: float):
+    """Вывод результатов поиска"""
+    print(f"🔎 Найдено: {len(hits)} ({elapsed * 1000:.1f} мс)")
+    for hit in hits:
+        location = ' / '.join(part for part in (hit.title, hit.chapter, hit.section) if part)
+        print(f"\n{hit.build_hash[:12]}  абзац {hit.paragraph + 1}  {location or '—'}")
+        print(f"  {hit.snippet}")
+
+def main():
+    """Индексация документов и поиск по индексу"""
+    parser = argparse.ArgumentParser(description="Полнотекстовый поиск по сборкам диплома")
+    parser.add_argument("--index", default=INDEX_PATH, help="файл индекса SQLite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = commands.add_parser("index", help="добавить документы в индекс")
+    index_parser.add_argument("documents", nargs="+", help="файлы .docx")
+
+    search_parser = commands.add_parser("search", help="найти абзацы")
+    search_parser.add_argument("query", help="слова для поиска")
+    search_parser.add_argument("--limit", type=int, default=20, help="количество результатов")
+    search_parser.add_argument("--build", help="хэш (или его начало) сборки для поиска")
+    search_parser.add_argument("--raw", action="store_true", help="запрос в синтаксисе FTS5")
+
+    commands.add_parser("builds", help="список проиндексированных сборок")
+    args = parser.parse_args()
+
+    with TextSearchIndex(args.index) as search_index:
+        if args.command == "index":
+            # Импорт здесь: для поиска разбор документов не нужен
+            from document_text_extractor import DocumentTextExtractor
+
+            for document_path in args.documents:
+                if not os.path.exists(document_path):
+                    print(f"Ошибка: файл {document_path} не найден")
+                    continue
+                with DocumentTextExtractor(document_path) as extractor:
+                    added = extractor.index_text(search_index)
+                if added:
+                    print(f"✅ {document_path} добавлен в индекс")
+                else:
+                    print(f"ℹ️ {document_path} уже есть в индексе")
+
+        elif args.command == "search":
+            started = time.perf_counter()
+            hits = search_index.search(args.query, limit=args.limit, build_hash=args.build, raw=args.raw)
+            print_hits(hits, time.perf_counter() - started)
+
+        else:
+            for build in search_index.builds():
+                indexed_at = time.strftime('%Y-%m-%d %H:%M', time.localtime(build.indexed_at))
+                print(f"{build.build_hash[:12]}  {indexed_at}  {build.paragraph_count:5d}  {build.document_path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # без NumPy проверки выполняются циклами по тем же столбцам
+    np = None
+
+from document_snapshot import DocumentColumns, DocumentSnapshot, open_document
+from style_registry import StyleRegistry
+
+# Стили заголовков, абзацы которых не относятся к основному тексту
+HEADING_PREFIXES = ('Heading', 'ВКР Глава', 'ВКР Параграф', 'ВКР Пункт')
+# Стили заголовков глав: с них начинается очередная глава в распределении по главам
+CHAPTER_STYLES = ('Heading 1', 'ВКР Глава-Раздел')
+BEFORE_CHAPTERS = 'до первой главы'
+NO_STYLE = 'без стиля'
+
+# Проверки: имя -> описание
+CHECKS = {
+    'шрифт': 'фрагменты основного текста с другим шрифтом',
+    'размер': 'фрагменты основного текста с другим размером шрифта',
+    'выравнивание': 'абзацы основного текста без выравнивания по ширине',
+    'интервал': 'абзацы основного текста с другим межстрочным интервалом',
+}
+
+# Пробельные символы ASCII (как у bytes.strip): абзац только из них считается пустым
+_SPACES = b' \t\n\r\x0b\x0c'
+_VISIBLE_BYTES = np.array([byte not in _SPACES for byte in range(256)]) if np is not None else None
+
+def document_columns(document_path: str, document=None) -> Union[DocumentSnapshot, DocumentColumns]:
+    """
+    Столбцы абзацев и фрагментов документа
+
+    Для файла — снимок документа (open_document), столбцы которого отображены в память;
+    для документа, открытого в python-docx, — DocumentColumns, собранные за один обход тела.
+    Результат закрывается после проверок (with document_columns(...) as columns).
+    """
+    if document is not None:
+        return DocumentColumns.from_document(document)
+    reader = open_document(document_path)
+    if isinstance(reader, DocumentSnapshot):
+        return reader
+    with reader:
+        return DocumentColumns(reader.styles, reader.iter_elements())
+
+class TypographyStatistics:
+    """
+    Проверка шрифта, размера, выравнивания и межстрочного интервала основного
+    текста по столбцам документа.
+
+    Атрибуты абзацев и фрагментов (шрифт, размер в полупунктах, выравнивание,
+    межстрочный интервал, стиль) загружаются в массивы NumPy, и каждая
+    проверка выполняется одной векторной маской. Свойства, не заданные в абзаце
+    или фрагменте, берутся из стиля абзаца с учетом наследования (StyleRegistry).
+    Результат — полные числа нарушений и их распределение по стилям и главам,
+    а не несколько первых примеров. Без NumPy те же проверки выполняются циклом.
+    """
+
+    def __init__(self, font_name: str = 'Times New Roman', font_size: float = 16, code_font: str = 'Courier New',
+                 alignment: str = 'both', line_spacing: float = 1.5, use_numpy: Optional[bool] = None):
+        """
+        :param font_name: Шрифт основного текста
+        :param font_size: Размер шрифта основного текста, пт
+        :param code_font: Шрифт листингов (фрагменты и абзацы кода не проверяются)
+        :param alignment: Выравнивание основного текста (значение w:jc)
+        :param line_spacing: Межстрочный интервал основного текста (множитель)
+        :param use_numpy: Векторные проверки; по умолчанию — если NumPy установлен
+        """
+        if use_numpy and np is None:
+            raise ImportError("Для векторных проверок нужен NumPy")
+        self.font_name = font_name
+        self.font_size = font_size
+        self.code_font = code_font
+        self.alignment = alignment
+        self.line_spacing = line_spacing
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+
+    def _lookups(self, strings: List[str], registry: StyleRegistry) -> Dict[str, List[Any]]:
+        """
+        Таблицы по номерам строк снимка; последний элемент соответствует номеру -1
+        (значение не задано: для стиля — стиль абзаца по умолчанию)
+        """
+        values: List[Optional[str]] = [*strings, None]
+        effective = [registry.effective(value) for value in values]
+        target_half_points = round(self.font_size * 2)
+        return {
+            'heading': [value is not None and value.startswith(HEADING_PREFIXES) for value in values],
+            'chapter': [value in CHAPTER_STYLES for value in values],
+            'code': [value == self.code_font for value in values],
+            'font_bad': [value is not None and value != self.font_name for value in values],
+            'align_bad': [value is not None and value != self.alignment for value in values],
+            'rule_ok': [value in (None, 'auto') for value in values],
+            'style_font_bad': [style.font_name is not None and style.font_name != self.font_name
+                               for style in effective],
+            'style_half_points': [round(style.font_size * 2) if style.font_size else 0 for style in effective],
+            'style_align_bad': [style.alignment != self.alignment for style in effective],
+            'style_spacing_bad': [
+                style.line_rule not in (None, 'auto') or style.line_spacing != self.line_spacing
+                for style in effective
+            ],
+            'target_half_points': [target_half_points],
+        }
+
+    def run(self, source: Union[DocumentSnapshot, DocumentColumns]) -> Dict[str, Any]:
+        """
+        Все проверки по столбцам документа
+
+        :param source: Снимок документа или DocumentColumns (document_columns)
+        :return: Числа нарушений, распределения по стилям и главам, объем проверки
+        """
+        strings = source.strings
+        lookups = self._lookups(strings, StyleRegistry(source.styles))
+        check = self._check_numpy if self.use_numpy else self._check_python
+        counts, chapter_paragraphs, checked = check(source.columns, source.paragraph_count, lookups)
+
+        # Заголовки глав: несколько файлов одной главы дают повторяющиеся заголовки,
+        # их нарушения складываются
+        text = source.columns['text']
+        text_offset = source.columns['r.text_offset']
+        run_start = source.columns['p.run_start']
+        chapter_titles = [BEFORE_CHAPTERS] + [
+            str(text[text_offset[run_start[i]]:text_offset[run_start[i + 1]]], 'utf-8').strip()
+            for i in chapter_paragraphs
+        ]
+        style_names = [*strings, NO_STYLE]
+
+        report: Dict[str, Any] = {
+            'режим': 'numpy' if self.use_numpy else 'python',
+            'проверено': {'абзацев': checked[0], 'фрагментов': checked[1]},
+            'нарушения': {},
+            'по_стилям': {},
+            'по_главам': {},
+        }
+        for name, (by_style, by_chapter) in counts.items():
+            report['нарушения'][name] = sum(by_style)
+            styles: Dict[str, int] = {}
+            for string_id, count in enumerate(by_style):
+                if count:
+                    styles[style_names[string_id]] = styles.get(style_names[string_id], 0) + count
+            report['по_стилям'][name] = dict(sorted(styles.items(), key=lambda item: -item[1]))
+            chapters: Dict[str, int] = {}
+            for chapter, count in enumerate(by_chapter):
+                if count:
+                    chapters[chapter_titles[chapter]] = chapters.get(chapter_titles[chapter], 0) + count
+            report['по_главам'][name] = chapters
+        return report
+
+    def _check_numpy(self, columns: Dict[str, Any], paragraph_count: int,
+                     lookups: Dict[str, List[Any]]) -> Tuple[Dict[str, Tuple[List[int], List[int]]], List[int], Tuple[int, int]]:
+        """Проверки векторными масками (массивы — представления столбцов снимка без копирования)"""
+        table = {name: np.asarray(values) for name, values in lookups.items()}
+        strings_count = len(table['heading'])
+
+        style_id = np.asarray(columns['p.style_id'])
+        style_name = np.asarray(columns['p.style_name'])
+        alignment = np.asarray(columns['p.alignment'])
+        line_spacing = np.asarray(columns['p.line_spacing'])
+        line_rule = np.asarray(columns['p.line_rule'])
+        run_start = np.asarray(columns['p.run_start'])
+        font_name = np.asarray(columns['r.font_name'])
+        font_size = np.asarray(columns['r.font_size'])
+        text_offset = np.asarray(columns['r.text_offset'])
+        text = np.frombuffer(columns['text'], dtype=np.uint8)
+
+        # Абзац каждого фрагмента
+        runs_per_paragraph = np.diff(run_start)
+        run_paragraph = np.repeat(np.arange(paragraph_count), runs_per_paragraph)
+
+        # Непустые абзацы: почти всегда первый байт текста не пробел; текст остальных
+        # (начинающихся с пробела) проверяется отдельно, без прохода по всему тексту
+        text_start = text_offset[run_start[:-1]]
+        text_end = text_offset[run_start[1:]]
+        has_text = text_end > text_start
+        if len(text):
+            has_text &= _VISIBLE_BYTES[text[np.minimum(text_start, len(text) - 1)]]
+        for i in np.flatnonzero((text_end > text_start) & ~has_text):
+            has_text[i] = bool(bytes(text[text_start[i]:text_end[i]]).strip(_SPACES))
+
+        body = has_text & ~table['heading'][style_name]
+        code_run = table['code'][font_name]
+        code_paragraph = (runs_per_paragraph > 0) & (
+            np.bincount(run_paragraph, weights=~code_run, minlength=paragraph_count) == 0)
+        checked_runs = body[run_paragraph] & ~code_run
+        checked_paragraphs = body & ~code_paragraph
+
+        run_style = style_id[run_paragraph]
+        font_bad = checked_runs & np.where(font_name >= 0, table['font_bad'][font_name], table['style_font_bad'][run_style])
+        half_points = np.where(np.isnan(font_size), 0, np.rint(font_size * 2)).astype(np.int64)
+        half_points = np.where(half_points > 0, half_points, table['style_half_points'][run_style])
+        size_bad = checked_runs & (half_points > 0) & (half_points != table['target_half_points'][0])
+        align_bad = checked_paragraphs & np.where(
+            alignment >= 0, table['align_bad'][alignment], table['style_align_bad'][style_id])
+        spacing_bad = checked_paragraphs & np.where(
+            np.isnan(line_spacing), table['style_spacing_bad'][style_id],
+            ~table['rule_ok'][line_rule] | (line_spacing != self.line_spacing))
+
+        chapter_start = table['chapter'][style_name]
+        chapter = np.cumsum(chapter_start)  # 0 — до первой главы
+        chapter_count = int(chapter[-1]) + 1 if paragraph_count else 1
+
+        def histograms(paragraphs):
+            return (
+                np.bincount(style_name[paragraphs] % strings_count, minlength=strings_count).tolist(),
+                np.bincount(chapter[paragraphs], minlength=chapter_count).tolist(),
+            )
+
+        counts = {
+            'шрифт': histograms(run_paragraph[font_bad]),
+            'размер': histograms(run_paragraph[size_bad]),
+            'выравнивание': histograms(np.flatnonzero(align_bad)),
+            'интервал': histograms(np.flatnonzero(spacing_bad)),
+        }
+        checked = (int(checked_paragraphs.sum()), int(checked_runs.sum()))
+        return counts, np.flatnonzero(chapter_start).tolist(), checked
+
+    def _check_python(self, columns: Dict[str, Any], paragraph_count: int,
+                      lookups: Dict[str, List[Any]]) -> Tuple[Dict[str, Tuple[List[int], List[int]]], List[int], Tuple[int, int]]:
+        """Те же проверки циклом по абзацам и фрагментам (без NumPy)"""
+        style_id = columns['p.style_id']
+        style_name = columns['p.style_name']
+        alignment = columns['p.alignment']
+        line_spacing = columns['p.line_spacing']
+        line_rule = columns['p.line_rule']
+        run_start = columns['p.run_start']
+        font_name = columns['r.font_name']
+        font_size = columns['r.font_size']
+        text_offset = columns['r.text_offset']
+        text = bytes(columns['text'])
+        strings_count = len(lookups['heading'])
+        target_half_points = lookups['target_half_points'][0]
+
+        violations: Dict[str, List[Tuple[int, int]]] = {name: [] for name in CHECKS}
+        chapter_paragraphs = []
+        chapter = 0
+        checked_paragraphs = checked_runs = 0
+        for i in range(paragraph_count):
+            if lookups['chapter'][style_name[i]]:
+                chapter_paragraphs.append(i)
+                chapter += 1
+            first, last = run_start[i], run_start[i + 1]
+            if lookups['heading'][style_name[i]] or not text[text_offset[first]:text_offset[last]].strip(_SPACES):
+                continue
+
+            style = style_id[i]
+            code_paragraph = True
+            for j in range(first, last):
+                if lookups['code'][font_name[j]]:
+                    continue
+                code_paragraph = False
+                checked_runs += 1
+                if font_name[j] >= 0:
+                    font_bad = lookups['font_bad'][font_name[j]]
+                else:
+                    font_bad = lookups['style_font_bad'][style]
+                if font_bad:
+                    violations['шрифт'].append((style_name[i], chapter))
+                half_points = 0 if font_size[j] != font_size[j] else round(font_size[j] * 2)  # NaN — не задан
+                if half_points <= 0:
+                    half_points = lookups['style_half_points'][style]
+                if half_points > 0 and half_points != target_half_points:
+                    violations['размер'].append((style_name[i], chapter))
+
+            if code_paragraph and last > first:
+                continue
+            checked_paragraphs += 1
+            if alignment[i] >= 0:
+                align_bad = lookups['align_bad'][alignment[i]]
+            else:
+                align_bad = lookups['style_align_bad'][style]
+            if align_bad:
+                violations['выравнивание'].append((style_name[i], chapter))
+            if line_spacing[i] == line_spacing[i]:
+                spacing_bad = not lookups['rule_ok'][line_rule[i]] or line_spacing[i] != self.line_spacing
+            else:
+                spacing_bad = lookups['style_spacing_bad'][style]
+            if spacing_bad:
+                violations['интервал'].append((style_name[i], chapter))
+
+        counts = {}
+        for name, items in violations.items():
+            by_style = [0] * strings_count
+            by_chapter = [0] * (chapter + 1)
+            for string_id, item_chapter in items:
+                by_style[string_id] += 1
+                by_chapter[item_chapter] += 1
+            counts[name] = (by_style, by_chapter)
+        return counts, chapter_paragraphs, (checked_paragraphs, checked_runs)
+
+def print_typography_statistics(report: Dict[str, Any], top: int = 5):
+    """Вывод чисел нарушений и самых частых стилей и глав"""
+    print(f"\n📐 Статистика оформления ({report['режим']}): проверено абзацев {report['проверено']['абзацев']}, "
+          f"фрагментов {report['проверено']['фрагментов']}")
+    for name, description in CHECKS.items():
+        count = report['нарушения'][name]
+        print(f"{'❌' if count else '✅'} {description}: {count}")
+        if not count:
+            continue
+        styles = list(report['по_стилям'][name].items())[:top]
+        print("   по стилям: " + ', '.join(f"{style} — {value}" for style, value in styles))
+        chapters = sorted(report['по_главам'][name].items(), key=lambda item: -item[1])[:top]
+        print("   по главам: " + ', '.join(f"{chapter} — {value}" for chapter, value in chapters))
+
+def main():
+    """Статистика оформления документа"""
+    parser = argparse.ArgumentParser(description="Векторная проверка оформления основного текста диплома")
+    parser.add_argument("document", nargs="?", default='/home/user/study/diplom/diploma.docx', help="файл .docx")
+    parser.add_argument("--json", help="сохранить статистику в JSON")
+    parser.add_argument("--no-numpy", action="store_true", help="проверки циклом, без NumPy")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.document):
+        print(f"Ошибка: файл {args.document} не найден")
+        return
+
+    with document_columns(args.document) as columns:
+        report = TypographyStatistics(use_numpy=False if args.no_numpy else None).run(columns)
+    print_typography_statistics(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+if __name__ == '__main__':
+    main()